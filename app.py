@@ -1,15 +1,19 @@
 import os
-import threading
+import hmac
+import functools
+import numpy as np
 import pandas as pd
 import re
+import time
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, Response, make_response
+from flask import Flask, render_template, request, redirect, url_for, flash, Response, make_response, jsonify, g
 
-from config import Config
 from logger import setup_logger
-from rawg_api import RawgAPI
-from openai_api import OpenAIAPI
-from excel_manager import ExcelManager
+from services import SERVICES
+from scheduler import set_priority, reset_priority, INTERACTIVE, REFRESH, BULK
+from metrics import REGISTRY
+from tracing import TRACER
+from profiling import ProfilerMiddleware
 
 # Set up the logger
 logger = setup_logger()
@@ -18,41 +22,107 @@ logger = setup_logger()
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev_secret_key")
 
-# Initialize configuration and APIs
-config = Config()
-rawg_api = RawgAPI(config.RAWG_API_KEY)
-openai_api = OpenAIAPI(config.OPENAI_API_KEY)
-excel_manager = ExcelManager(config.EXCEL_FILE_PATH)
+# Clients, the library and the job queue (shared by all web workers and executed by
+# job_runner.py) are created on first use by SERVICES
+config = SERVICES.config
+
+# Every worker reports the same shared queue, so the largest value is kept rather than the sum
+REGISTRY.configure(config.METRICS_DIR, config.METRICS_FLUSH_INTERVAL)
+TRACER.configure(config.TRACE_EXPORTER, path=config.TRACE_FILE_PATH, max_bytes=config.TRACE_FILE_MAX_BYTES,
+                 endpoint=config.TRACE_OTLP_ENDPOINT)
+REGISTRY.gauge("jobs", "Queued and running jobs", ["status"], aggregate="max").set_function(
+    lambda: {(status,): count for status, count in SERVICES.job_queue.count_active().items()}
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds", "Page request latency by route, method and status", ["route", "method", "status"]
+)
+
+# Profiling wraps the whole WSGI app, so requests pay nothing for it unless it is enabled
+if config.PROFILING_ENABLED:
+    app.wsgi_app = ProfilerMiddleware(
+        app.wsgi_app,
+        token=config.PROFILING_TOKEN,
+        sample_rate=config.PROFILE_SAMPLE_RATE,
+        output_dir=config.PROFILE_DIR,
+        profiler=config.PROFILER,
+        max_files=config.PROFILE_MAX_FILES
+    )
 
 # Global variables
 ITEMS_PER_PAGE = 10
 
+def admin_required(view):
+    """Allow a route only to requests carrying ADMIN_TOKEN in the X-Admin-Token header.
+    
+    Without a configured token the route is refused to everyone.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        supplied = request.headers.get("X-Admin-Token", "")
+        if not config.ADMIN_TOKEN or not hmac.compare_digest(supplied.encode("utf-8"), config.ADMIN_TOKEN.encode("utf-8")):
+            return jsonify({"error": "Admin token required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def review_count_order(library):
+    """Order a library's rows by Review Count, highest first, with games without a numeric count last.
+    
+    Args:
+        library: LibrarySnapshot of the library
+        
+    Returns:
+        Array of row numbers
+    """
+    # argsort puts NaN last
+    return np.argsort(-library.numeric('Review Count'), kind='stable')
+
+@app.before_request
+def mark_interactive():
+    """Serve API calls made while handling a page request ahead of bulk work."""
+    g.request_start = time.monotonic()
+    g.priority_token = set_priority(INTERACTIVE)
+
+@app.after_request
+def record_request_latency(response):
+    """Record the latency of a page request."""
+    start = g.pop('request_start', None)
+    if start is not None:
+        # The route pattern rather than the path, so game pages share one series
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(time.monotonic() - start, (route, request.method, str(response.status_code)))
+    return response
+
+@app.teardown_request
+def unmark_interactive(exception=None):
+    """Restore the request class after a page request."""
+    token = g.pop('priority_token', None)
+    if token is not None:
+        reset_priority(token)
+
 def index():
     """Home page route."""
     # Always get the latest game count directly from Excel
     try:
-        df = pd.read_excel(config.EXCEL_FILE_PATH, engine='openpyxl')
-        game_count = len(df)
-        
-        # Get most recent games for display
-        most_recent_games = df.sort_index(ascending=False).head(5).to_dict('records')
-        
-        # Get top rated games by Review Count
-        # First, ensure Review Count column exists and handle non-numeric values
-        if 'Review Count' in df.columns:
-            # Convert to numeric, coercing errors to NaN
-            df['Review Count'] = pd.to_numeric(df['Review Count'], errors='coerce')
-            # Filter out NaN values and sort by Review Count descending
-            top_rated_df = df.dropna(subset=['Review Count']).sort_values('Review Count', ascending=False)
-            top_rated_games = top_rated_df.head(5).to_dict('records')
+        library = SERVICES.excel_manager.read_snapshot()
+        game_count = len(library)
+        
+        # Get most recent games for display (games are stored in the order they were added)
+        most_recent_games = library.records(range(game_count - 1, max(game_count - 6, -1), -1))
+        
+        # Get top rated games by Review Count, leaving out games without a numeric count
+        if 'Review Count' in library.columns:
+            order = review_count_order(library)
+            rated = order[~np.isnan(library.numeric('Review Count')[order])]
+            top_rated_games = library.records(rated[:5])
         else:
             top_rated_games = []
         
-        # Check if a background job is running
-        job_status = "Running" if job_running else "Not running"
+        # Check if a daily job is queued or running
+        active_jobs = SERVICES.job_queue.list_jobs(limit=1, active_only=True, kind="daily")
+        job_status = active_jobs[0]['status'].capitalize() if active_jobs else "Not running"
         
         # Get the model being used for wiki generation
-        openai_model = "GPT-3.5"
+        openai_model = config.OPENAI_MODEL
         
         logger.info(f"Home page loaded. Total games: {game_count}, Job status: {job_status}")
         
@@ -62,7 +132,7 @@ def index():
         most_recent_games = []
         top_rated_games = []
         job_status = "Unknown"
-        openai_model = "GPT-3.5"
+        openai_model = config.OPENAI_MODEL
     
     # Pass data to template
     return render_template(
@@ -80,29 +150,21 @@ def index():
 def games(page=1, sort_by='recent'):
     """Display all processed games with pagination."""
     try:
-        # Always reload games from Excel to get the latest data
-        # This ensures newly processed games appear immediately
-        df = pd.read_excel(config.EXCEL_FILE_PATH, engine='openpyxl')
-        
-        # Convert Review Count to numeric for proper sorting
-        if 'Review Count' in df.columns:
-            df['Review Count'] = pd.to_numeric(df['Review Count'], errors='coerce')
+        # The latest published snapshot, so newly processed games appear immediately
+        library = SERVICES.excel_manager.read_snapshot()
+        total_games = len(library)
         
         # Sort based on sort_by parameter
-        if sort_by == 'ratings':
+        if sort_by == 'ratings' and 'Review Count' in library.columns:
             # Sort by Review Count (highest first)
-            df = df.sort_values('Review Count', ascending=False, na_position='last')
+            order = review_count_order(library)
             logger.info("Sorting games by Review Count")
         else:
             # Default sort by most recently added (assuming the file is in chronological order)
-            df = df.sort_index(ascending=False)
+            order = range(total_games - 1, -1, -1)
             logger.info("Sorting games by most recent")
         
-        # Handle NaN values in Image URL column
-        df['Image URL'] = df['Image URL'].apply(lambda x: '' if pd.isna(x) else x)
-        
         # Calculate pagination
-        total_games = len(df)
         total_pages = (total_games + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
         
         # Ensure valid page number
@@ -111,7 +173,12 @@ def games(page=1, sort_by='recent'):
         # Get games for current page
         start_idx = (page - 1) * ITEMS_PER_PAGE
         end_idx = start_idx + ITEMS_PER_PAGE
-        games_page = df.iloc[start_idx:end_idx].to_dict('records')
+        games_page = library.records(order[start_idx:end_idx])
+        
+        # Handle NaN values in Image URL column
+        for game in games_page:
+            if pd.isna(game.get('Image URL')):
+                game['Image URL'] = ''
         
         logger.info(f"Displaying {len(games_page)} games (page {page}/{total_pages}), total: {total_games} games")
         
@@ -132,32 +199,29 @@ def games(page=1, sort_by='recent'):
 def game_detail(game_id):
     """Display detailed information for a single game."""
     try:
-        # Always reload game from Excel to get the latest data
-        df = pd.read_excel(config.EXCEL_FILE_PATH, engine='openpyxl')
+        # The latest published snapshot of the library
+        library = SERVICES.excel_manager.read_snapshot()
         
         # Find the game by ID
-        game = df[df['Game ID'] == game_id]
+        row = library.find(game_id)
         
-        if len(game) == 0:
+        if row is None:
             flash("Game not found", "error")
             return redirect(url_for('games'))
             
-        # Handle NaN values in columns
-        for column in ['Image URL', 'Steam URL', 'Store Links']:
-            if column in game.columns:
-                game[column] = game[column].apply(lambda x: '' if pd.isna(x) else x)
-            else:
-                # Add empty column if it doesn't exist (for older data)
-                game[column] = ''
-            
         # Convert to dictionary for template
-        game_data = game.iloc[0].to_dict()
+        game_data = library.row(row)
+        
+        # Handle NaN values, and columns that older data does not have
+        for column in ['Image URL', 'Steam URL', 'Store Links']:
+            if pd.isna(game_data.get(column)):
+                game_data[column] = ''
         
         # If image URL is missing, try to fetch it from the RAWG API
         if not game_data.get('Image URL'):
             try:
                 logger.info(f"Fetching missing image for game {game_id}")
-                game_details = rawg_api.get_game_details(game_id)
+                game_details = SERVICES.rawg_api.get_game_details(game_id)
                 if game_details and 'background_image' in game_details:
                     game_data['Image URL'] = game_details.get('background_image', '')
             except Exception as img_error:
@@ -167,7 +231,7 @@ def game_detail(game_id):
         if not game_data.get('Store Links') or not game_data.get('Steam URL'):
             try:
                 logger.info(f"Fetching missing store links for game {game_id}")
-                game_details = rawg_api.get_game_details(game_id)
+                game_details = SERVICES.rawg_api.get_game_details(game_id)
                 if game_details:
                     if 'steam_url' in game_details and not game_data.get('Steam URL'):
                         game_data['Steam URL'] = game_details.get('steam_url', '')
@@ -204,14 +268,13 @@ def search():
         try:
             # Always get fresh processed game IDs directly from Excel to filter out already processed games
             try:
-                df = pd.read_excel(config.EXCEL_FILE_PATH, engine='openpyxl')
-                processed_ids = df['Game ID'].tolist() if 'Game ID' in df.columns else []
+                processed_ids = set(SERVICES.excel_manager.get_processed_game_ids())
             except Exception as excel_error:
                 logger.error(f"Error reading Excel file: {excel_error}")
                 processed_ids = []
             
             # Search for games
-            search_results = rawg_api.search_games(query, min_reviews=1)
+            search_results = SERVICES.rawg_api.search_games(query, min_reviews=1)
             
             # Filter out already processed games
             filtered_results = [game for game in search_results if game['id'] not in processed_ids]
@@ -231,115 +294,89 @@ def search():
             
     return render_template('search.html')
 
-# Global variable to track games being processed
-processing_games = {}
-
 @app.route('/process/<int:game_id>')
 def process_game(game_id):
-    """Process a single game by ID."""
-    global processing_games
-    
-    # Check if already processing
-    if game_id in processing_games:
-        flash(f"Game is already being processed. Please wait.", "info")
-        return redirect(url_for('search'))
+    """Queue a single game for processing by ID.
     
+    The job runner fetches the game's details, so a game RAWG does not
+    know fails its job rather than this request.
+    """
     try:
-        # Get the game details from RAWG
-        game_details = rawg_api.get_game_details(game_id)
-        
-        if not game_details:
-            flash("Could not fetch game details", "error")
-            return redirect(url_for('search'))
-            
-        # Create a simple game dict for processor
+        # The name comes from the search result and is only used for messages
         game = {
             'id': game_id,
-            'name': game_details.get('name', 'Unknown Game')
+            'name': request.args.get('name') or f"Game {game_id}"
         }
         
-        # Process in background thread
-        def process_game_thread(game):
-            global processing_games
-            try:
-                # Initialize GameWikiGenerator components from main.py
-                from main import GameWikiGenerator
-                generator = GameWikiGenerator()
-                
-                # Process the game
-                success = generator.process_game(game)
-                logger.info(f"Background processing for {game['name']} completed with status: {success}")
-            except Exception as e:
-                logger.error(f"Error in background processing for {game['name']}: {e}")
-            finally:
-                # Remove from processing list when done
-                if game['id'] in processing_games:
-                    del processing_games[game['id']]
-        
-        # Mark as processing
-        processing_games[game_id] = game['name']
-        
-        # Start thread
-        thread = threading.Thread(target=process_game_thread, args=(game,))
-        thread.daemon = True
-        thread.start()
-        
-        flash(f"Started processing game: {game['name']}. You can check the game library once processing is complete.", "success")
+        # Queue the game; a game already queued or processing is not queued again
+        job_id, created = SERVICES.job_queue.submit(
+            "process_game", {"game": game}, dedupe_key=f"game:{game_id}", priority=INTERACTIVE
+        )
+        if not created:
+            flash(f"Game is already being processed (job {job_id}). Please wait.", "info")
+            return redirect(url_for('search'))
+        
+        flash(f"Queued game for processing: {game['name']} (job {job_id}). You can check the game library once processing is complete.", "success")
         return redirect(url_for('games'))
             
     except Exception as e:
         logger.error(f"Error starting game processing {game_id}: {e}")
-        # Remove from processing if there was an error
-        if game_id in processing_games:
-            del processing_games[game_id]
         flash("Error processing game", "error")
         return redirect(url_for('search'))
 
-# Global variable to track if job is running
-job_running = False
-
 @app.route('/run-job')
 def run_job():
-    """Run the daily job manually."""
-    global job_running
-    
-    if job_running:
-        flash("A job is already running in the background", "info")
-        return redirect(url_for('games'))
-    
+    """Queue the daily job manually."""
     try:
-        # Start the job in a background thread
-        def run_background_job():
-            global job_running
-            try:
-                # Initialize GameWikiGenerator components from main.py
-                from main import GameWikiGenerator
-                generator = GameWikiGenerator()
-                
-                # Run the job with the full daily limit from config (800 games)
-                generator.run_daily_job()
-                
-                logger.info("Background job completed successfully")
-            except Exception as e:
-                logger.error(f"Error in background job: {e}")
-            finally:
-                job_running = False
-        
-        # Start the thread
-        job_running = True
-        thread = threading.Thread(target=run_background_job)
-        thread.daemon = True
-        thread.start()
-        
-        flash("Job started in the background. Check the game library for results.", "success")
+        # Only one daily job can be queued or running across all workers
+        job_id, created = SERVICES.job_queue.submit("daily", dedupe_key="daily", priority=BULK)
+        if not created:
+            flash(f"A job is already running in the background (job {job_id})", "info")
+            return redirect(url_for('games'))
+        
+        flash(f"Job {job_id} queued. Check the game library for results.", "success")
         return redirect(url_for('games'))
         
     except Exception as e:
         logger.error(f"Error starting job: {e}")
-        job_running = False
         flash("Error starting job", "error")
         return redirect(url_for('index'))
 
+@app.route('/refresh-reviews', methods=['POST'])
+@admin_required
+def refresh_reviews():
+    """Queue a refresh of the review counts of stored games."""
+    job_id, created = SERVICES.job_queue.submit("refresh_reviews", dedupe_key="refresh_reviews", priority=REFRESH)
+    if not created:
+        return jsonify({"error": "A review refresh is already queued or running", "job_id": job_id}), 409
+    logger.info(f"Review refresh queued (job {job_id})")
+    return jsonify(SERVICES.job_queue.get(job_id)), 202
+
+@app.route('/jobs')
+@admin_required
+def list_jobs():
+    """List recent jobs with their status and progress."""
+    active_only = request.args.get('active', '').lower() == 'true'
+    return jsonify(SERVICES.job_queue.list_jobs(limit=request.args.get('limit', 20, type=int), active_only=active_only))
+
+@app.route('/jobs/<int:job_id>')
+@admin_required
+def job_status(job_id):
+    """Get the status and progress of a job."""
+    job = SERVICES.job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@admin_required
+def cancel_job(job_id):
+    """Cancel a queued or running job."""
+    if not SERVICES.job_queue.request_cancel(job_id):
+        return jsonify({"error": "Job is not queued or running"}), 409
+    logger.info(f"Cancellation requested for job {job_id}")
+    return jsonify(SERVICES.job_queue.get(job_id))
+
 @app.template_filter('regex_search')
 def regex_search(text, pattern):
     """Search for regex pattern in text and return all matches"""
@@ -386,11 +423,10 @@ def sitemap():
         
         # Add all game detail pages
         try:
-            df = pd.read_excel(config.EXCEL_FILE_PATH, engine='openpyxl')
+            library = SERVICES.excel_manager.read_snapshot()
             
             # For each game, add a URL
-            for _, game in df.iterrows():
-                game_id = game['Game ID']
+            for game_id in library.values('Game ID'):
                 # Use the last modified date of the game if available, otherwise use today
                 lastmod = today
                 xml_content += f'  <url>\n    <loc>{host_url}/game/{game_id}</loc>\n    <lastmod>{lastmod}</lastmod>\n    <changefreq>monthly</changefreq>\n    <priority>0.7</priority>\n  </url>\n'
@@ -415,6 +451,11 @@ def sitemap():
         logger.error(f"Error generating sitemap: {e}")
         return Response("Error generating sitemap", status=500)
 
+@app.route('/metrics')
+def metrics():
+    """Expose the metrics of every process sharing the data directory in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/robots.txt')
 def robots():
     """Generate a robots.txt file for search engines."""
@@ -429,25 +470,22 @@ def static_game_page(game_id):
     """Generate a static version of the game detail page for SEO."""
     try:
         # Load the game data
-        df = pd.read_excel(config.EXCEL_FILE_PATH, engine='openpyxl')
+        library = SERVICES.excel_manager.read_snapshot()
         
         # Find the game by ID
-        game = df[df['Game ID'] == game_id]
+        row = library.find(game_id)
         
-        if len(game) == 0:
+        if row is None:
             logger.error(f"Game not found for static page: {game_id}")
             return "Game not found", 404
             
-        # Handle NaN values in columns
-        for column in ['Image URL', 'Steam URL', 'Store Links']:
-            if column in game.columns:
-                game[column] = game[column].apply(lambda x: '' if pd.isna(x) else x)
-            else:
-                # Add empty column if it doesn't exist (for older data)
-                game[column] = ''
-            
         # Convert to dictionary for template
-        game_data = game.iloc[0].to_dict()
+        game_data = library.row(row)
+        
+        # Handle NaN values, and columns that older data does not have
+        for column in ['Image URL', 'Steam URL', 'Store Links']:
+            if pd.isna(game_data.get(column)):
+                game_data[column] = ''
         
         # Render the template
         html_content = render_template('static_game.html', game=game_data)
@@ -463,66 +501,71 @@ def static_game_page(game_id):
         logger.error(f"Error generating static game page: {e}")
         return "Error generating page", 500
 
+def generate_static_pages(static_dir=None):
+    """Render a static HTML page for every game, plus an index page.
+    
+    Must run inside an application context.
+    
+    Args:
+        static_dir: Directory to write the pages to (default: static/pages)
+        
+    Returns:
+        Number of games rendered
+    """
+    library = SERVICES.excel_manager.read_snapshot()
+    game_count = len(library)
+    
+    logger.info(f"Starting static page generation for {game_count} games")
+    
+    # Create the static directory if it doesn't exist
+    static_dir = static_dir or os.path.join(app.static_folder, 'pages')
+    os.makedirs(static_dir, exist_ok=True)
+    
+    # For each game, generate a static HTML file
+    for row in range(game_count):
+        game = library.row(row)
+        try:
+            game_id = game['Game ID']
+            
+            # Handle NaN values
+            game_data = {}
+            for column, value in game.items():
+                game_data[column] = '' if pd.isna(value) else value
+            
+            # Render the template
+            html_content = render_template('static_game.html', game=game_data)
+            
+            # Write to file
+            file_path = os.path.join(static_dir, f"{game_id}.html")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(html_content)
+                
+            logger.info(f"Generated static page for game {game_id}: {game_data.get('Name', 'Unknown')}")
+            
+        except Exception as game_error:
+            logger.error(f"Error generating static page for game {game.get('Game ID', 'Unknown')}: {game_error}")
+    
+    # Generate index file
+    index_html = render_template('static_index.html', games=library.records(range(game_count)))
+    with open(os.path.join(static_dir, "index.html"), 'w', encoding='utf-8') as f:
+        f.write(index_html)
+    
+    logger.info(f"Static page generation completed for {game_count} games")
+    return game_count
+
 @app.route('/generate-static-pages')
 def generate_all_static_pages():
-    """Admin route to trigger regeneration of all static pages."""
+    """Admin route to queue regeneration of all static pages."""
     try:
-        # This is an administrative function that could be run periodically
-        # Start a background thread to generate static files
-        def generate_pages_thread():
-            try:
-                df = pd.read_excel(config.EXCEL_FILE_PATH, engine='openpyxl')
-                game_count = len(df)
-                
-                logger.info(f"Starting static page generation for {game_count} games")
-                
-                # Create the static directory if it doesn't exist
-                static_dir = os.path.join(app.static_folder, 'pages')
-                os.makedirs(static_dir, exist_ok=True)
-                
-                # For each game, generate a static HTML file
-                for _, game in df.iterrows():
-                    try:
-                        game_id = game['Game ID']
-                        
-                        # Handle NaN values
-                        game_data = {}
-                        for column, value in game.items():
-                            game_data[column] = '' if pd.isna(value) else value
-                        
-                        # Render the template
-                        html_content = render_template('static_game.html', game=game_data)
-                        
-                        # Write to file
-                        file_path = os.path.join(static_dir, f"{game_id}.html")
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.write(html_content)
-                            
-                        logger.info(f"Generated static page for game {game_id}: {game_data.get('Name', 'Unknown')}")
-                        
-                    except Exception as game_error:
-                        logger.error(f"Error generating static page for game {game.get('Game ID', 'Unknown')}: {game_error}")
-                
-                # Generate index file
-                index_html = render_template('static_index.html', games=df.to_dict('records'))
-                with open(os.path.join(static_dir, "index.html"), 'w', encoding='utf-8') as f:
-                    f.write(index_html)
-                
-                logger.info(f"Static page generation completed for {game_count} games")
-                
-            except Exception as e:
-                logger.error(f"Error in static page generation thread: {e}")
-        
-        # Start the thread
-        thread = threading.Thread(target=generate_pages_thread)
-        thread.daemon = True
-        thread.start()
-        
-        flash("Static page generation started. This may take a few minutes.", "info")
+        job_id, created = SERVICES.job_queue.submit("static_pages", dedupe_key="static_pages", priority=BULK)
+        if not created:
+            flash(f"Static page generation is already running (job {job_id})", "info")
+        else:
+            flash(f"Static page generation queued (job {job_id}). This may take a few minutes.", "info")
         return redirect(url_for('index'))
         
     except Exception as e:
-        logger.error(f"Error starting static page generation: {e}")
+        logger.error(f"Error queuing static page generation: {e}")
         flash("Error starting static page generation", "error")
         return redirect(url_for('index'))
 
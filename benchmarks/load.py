@@ -0,0 +1,309 @@
+"""HTTP load test for the web routes.
+
+Starts gunicorn against a synthetic library in a temporary directory (or
+targets a running server with --url), drives a weighted mix of routes from
+concurrent closed-loop clients, and reports throughput, latency quantiles
+and error rates per concurrency level:
+
+    python -m benchmarks.load --size 10000 --concurrency 1,8,32 --duration 30
+    python -m benchmarks.load --mix crawler --workers 4 --with-writer
+
+Each client sends its next request as soon as the previous one finishes, so
+throughput at a concurrency level is what the server sustains, not an
+offered rate.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+import requests
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+from benchmarks.synthetic import synthetic_row, write_library
+from latency import LatencyHistogram
+
+# Weighted route templates; {id} is a game in the library and {page} a page of /games
+MIXES = {
+    "browse": [
+        ("/", 10), ("/games", 20), ("/games/{page}", 15), ("/game/{id}", 40),
+        ("/static-game/{id}.html", 10), ("/sitemap.xml", 5)
+    ],
+    "crawler": [("/robots.txt", 5), ("/sitemap.xml", 15), ("/static-game/{id}.html", 80)],
+    "detail": [("/game/{id}", 100)]
+}
+
+ITEMS_PER_PAGE = 10  # Matches app.ITEMS_PER_PAGE
+
+def _buckets():
+    """Log-spaced bucket bounds from 0.5ms to about a minute, finer than the API defaults."""
+    bounds = []
+    bound = 0.0005
+    while bound < 60:
+        bounds.append(round(bound, 6))
+        bound *= 1.15
+    return bounds
+
+class RouteStats:
+    """Latency and error counts for one route template."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram(_buckets())
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        self.histogram.observe(seconds)
+        if not ok:
+            with self.lock:
+                self.errors += 1
+
+    def summary(self, duration):
+        snapshot = self.histogram.snapshot()
+        return {
+            "requests": snapshot["count"],
+            "errors": self.errors,
+            "error_rate": self.errors / snapshot["count"] if snapshot["count"] else 0.0,
+            "throughput_rps": snapshot["count"] / duration,
+            "p50": snapshot["p50"],
+            "p95": snapshot["p95"],
+            "p99": snapshot["p99"]
+        }
+
+class LibraryWriter:
+    """Background writer appending games to the library while the load runs."""
+
+    def __init__(self, library_path, first_id, interval):
+        """Initialize the writer.
+
+        Args:
+            library_path: Workbook the server reads
+            first_id: ID of the first game written
+            interval: Seconds between writes
+        """
+        from excel_manager import ExcelManager
+
+        # Publish snapshots where the server's default configuration reads them, like the job runner does
+        self.excel_manager = ExcelManager(
+            library_path, snapshot_dir=os.path.join(os.path.dirname(library_path), "library_snapshots")
+        )
+        self.next_id = first_id
+        self.interval = interval
+        self.rng = random.Random(first_id)
+        self.histogram = LatencyHistogram(_buckets())
+        self.failures = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="library-writer", daemon=True)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            if not self.excel_manager.add_game_entry(synthetic_row(self.next_id, self.rng)):
+                self.failures += 1
+            self.histogram.observe(time.perf_counter() - start)
+            self.next_id += 1
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        snapshot = self.histogram.snapshot()
+        return {"writes": snapshot["count"], "failures": self.failures, "p50": snapshot["p50"], "p95": snapshot["p95"]}
+
+def start_server(workspace, size, workers, threads, port):
+    """Start gunicorn serving a synthetic library.
+
+    Args:
+        workspace: Working directory of the server; the library goes in its data/
+        size: Number of games in the library
+        workers: Gunicorn worker processes
+        threads: Threads per worker
+        port: Port to listen on
+
+    Returns:
+        Tuple of (process, base URL, library path)
+    """
+    data_dir = workspace / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    library_path = data_dir / "game_wiki.xlsx"
+    write_library(str(library_path), size)
+
+    env = dict(os.environ)
+    env.setdefault("RAWG_API_KEY", "load-test")
+    env.setdefault("OPENAI_API_KEY", "load-test")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_DIR), env.get("PYTHONPATH")]))
+    log_file = open(workspace / "server.log", "w")
+    # Same entry point and settings as the Procfile
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", str(REPO_DIR / "gunicorn.conf.py"),
+         "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+         "--threads", str(threads), "--timeout", "120", "main:app"],
+        cwd=workspace, env=env, stdout=log_file, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}; see {workspace / 'server.log'}")
+        try:
+            requests.get(f"{base_url}/robots.txt", timeout=1)
+            return process, base_url, str(library_path)
+        except requests.RequestException:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 60 seconds")
+
+def run_level(base_url, routes, size, concurrency, duration, warmup, timeout):
+    """Drive the server from concurrent clients for a fixed time.
+
+    Args:
+        base_url: Server to load
+        routes: Weighted route templates
+        size: Number of games in the library, for {id} and {page}
+        concurrency: Number of clients
+        duration: Seconds to measure
+        warmup: Seconds to run before measuring
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Results for the level
+    """
+    templates = [route for route, _ in routes]
+    weights = [weight for _, weight in routes]
+    pages = max(1, (size + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
+    stats = {template: RouteStats() for template in templates}
+    overall = RouteStats()
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        while True:
+            template = rng.choices(templates, weights)[0]
+            path = template.format(id=rng.randint(1, size), page=rng.randint(1, pages))
+            start = time.perf_counter()
+            if start >= stop_at:
+                break
+            try:
+                ok = session.get(base_url + path, timeout=timeout).status_code < 400
+            except requests.RequestException:
+                ok = False
+            # Requests started during the warmup are not counted
+            if start >= measure_from:
+                elapsed = time.perf_counter() - start
+                stats[template].record(elapsed, ok)
+                overall.record(elapsed, ok)
+
+    threads = [threading.Thread(target=client, args=(seed,), daemon=True) for seed in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = overall.summary(duration)
+    return {
+        "concurrency": concurrency,
+        "duration": duration,
+        **summary,
+        "routes": {template: route_stats.summary(duration) for template, route_stats in stats.items()}
+    }
+
+def _ms(seconds):
+    return f"{seconds * 1000:8.1f}ms" if seconds is not None else "       -  "
+
+def print_level(result):
+    """Print the results of one concurrency level."""
+    print(f"\nConcurrency {result['concurrency']}: {result['throughput_rps']:.1f} req/s, "
+          f"{result['requests']} requests, {result['error_rate'] * 100:.2f}% errors, "
+          f"p50 {_ms(result['p50']).strip()} p95 {_ms(result['p95']).strip()} p99 {_ms(result['p99']).strip()}")
+    for template, route in result["routes"].items():
+        print(f"  {template:<24} {route['throughput_rps']:8.1f} req/s  p50 {_ms(route['p50'])}  "
+              f"p95 {_ms(route['p95'])}  p99 {_ms(route['p99'])}  errors {route['errors']}")
+    if "writer" in result:
+        writer = result["writer"]
+        print(f"  background writes: {writer['writes']} ({writer['failures']} failed), "
+              f"p50 {_ms(writer['p50']).strip()} p95 {_ms(writer['p95']).strip()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the web routes")
+    parser.add_argument("--url", help="Load a running server instead of starting gunicorn")
+    parser.add_argument("--library", help="Workbook of the running server, for --with-writer with --url")
+    parser.add_argument("--size", type=int, default=10000, help="Games in the synthetic library (with --url: games to pick IDs from)")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="browse", help="Weighted route mix")
+    parser.add_argument("--route", action="append", help="Load only these routes (may repeat, e.g. /game/{id})")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated client counts, run in turn")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds measured per concurrency level")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds before measuring each level")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--workers", type=int, default=2, help="Gunicorn workers (as in render.yaml)")
+    parser.add_argument("--threads", type=int, default=1, help="Threads per gunicorn worker")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the gunicorn server")
+    parser.add_argument("--with-writer", action="store_true", help="Append games to the library during the load")
+    parser.add_argument("--write-interval", type=float, default=1.0, help="Seconds between background writes")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    routes = [(route, 1) for route in args.route] if args.route else MIXES[args.mix]
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    workspace = None
+    process = None
+    library_path = args.library
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            workspace = Path(tempfile.mkdtemp(prefix="game_wiki_load_"))
+            print(f"Starting gunicorn ({args.workers} workers x {args.threads} threads) with {args.size} games",
+                  file=sys.stderr)
+            process, base_url, library_path = start_server(workspace, args.size, args.workers, args.threads, args.port)
+        if args.with_writer and not library_path:
+            parser.error("--with-writer needs --library when loading a running server")
+
+        results = []
+        for level in levels:
+            writer = None
+            if args.with_writer:
+                # New IDs follow the synthetic ones and earlier levels' writes
+                first_id = args.size + 1 + sum(result["writer"]["writes"] for result in results)
+                writer = LibraryWriter(library_path, first_id, args.write_interval)
+                writer.start()
+            try:
+                result = run_level(base_url, routes, args.size, level, args.duration, args.warmup, args.timeout)
+            finally:
+                if writer:
+                    writer_stats = writer.stop()
+            if writer:
+                result["writer"] = writer_stats
+            print_level(result)
+            results.append(result)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "target": args.url or f"gunicorn main:app, {args.workers} workers x {args.threads} threads",
+                "size": args.size,
+                "mix": dict(routes),
+                "with_writer": args.with_writer,
+                "levels": results
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
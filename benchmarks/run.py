@@ -0,0 +1,299 @@
+"""Benchmarks for the storage, rendering and pipeline hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run --sizes 1000,10000 --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+Everything runs against synthetic libraries in a temporary directory, with
+RAWG replaced by an in-process stub and OpenAI by openai_simulator.py, so no
+API keys or network access are needed and real data is never touched.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+from benchmarks.synthetic import SyntheticRawg, synthetic_row, write_library
+
+ROUTES = [
+    ("GET", "/"),
+    ("GET", "/games"),
+    ("GET", "/games/sort/ratings/1"),
+    ("GET", "/game/1"),
+    ("GET", "/search"),
+    ("POST", "/search"),
+    ("GET", "/jobs"),
+    ("GET", "/sitemap.xml"),
+    ("GET", "/robots.txt"),
+    ("GET", "/static-game/1.html")
+]
+
+def measure(fn, repeat):
+    """Time a function.
+
+    Args:
+        fn: Function to call; it gets the run number
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary of timing statistics in seconds
+    """
+    samples = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        fn(run)
+        samples.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples)
+    }
+
+def bench_storage(excel_manager, size, repeat):
+    """Benchmark ExcelManager reads and writes against the library."""
+    from random import Random
+    from excel_manager import ExcelManager
+
+    rng = Random(size)
+    results = {}
+    # A manager without shared snapshots parses the workbook, like the first read after a change
+    results["excel.read_snapshot (cold)"] = measure(
+        lambda run: ExcelManager(excel_manager.file_path).read_snapshot(), repeat
+    )
+    results["excel.read_snapshot"] = measure(lambda run: excel_manager.read_snapshot(), repeat)
+    results["excel.get_processed_game_ids"] = measure(lambda run: excel_manager.get_processed_game_ids(), repeat)
+    # Each add appends a new game, so the library grows by `repeat` rows
+    results["excel.add_game_entry"] = measure(
+        lambda run: excel_manager.add_game_entry(synthetic_row(size + run + 1, rng)), repeat
+    )
+    results["excel.get_game_count"] = measure(lambda run: excel_manager.get_game_count(), repeat)
+    return results
+
+def bench_routes(app_module, repeat):
+    """Benchmark Flask routes through the test client."""
+    client = app_module.app.test_client()
+    # The job routes require the admin token
+    headers = {"X-Admin-Token": app_module.config.ADMIN_TOKEN or ""}
+    results = {}
+    for method, path in ROUTES:
+        def request(run, method=method, path=path):
+            if method == "POST":
+                response = client.post(path, data={"query": "synthetic"}, headers=headers)
+            else:
+                response = client.get(path, headers=headers)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}")
+        results[f"route.{method} {path}"] = measure(request, repeat)
+    return results
+
+def bench_static(app_module, workspace, repeat):
+    """Benchmark static page generation for the whole library."""
+    static_dir = workspace / "static_pages"
+
+    def generate(run):
+        shutil.rmtree(static_dir, ignore_errors=True)
+        with app_module.app.app_context():
+            app_module.generate_static_pages(str(static_dir))
+
+    return {"static.generate_pages": measure(generate, repeat)}
+
+def bench_pipeline(workspace, size, games, simulator_latency):
+    """Benchmark end-to-end rapid processing with stubbed APIs.
+
+    Args:
+        workspace: Directory for the run's files
+        size: Library size the run belongs to
+        games: Number of games to process
+        simulator_latency: Median latency of the simulated OpenAI backend
+
+    Returns:
+        Dictionary of pipeline results
+    """
+    from openai_simulator import SimulatorSettings, start_simulator
+    from rapid_processor import RapidGameProcessor
+
+    server, simulator = start_simulator(SimulatorSettings(seed=0, latency_median=simulator_latency, latency_sigma=0.2))
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    try:
+        processor = RapidGameProcessor(
+            target_count=games,
+            time_limit_minutes=60,
+            use_cache=False,
+            excel_path=str(workspace / f"pipeline_{size}.xlsx")
+        )
+        processor.rawg_api = SyntheticRawg(games * 2)
+        results = processor.run()
+    finally:
+        server.shutdown()
+        os.environ.pop("OPENAI_BASE_URL", None)
+    return {
+        "pipeline.rapid": {
+            "runs": 1,
+            "games": results["games_processed"],
+            "median": results["elapsed_time"],
+            "min": results["elapsed_time"],
+            "max": results["elapsed_time"],
+            "games_per_minute": results["games_per_minute"],
+            "simulator_requests": simulator.get_stats()["requests"]
+        }
+    }
+
+def run_suite(sizes, repeat, pipeline_max, simulator_latency, skip):
+    """Run every benchmark at each library size.
+
+    Args:
+        sizes: Library sizes to benchmark
+        repeat: Timed runs per benchmark (sizes above 10k use one)
+        pipeline_max: Most games a pipeline benchmark processes
+        simulator_latency: Median latency of the simulated OpenAI backend
+        skip: Benchmark groups to leave out
+
+    Returns:
+        Results keyed by size, then benchmark name
+    """
+    workspace = Path(tempfile.mkdtemp(prefix="game_wiki_bench_"))
+    previous_dir = os.getcwd()
+    # Config resolves data/ against the working directory and requires API keys
+    os.chdir(workspace)
+    os.environ.setdefault("RAWG_API_KEY", "benchmark")
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("ADMIN_TOKEN", "benchmark")
+    try:
+        import app as app_module
+        import rapid_processor  # noqa: F401
+        from services import SERVICES
+
+        # Entry modules set up INFO logging on import; per-request logs would dominate the timings
+        logging.getLogger().setLevel(logging.WARNING)
+        app_module.app.testing = True
+        SERVICES.override("rawg_api", SyntheticRawg(1000))
+        results = {}
+        for size in sizes:
+            runs = repeat if size <= 10000 else 1
+            print(f"Benchmarking {size} games ({runs} runs each)", file=sys.stderr)
+            start = time.perf_counter()
+            write_library(app_module.config.EXCEL_FILE_PATH, size)
+            print(f"Wrote synthetic library in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+            size_results = {}
+            if "storage" not in skip:
+                size_results.update(bench_storage(SERVICES.excel_manager, size, runs))
+            if "routes" not in skip:
+                size_results.update(bench_routes(app_module, runs))
+            if "static" not in skip:
+                size_results.update(bench_static(app_module, workspace, runs))
+            if "pipeline" not in skip:
+                size_results.update(bench_pipeline(workspace, size, min(size, pipeline_max), simulator_latency))
+            results[str(size)] = size_results
+        return results
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def git_commit():
+    """Get the current commit, if the repository is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold, min_delta=0.005):
+    """Compare median timings against a baseline.
+
+    Args:
+        results: Results from run_suite
+        baseline: Results loaded from a baseline file
+        threshold: Relative slowdown flagged as a regression (0.2 = 20%)
+        min_delta: Smallest slowdown in seconds flagged, so timer noise on
+            sub-millisecond benchmarks is not reported
+
+    Returns:
+        List of (size, benchmark, baseline median, current median) regressions
+    """
+    regressions = []
+    for size, benchmarks in results.items():
+        for name, stats in benchmarks.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous or not previous.get("median"):
+                continue
+            ratio = stats["median"] / previous["median"]
+            slower = ratio > 1 + threshold and stats["median"] - previous["median"] >= min_delta
+            flag = "REGRESSION" if slower else ""
+            print(f"{size:>8} {name:<36} {previous['median']:>10.4f}s -> {stats['median']:>10.4f}s {ratio:>6.2f}x {flag}")
+            if flag:
+                regressions.append((size, name, previous["median"], stats["median"]))
+    return regressions
+
+def print_results(results):
+    """Print a table of median timings."""
+    for size, benchmarks in results.items():
+        print(f"\n{size} games")
+        for name, stats in benchmarks.items():
+            extra = f"  {stats['games_per_minute']:.0f} games/min" if "games_per_minute" in stats else ""
+            print(f"  {name:<36} median {stats['median']:.4f}s  min {stats['min']:.4f}s  max {stats['max']:.4f}s{extra}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark storage, routes, static generation and the pipeline")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated library sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (sizes above 10k use one)")
+    parser.add_argument("--pipeline-max", type=int, default=1000,
+                        help="Most games a pipeline benchmark processes (each store rewrites the workbook)")
+    parser.add_argument("--simulator-latency", type=float, default=0.05, help="Median simulated OpenAI latency")
+    parser.add_argument("--skip", default="", help="Comma-separated groups to skip: storage, routes, static, pipeline")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Smallest slowdown in seconds flagged")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    skip = {group.strip() for group in args.skip.split(",") if group.strip()}
+
+    results = run_suite(sizes, args.repeat, args.pipeline_max, args.simulator_latency, skip)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    print_results(results)
+
+    output = args.output or str(REPO_DIR / "benchmarks" / "results" / f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    for path in filter(None, [output, args.save_baseline]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.baseline} (commit {baseline['meta'].get('commit')}):")
+        regressions = compare(results, baseline["results"], args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} benchmarks regressed by more than {args.threshold * 100:.0f}%")
+            sys.exit(1)
+        print("\nNo regressions")
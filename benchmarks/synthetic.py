@@ -0,0 +1,124 @@
+import random
+import time
+from typing import Dict, Any, List, Optional
+
+from scheduler import get_scheduler
+
+COLUMNS = [
+    'Game ID', 'Name', 'Studio', 'Release Date', 'Metacritic', 'Review Count', 'Image URL',
+    'Wiki Entry', 'References', 'Additional Info', 'Steam URL', 'Store Links', 'Date Added'
+]
+
+WORDS = (
+    "gameplay level design narrative soundtrack combat exploration puzzle platforming pixel art studio "
+    "release reception critics players community update roguelike crafting dungeon story atmosphere"
+).split()
+
+def synthetic_row(game_id: int, rng: random.Random, entry_chars: int = 800) -> Dict[str, Any]:
+    """Build one library row with realistic field sizes.
+
+    Args:
+        game_id: The game ID
+        rng: Random generator, for repeatable rows
+        entry_chars: Approximate length of the wiki entry
+
+    Returns:
+        The row keyed by library column
+    """
+    words = []
+    while sum(len(word) + 1 for word in words) < entry_chars:
+        words.append(rng.choice(WORDS))
+    return {
+        'Game ID': game_id,
+        'Name': f"Synthetic Game {game_id}",
+        'Studio': f"Studio {game_id % 997}",
+        'Release Date': f"20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        'Metacritic': rng.randint(50, 95),
+        'Review Count': rng.randint(1, 5000),
+        'Image URL': f"https://media.example.com/games/{game_id}.jpg",
+        'Wiki Entry': f"<p>{' '.join(words)}</p>",
+        'References': '<ol class="ps-4"><li class="mb-2">Reviewer. (2024). Review.</li></ol>',
+        'Additional Info': f"Average Rating: {rng.randint(10, 50) / 10}\nPlatforms: PC, Switch",
+        'Steam URL': f"https://store.steampowered.com/app/{game_id}/",
+        'Store Links': f"Steam: https://store.steampowered.com/app/{game_id}/",
+        'Date Added': "April 29th, 2025"
+    }
+
+def write_library(path: str, size: int, seed: int = 0) -> None:
+    """Write a synthetic library workbook.
+
+    Args:
+        path: Workbook to write
+        size: Number of games
+        seed: Seed for repeatable content
+    """
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(COLUMNS)
+    for game_id in range(1, size + 1):
+        row = synthetic_row(game_id, rng)
+        sheet.append([row[column] for column in COLUMNS])
+    workbook.save(path)
+
+class SyntheticRawg:
+    """In-process stand-in for RawgAPI serving a fixed catalogue of games."""
+
+    def __init__(self, total_games: int, latency: float = 0.0, first_id: int = 1_000_000):
+        """Initialize the stub.
+
+        Args:
+            total_games: Number of games in the listing
+            latency: Seconds each call takes
+            first_id: ID of the first game, above the IDs of synthetic libraries
+        """
+        self.total_games = total_games
+        self.latency = latency
+        self.first_id = first_id
+        self.scheduler = get_scheduler("rawg")
+
+    def _listing(self, offset: int, count: int) -> List[Dict[str, Any]]:
+        """Build listing entries, with the bulky fields RAWG listings carry."""
+        games = []
+        for index in range(offset, min(offset + count, self.total_games)):
+            game_id = self.first_id + index
+            games.append({
+                'id': game_id,
+                'name': f"Listed Game {game_id}",
+                'ratings_count': 10,
+                'short_screenshots': [{'id': n, 'image': f"https://media.example.com/{game_id}/{n}.jpg"} for n in range(6)],
+                'tags': [{'id': n, 'name': f"tag {n}"} for n in range(10)]
+            })
+        return games
+
+    def get_indie_games(self, page: int = 1, page_size: int = 20, metacritic_min: Optional[int] = None,
+                        min_reviews: Optional[int] = 1) -> List[Dict[str, Any]]:
+        time.sleep(self.latency)
+        return self._listing((page - 1) * page_size, page_size)
+
+    def search_games(self, query: str, page: int = 1, page_size: int = 20,
+                     min_reviews: Optional[int] = 1) -> List[Dict[str, Any]]:
+        time.sleep(self.latency)
+        return self._listing((page - 1) * page_size, page_size)
+
+    def get_game_details(self, game_id: int) -> Optional[Dict[str, Any]]:
+        time.sleep(self.latency)
+        return {
+            'id': game_id,
+            'name': f"Listed Game {game_id}",
+            'description': "<p>A synthetic game used for benchmarks.</p>" * 5,
+            'released': "2024-01-01",
+            'platforms': [{'platform': {'name': 'PC'}}],
+            'developers': [{'name': 'Synthetic Studio'}],
+            'publishers': [{'name': 'Synthetic Publisher'}],
+            'genres': [{'name': 'Indie'}],
+            'tags': [{'name': 'Singleplayer'}],
+            'rating': 4.2,
+            'ratings_count': 120,
+            'metacritic': 80,
+            'background_image': f"https://media.example.com/games/{game_id}.jpg",
+            'steam_url': f"https://store.steampowered.com/app/{game_id}/",
+            'store_links': {'Steam': f"https://store.steampowered.com/app/{game_id}/"}
+        }
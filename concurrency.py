@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class AIMDController:
+    """Adapts a concurrency limit with additive increase, multiplicative decrease.
+
+    While calls succeed with normal latency the limit grows by one for every
+    limit's worth of successes (about one step per round of calls). A rate
+    limit response, a timeout, a latency spike or a rising error rate cuts it
+    by decrease_factor. Cuts are at most one per round trip (twice the
+    baseline latency, capped at cooldown), so a burst of failures from calls
+    that were already in flight counts as one signal.
+    """
+
+    OK = "ok"
+    OVERLOAD = "overload"
+    ERROR = "error"
+
+    def __init__(self, name: str, initial: int, min_limit: int = 1, max_limit: int = 64,
+                 decrease_factor: float = 0.5, latency_factor: float = 3.0, error_threshold: float = 0.2,
+                 window: int = 50, cooldown: float = 5.0):
+        """Initialize the controller.
+
+        Args:
+            name: Name used in logs
+            initial: Starting limit
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            decrease_factor: Factor applied to the limit on overload
+            latency_factor: Latency above this multiple of the baseline counts as a spike
+            error_threshold: Error rate over the recent window that counts as overload
+            window: Number of recent calls used for the error rate
+            cooldown: Longest wait between two decreases, used until a baseline latency is known
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.error_threshold = error_threshold
+        self.outcomes = deque(maxlen=window)
+        self.cooldown = cooldown
+        self.baseline_latency: Optional[float] = None
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.lock = threading.Lock()
+
+    def current_limit(self) -> int:
+        """Get the current limit as a whole number of calls."""
+        return int(self.limit)
+
+    def record(self, outcome: str, latency: Optional[float] = None) -> int:
+        """Record the outcome of a call and adjust the limit.
+
+        Args:
+            outcome: OK, OVERLOAD (rate limited or timed out) or ERROR
+            latency: Seconds the call took, for successful calls
+
+        Returns:
+            The limit after the adjustment
+        """
+        with self.lock:
+            self.outcomes.append(outcome == self.ERROR)
+
+            if outcome == self.OVERLOAD:
+                self._decrease("rate limited or timed out")
+            elif outcome == self.ERROR:
+                errors = sum(self.outcomes)
+                if len(self.outcomes) >= 10 and errors / len(self.outcomes) >= self.error_threshold:
+                    self._decrease(f"error rate {errors / len(self.outcomes) * 100:.0f}%")
+            elif latency is not None and self._is_spike(latency):
+                self._decrease(f"latency spike {latency:.2f}s")
+            else:
+                self._increase()
+            return int(self.limit)
+
+    def _is_spike(self, latency: float) -> bool:
+        """Update the latency baseline and check whether a sample is a spike. Must hold the lock."""
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+            return False
+        spike = latency > self.baseline_latency * self.latency_factor
+        if not spike:
+            # Slow-moving average of normal latencies
+            self.baseline_latency += (latency - self.baseline_latency) * 0.05
+        return spike
+
+    def _increase(self) -> None:
+        """Grow the limit by one per limit's worth of successes. Must hold the lock."""
+        if self.limit >= self.max_limit:
+            return
+        previous = int(self.limit)
+        self.limit = min(self.limit + 1.0 / self.limit, self.max_limit)
+        if int(self.limit) > previous:
+            self.increases += 1
+            logger.debug(f"{self.name} concurrency limit raised to {int(self.limit)}")
+
+    def _decrease(self, reason: str) -> None:
+        """Cut the limit, at most once per round trip. Must hold the lock."""
+        now = time.monotonic()
+        cooldown = self.cooldown
+        if self.baseline_latency is not None:
+            cooldown = min(cooldown, self.baseline_latency * 2)
+        if now - self.last_decrease < cooldown:
+            return
+        previous = int(self.limit)
+        self.limit = max(self.limit * self.decrease_factor, self.min_limit)
+        self.last_decrease = now
+        self.outcomes.clear()
+        if int(self.limit) < previous:
+            self.decreases += 1
+            logger.warning(f"{self.name} concurrency limit cut {previous} -> {int(self.limit)} ({reason})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the current limit and adjustment counts.
+
+        Returns:
+            Dictionary with limit, bounds, baseline latency and adjustment counts
+        """
+        with self.lock:
+            return {
+                "limit": int(self.limit),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "baseline_latency": self.baseline_latency,
+                "increases": self.increases,
+                "decreases": self.decreases
+            }
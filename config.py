@@ -28,10 +28,24 @@ class Config:
         
         timestamp = ""  # Use empty string for a single file
         self.EXCEL_FILE_PATH = str(self.DATA_DIR / f"game_wiki{timestamp}.xlsx")
+        # Columnar snapshots of the library that every web worker maps instead of parsing the workbook (empty to turn off)
+        self.LIBRARY_SNAPSHOT_DIR = os.getenv("LIBRARY_SNAPSHOT_DIR", str(self.DATA_DIR / "library_snapshots")) or None
         
         # API configuration
         self.RAWG_BASE_URL = "https://api.rawg.io/api"
-        self.OPENAI_MODEL = "gpt-3.5-turbo-instruct"  # Using the fastest model for maximum speed
+        self.OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # OpenAI-compatible endpoint, e.g. openai_simulator.py
+        
+        # Ordered model tiers per mode; later tiers are used when earlier ones degrade
+        self.OPENAI_MODEL_TIERS = {
+            "standard": [m.strip() for m in os.getenv("OPENAI_MODEL_TIERS", f"{self.OPENAI_MODEL},gpt-4o-mini").split(",") if m.strip()],
+            # The instruct model is the fastest fallback when chat models degrade
+            "rapid": [m.strip() for m in os.getenv("RAPID_OPENAI_MODEL_TIERS", "gpt-3.5-turbo,gpt-3.5-turbo-instruct").split(",") if m.strip()],
+        }
+        self.MODEL_ERROR_THRESHOLD = float(os.getenv("MODEL_ERROR_THRESHOLD", "0.5"))  # Error rate that trips a tier
+        self.MODEL_LATENCY_THRESHOLD = float(os.getenv("MODEL_LATENCY_THRESHOLD", "45"))  # Average seconds that trips a tier
+        self.MODEL_COOLDOWN = float(os.getenv("MODEL_COOLDOWN", "60"))  # Seconds before probing a tripped tier
+        self.MAX_GENERATION_ATTEMPTS = 3  # Times a game is requeued in one run before giving up
         
         # Request limits
         self.DAILY_REQUEST_LIMIT = 10000  # Increased for rapid processing
@@ -39,10 +53,74 @@ class Config:
         # Wiki generation settings
         self.MIN_PARAGRAPHS = 1  # Minimum for faster generation
         self.MAX_PARAGRAPHS = 2  # Minimum for faster generation
+        self.PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+        self.RAPID_PROMPT_TOKEN_BUDGET = int(os.getenv("RAPID_PROMPT_TOKEN_BUDGET", "600"))
         
         # Rapid processing settings
         self.RAPID_MODE = os.getenv("RAPID_MODE", "False").lower() == "true"
-        self.PARALLEL_REQUESTS = 25  # Increased parallel requests
-        self.REQUEST_DELAY = 0.05  # Minimal delay
         self.PAGE_SIZE = 50  # Larger page size for fetching games
-        self.BATCH_SIZE = 200  # Larger batch size
+        self.OPENAI_REQUEST_TIMEOUT = float(os.getenv("OPENAI_REQUEST_TIMEOUT", "60"))  # Per-call deadline in seconds
+        self.HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "True").lower() == "true"  # Duplicate calls slower than p95
+        self.PIPELINE_QUEUE_SIZE = 50  # Bounded queue between pipeline stages
+        self.PIPELINE_MONITOR_INTERVAL = 30  # Seconds between pipeline stage statistics
+        self.DAILY_DETAIL_WORKERS = 2  # RAWG detail fetchers for the daily job
+        self.DAILY_GENERATION_WORKERS = 2  # Wiki generators for the daily job
+        self.GENERATION_BATCH_SIZE = int(os.getenv("GENERATION_BATCH_SIZE", "4"))  # Games per model call in rapid mode
+        self.RAPID_CHECKPOINT_PATH = os.getenv("RAPID_CHECKPOINT_PATH", str(self.DATA_DIR / "rapid_checkpoint.json"))
+        self.RAPID_CHECKPOINT_INTERVAL = float(os.getenv("RAPID_CHECKPOINT_INTERVAL", "10"))  # Seconds between checkpoints
+        
+        # Sharded processing settings (coordinator and worker processes)
+        self.WORK_QUEUE_PATH = os.getenv("WORK_QUEUE_PATH", str(self.DATA_DIR / "work_queue.sqlite"))
+        self.SHARDED_EXCEL_FILE_PATH = os.getenv("SHARDED_EXCEL_FILE_PATH", str(self.DATA_DIR / "sharded_wiki.xlsx"))
+        self.WORK_LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", "300"))  # Lease length before a game is reclaimed
+        self.WORK_CLAIM_BATCH = 20  # Games a worker claims at once
+        self.WORK_MAX_ATTEMPTS = 3  # Attempts before a game is marked failed
+        
+        # Priority scheduling of API calls (interactive, refresh and bulk request classes).
+        # Concurrency adapts between one more than the reserved slots and the maximum: it grows
+        # while calls are healthy and is cut on rate limits, timeouts and latency spikes, down to
+        # a single slot for refresh and bulk calls.
+        self.RAWG_INITIAL_CONCURRENCY = int(os.getenv("RAWG_INITIAL_CONCURRENCY", "8"))
+        self.RAWG_MAX_CONCURRENCY = int(os.getenv("RAWG_MAX_CONCURRENCY", "32"))  # RAWG requests in flight per process
+        self.OPENAI_INITIAL_CONCURRENCY = int(os.getenv("OPENAI_INITIAL_CONCURRENCY", "4"))
+        self.OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "24"))  # Model calls in flight per process
+        self.RAWG_REQUEST_TIMEOUT = float(os.getenv("RAWG_REQUEST_TIMEOUT", "30"))  # Seconds per RAWG request
+        self.INTERACTIVE_RESERVED_SLOTS = int(os.getenv("INTERACTIVE_RESERVED_SLOTS", "4"))  # Slots bulk work cannot take
+        
+        # Job queue settings (jobs submitted by the web app run in job_runner.py)
+        self.JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", str(self.DATA_DIR / "jobs.sqlite"))
+        self.JOB_RUNNER_CONCURRENCY = int(os.getenv("JOB_RUNNER_CONCURRENCY", "2"))  # Jobs run at the same time
+        self.JOB_RUNNER_INTERACTIVE_SLOTS = int(os.getenv("JOB_RUNNER_INTERACTIVE_SLOTS", "1"))  # Extra slots for interactive jobs
+        self.JOB_POLL_INTERVAL = 2  # Seconds between checks for queued jobs
+        self.JOB_HEARTBEAT_TIMEOUT = 120  # Seconds without a heartbeat before a running job is requeued
+        self.ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "") or None  # X-Admin-Token for the job endpoints (None disables them)
+        
+        # Failure registry (games that failed are retried with exponential backoff, then dead-lettered)
+        self.FAILURE_REGISTRY_PATH = os.getenv("FAILURE_REGISTRY_PATH", str(self.DATA_DIR / "failures.sqlite"))
+        self.FAILURE_MAX_ATTEMPTS = int(os.getenv("FAILURE_MAX_ATTEMPTS", "5"))  # Failures before a game is dead-lettered
+        self.FAILURE_BACKOFF_SECONDS = float(os.getenv("FAILURE_BACKOFF_SECONDS", "3600"))  # Skip time after the first failure
+        self.FAILURE_MAX_BACKOFF_SECONDS = float(os.getenv("FAILURE_MAX_BACKOFF_SECONDS", str(7 * 24 * 3600)))
+
+        # Metrics (every process sharing METRICS_DIR is aggregated on /metrics; set it empty to keep metrics per process)
+        self.METRICS_DIR = os.getenv("METRICS_DIR", str(self.DATA_DIR / "metrics")) or None
+        self.METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))  # Seconds between metric file writes
+
+        # Tracing (per-game spans; TRACE_EXPORTER is "jsonl", "otlp" or empty for off)
+        self.TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower()
+        self.TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", str(self.DATA_DIR / "traces.jsonl"))  # Each process writes traces_<pid>.jsonl
+        self.TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_MB", "50")) * 1024 * 1024  # Size before rotation
+        self.TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+
+        # Request profiling (off unless PROFILING=True; PROFILER is "cprofile" or "pyinstrument")
+        self.PROFILING_ENABLED = os.getenv("PROFILING", "False").lower() == "true"
+        self.PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "") or None  # Admin token for ?profile=1
+        self.PROFILE_SAMPLE_RATE = int(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Profile 1 in N requests to disk, 0 for off
+        self.PROFILE_DIR = os.getenv("PROFILE_DIR", str(self.DATA_DIR / "profiles"))
+        self.PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))  # Sampled profiles kept
+        self.PROFILER = os.getenv("PROFILER", "cprofile").lower()
+
+        # Generation cache settings (set GENERATION_CACHE=False to force regeneration)
+        self.GENERATION_CACHE_ENABLED = os.getenv("GENERATION_CACHE", "True").lower() == "true"
+        self.GENERATION_CACHE_PATH = str(self.DATA_DIR / "generation_cache.sqlite")
+        self.USAGE_METRICS_PATH = str(self.DATA_DIR / "usage_metrics.sqlite")
+        self.GENERATION_CACHE_MAX_BYTES = int(os.getenv("GENERATION_CACHE_MAX_MB", "200")) * 1024 * 1024
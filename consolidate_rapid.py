@@ -0,0 +1,59 @@
+import os
+import glob
+import shutil
+import argparse
+
+from config import Config
+from logger import setup_logger
+from excel_manager import ExcelManager
+
+# Set up the logger
+logger = setup_logger()
+
+def consolidate(source_paths, library_path, policy="newest", archive_dir=None):
+    """Merge rapid run workbooks into the main library.
+
+    Args:
+        source_paths: Workbooks to merge, oldest first
+        library_path: The main library workbook
+        policy: "newest" (latest row per game wins) or "existing" (library rows are kept)
+        archive_dir: Directory the merged workbooks are moved to afterwards (default: leave them)
+
+    Returns:
+        Merge statistics from ExcelManager.merge_workbooks
+    """
+    stats = ExcelManager(library_path).merge_workbooks(source_paths, policy=policy)
+
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        for path in source_paths:
+            shutil.move(path, os.path.join(archive_dir, os.path.basename(path)))
+            if os.path.exists(f"{path}.lock"):
+                os.remove(f"{path}.lock")
+        logger.info(f"Moved {len(source_paths)} merged workbooks to {archive_dir}")
+
+    return stats
+
+if __name__ == "__main__":
+    config = Config()
+    parser = argparse.ArgumentParser(description="Merge rapid run outputs into the main game library")
+    parser.add_argument("files", nargs="*", help="Workbooks to merge (default: data/rapid_wiki_*.xlsx)")
+    parser.add_argument("--policy", choices=["newest", "existing"], default="newest",
+                        help="Conflict policy: the latest row wins, or rows already in the library are kept")
+    parser.add_argument("--archive", action="store_true", help="Move merged workbooks to data/merged")
+    args = parser.parse_args()
+
+    # Timestamped file names sort oldest first, which decides ties under the newest policy
+    files = args.files or sorted(glob.glob(str(config.DATA_DIR / "rapid_wiki_*.xlsx")))
+    if not files:
+        print("No workbooks to merge")
+    else:
+        stats = consolidate(
+            files,
+            config.EXCEL_FILE_PATH,
+            policy=args.policy,
+            archive_dir=str(config.DATA_DIR / "merged") if args.archive else None
+        )
+        print(f"Merged {len(files)} workbooks: {stats['rows_read']} rows read, {stats['duplicates']} duplicates, "
+              f"{stats['skipped']} without a Game ID")
+        print(f"Library: {stats['games_before']} -> {stats['games_after']} games")
@@ -1,22 +1,98 @@
 import os
+import re
+import json
 import logging
+import sqlite3
+import tempfile
+import threading
+import time
 import pandas as pd
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+
+from metrics import REGISTRY
+from tracing import TRACER
+from library_snapshot import LibrarySnapshot, SnapshotStore
 
 logger = logging.getLogger(__name__)
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    logger.warning("fcntl not available. Excel writes are not locked across processes.")
+
+STORAGE_SECONDS = REGISTRY.histogram(
+    "storage_operation_seconds", "Library workbook reads and writes, including lock waits", ["operation"]
+)
+
 class ExcelManager:
     """Manages Excel file operations for storing game wiki data."""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, snapshot_dir: Optional[str] = None):
         """Initialize the Excel Manager.
         
         Args:
             file_path: Path to the Excel file
+            snapshot_dir: Directory of published library snapshots shared by
+                every process reading the file (default: each manager keeps
+                its own parsed copy)
         """
         self.file_path = file_path
-        self._ensure_file_exists()
+        self.lock_path = f"{file_path}.lock"
+        self.snapshots = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        # Without shared snapshots, the last parsed library
+        self._snapshot: Optional[LibrarySnapshot] = None
+        self._snapshot_lock = threading.Lock()
+        with self._file_lock():
+            self._ensure_file_exists()
+    
+    @contextmanager
+    def _file_lock(self, shared: bool = False, blocking: bool = True):
+        """Hold an inter-process lock on the Excel file.
+        
+        Several worker processes may write to the same file, so every
+        read-modify-write runs under an exclusive lock and reads under a
+        shared one.
+        
+        Args:
+            shared: Whether a shared (read) lock is enough
+            blocking: Whether to wait for the lock
+            
+        Yields:
+            Whether the lock is held (always True when blocking)
+        """
+        with self._locked(self.lock_path, shared, blocking) as locked:
+            yield locked
+    
+    @staticmethod
+    @contextmanager
+    def _locked(lock_path: str, shared: bool, blocking: bool = True):
+        """Hold an flock on a lock file.
+        
+        Args:
+            lock_path: The lock file
+            shared: Whether to take a shared instead of an exclusive lock
+            blocking: Whether to wait for the lock
+            
+        Yields:
+            Whether the lock is held (always True when blocking)
+        """
+        if fcntl is None:
+            yield True
+            return
+        
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
         
     def _ensure_file_exists(self) -> None:
         """Ensure the Excel file exists with the correct structure."""
@@ -45,6 +121,7 @@ class ExcelManager:
         else:
             logger.info(f"Excel file already exists at {self.file_path}")
             
+    @TRACER.traced("storage.add_game_entry")
     def add_game_entry(self, game_data: Dict[str, Any]) -> bool:
         """Add a new game entry to the Excel file.
         
@@ -54,27 +131,33 @@ class ExcelManager:
         Returns:
             True if successful, False otherwise
         """
+        start = time.monotonic()
         try:
-            # Load the existing Excel file
-            df = pd.read_excel(self.file_path)
-            
-            # Check if the game already exists
-            if 'Game ID' in df.columns and game_data['Game ID'] in df['Game ID'].values:
-                logger.warning(f"Game {game_data['Name']} already exists in the Excel file")
-                return False
+            with self._file_lock():
+                TRACER.current().set("lock_wait_seconds", round(time.monotonic() - start, 6))
+                # Load the existing Excel file
+                df = pd.read_excel(self.file_path)
                 
-            # Add the current date
-            now = datetime.now()
-            day = now.day
-            day_suffix = 'th' if 11 <= day <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
-            game_data['Date Added'] = now.strftime(f'%B {day}{day_suffix}, %Y')
-            
-            # Append the new data
-            new_row = pd.DataFrame([game_data])
-            df = pd.concat([df, new_row], ignore_index=True)
-            
-            # Save the updated DataFrame
-            df.to_excel(self.file_path, index=False)
+                # Check if the game already exists
+                if 'Game ID' in df.columns and game_data['Game ID'] in df['Game ID'].values:
+                    logger.warning(f"Game {game_data['Name']} already exists in the Excel file")
+                    return False
+                    
+                # Add the current date
+                now = datetime.now()
+                day = now.day
+                day_suffix = 'th' if 11 <= day <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+                game_data['Date Added'] = now.strftime(f'%B {day}{day_suffix}, %Y')
+                
+                # Append the new data
+                new_row = pd.DataFrame([game_data])
+                df = pd.concat([df, new_row], ignore_index=True)
+                
+                # Save the updated DataFrame
+                df.to_excel(self.file_path, index=False)
+                if self.snapshots is not None:
+                    self._publish(df)
+            STORAGE_SECONDS.observe(time.monotonic() - start, ("write",))
             
             logger.info(f"Added game {game_data['Name']} to Excel file")
             return True
@@ -83,6 +166,148 @@ class ExcelManager:
             logger.error(f"Error adding game entry to Excel: {e}")
             return False
             
+    @TRACER.traced("storage.update_columns")
+    def update_columns(self, updates: Dict[int, Dict[str, Any]]) -> int:
+        """Set column values of games already in the library.
+
+        The file is read again under the write lock, so entries added while
+        the caller was preparing the updates are kept. It is written to a
+        temporary file and renamed over the original, so readers never see a
+        partial workbook.
+
+        Args:
+            updates: Game ID -> column name -> new value
+
+        Returns:
+            Number of games updated
+
+        Raises:
+            Exception: If the file cannot be read or written
+        """
+        if not updates:
+            return 0
+        start = time.monotonic()
+        with self._file_lock():
+            df = pd.read_excel(self.file_path, engine='openpyxl')
+            if 'Game ID' not in df.columns:
+                return 0
+            game_ids = pd.to_numeric(df['Game ID'], errors='coerce')
+            updated = 0
+            for game_id, values in updates.items():
+                rows = df.index[game_ids == game_id]
+                if len(rows) == 0:
+                    continue
+                for column, value in values.items():
+                    if column not in df.columns:
+                        df[column] = None
+                    df.loc[rows, column] = value
+                updated += 1
+
+            if updated:
+                directory = os.path.dirname(os.path.abspath(self.file_path))
+                output_fd, output_path = tempfile.mkstemp(suffix=".xlsx", dir=directory)
+                os.close(output_fd)
+                try:
+                    df.to_excel(output_path, index=False, engine='openpyxl')
+                    os.replace(output_path, self.file_path)
+                finally:
+                    if os.path.exists(output_path):
+                        os.remove(output_path)
+                if self.snapshots is not None:
+                    self._publish(df)
+        STORAGE_SECONDS.observe(time.monotonic() - start, ("update",))
+        logger.info(f"Updated {updated} games in {self.file_path}")
+        return updated
+
+    def _file_version(self) -> Tuple[int, int, int]:
+        """Identify the current contents of the file.
+        
+        Writes rewrite the file in place and merges replace it, so the inode
+        is included with the modification time and size.
+        """
+        stat = os.stat(self.file_path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _publish(self, df: pd.DataFrame) -> Optional[LibrarySnapshot]:
+        """Publish a snapshot of the library just written, while the write lock is held.
+        
+        Args:
+            df: The library as written
+            
+        Returns:
+            The published snapshot, or None if publishing failed; readers
+            then rebuild it from the file
+        """
+        start = time.monotonic()
+        try:
+            with self._locked(self.snapshots.lock_path, shared=False):
+                snapshot = self.snapshots.publish(df, self._file_version())
+            STORAGE_SECONDS.observe(time.monotonic() - start, ("publish",))
+            return snapshot
+        except Exception as e:
+            logger.error(f"Error publishing library snapshot: {e}")
+            return None
+    
+    def read_snapshot(self) -> LibrarySnapshot:
+        """Get the current library as a read-only columnar snapshot.
+        
+        With a snapshot directory, every process maps the snapshot the last
+        writer published, so the file is parsed once per change for all of
+        them. If the file changed without a publish (another tool wrote it),
+        the first reader parses and publishes it. While a write is in
+        progress, readers get the previous version instead of waiting.
+        Without one, the manager parses the file when it changes and keeps
+        its own copy.
+        
+        Returns:
+            The library
+            
+        Raises:
+            Exception: If the file cannot be read
+        """
+        start = time.monotonic()
+        snapshot = self._shared_snapshot() if self.snapshots is not None else self._local_snapshot()
+        STORAGE_SECONDS.observe(time.monotonic() - start, ("read",))
+        return snapshot
+    
+    def _local_snapshot(self) -> LibrarySnapshot:
+        with self._file_lock(shared=True):
+            version = self._file_version()
+            with self._snapshot_lock:
+                if self._snapshot is None or self._snapshot.source != version:
+                    self._snapshot = LibrarySnapshot.from_frame(
+                        pd.read_excel(self.file_path, engine='openpyxl'), source=version
+                    )
+                return self._snapshot
+    
+    def _shared_snapshot(self) -> LibrarySnapshot:
+        snapshot = self.snapshots.current()
+        if snapshot is not None and snapshot.source == self._file_version():
+            return snapshot
+        
+        # Only a writer holds the file exclusively, and it publishes when it is done
+        with self._file_lock(shared=True, blocking=snapshot is None) as locked:
+            if not locked:
+                return snapshot
+            version = self._file_version()
+            with self._locked(self.snapshots.lock_path, shared=False):
+                snapshot = self.snapshots.current()
+                if snapshot is None or snapshot.source != version:
+                    logger.info(f"Publishing a library snapshot of {self.file_path}")
+                    snapshot = self.snapshots.publish(pd.read_excel(self.file_path, engine='openpyxl'), version)
+            return snapshot
+    
+    def read_library(self) -> pd.DataFrame:
+        """Read the whole library into a DataFrame.
+        
+        Returns:
+            The library, one row per game
+            
+        Raises:
+            Exception: If the file cannot be read
+        """
+        return self.read_snapshot().to_frame()
+            
     def get_processed_game_ids(self) -> List[int]:
         """Get a list of game IDs that have already been processed.
         
@@ -90,20 +315,8 @@ class ExcelManager:
             List of game IDs
         """
         try:
-            df = pd.read_excel(self.file_path)
-            
-            if 'Game ID' in df.columns:
-                # Convert to integers and handle any invalid values
-                game_ids = []
-                for game_id in df['Game ID']:
-                    try:
-                        game_ids.append(int(game_id))
-                    except (ValueError, TypeError):
-                        pass
-                        
-                return game_ids
-            
-            return []
+            # Rows without a valid integer Game ID are left out
+            return self.read_snapshot().game_ids().tolist()
             
         except Exception as e:
             logger.error(f"Error reading processed game IDs: {e}")
@@ -116,8 +329,151 @@ class ExcelManager:
             Number of games
         """
         try:
-            df = pd.read_excel(self.file_path)
-            return len(df)
+            return len(self.read_snapshot())
         except Exception as e:
             logger.error(f"Error getting game count: {e}")
             return 0
+
+    @staticmethod
+    def _date_rank(value: Any) -> str:
+        """Turn a Date Added value into a sortable ISO date ('' if unknown)."""
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        if isinstance(value, str):
+            # Dates are written as "April 29th, 2025"
+            try:
+                return datetime.strptime(re.sub(r'(\d+)(st|nd|rd|th)', r'\1', value.strip()), '%B %d, %Y').date().isoformat()
+            except ValueError:
+                return ''
+        return ''
+
+    def merge_workbooks(self, source_paths: List[str], policy: str = "newest",
+                        batch_size: int = 500) -> Dict[str, int]:
+        """Merge other workbooks, such as rapid run outputs, into this file.
+
+        Rows are streamed with openpyxl's read-only mode into an on-disk SQLite
+        staging table keyed by Game ID, and the result is streamed back out
+        with a write-only workbook, so memory use does not grow with the
+        number of files or rows.
+
+        Conflicts are resolved by policy. With "newest" the row with the
+        latest Date Added wins, and ties go to the later source (this file
+        first, then source_paths in order) and the later row. With "existing"
+        rows already in this file are kept and only new games are added.
+
+        Args:
+            source_paths: Workbooks to merge, oldest first
+            policy: "newest" or "existing"
+            batch_size: Rows inserted into the staging table per statement
+
+        Returns:
+            Dictionary with rows read, duplicate rows, rows skipped without a
+            valid Game ID, games before and after the merge
+        """
+        from openpyxl import Workbook, load_workbook
+
+        if policy not in ("newest", "existing"):
+            raise ValueError(f"Unknown merge policy: {policy}")
+        source_paths = [
+            path for path in source_paths if os.path.abspath(path) != os.path.abspath(self.file_path)
+        ]
+
+        stats = {"rows_read": 0, "duplicates": 0, "skipped": 0, "games_before": 0, "games_after": 0}
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        staging_fd, staging_path = tempfile.mkstemp(suffix=".sqlite", dir=directory)
+        os.close(staging_fd)
+        output_path = None
+
+        try:
+            conn = sqlite3.connect(staging_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE rows (game_id INTEGER PRIMARY KEY, seq INTEGER NOT NULL, date_rank TEXT NOT NULL, "
+                "source_rank INTEGER NOT NULL, row_rank INTEGER NOT NULL, data TEXT NOT NULL)"
+            )
+            # A row replaces the stored one only if it ranks higher; seq keeps first-seen order
+            upsert = (
+                "INSERT INTO rows (game_id, seq, date_rank, source_rank, row_rank, data) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (game_id) DO UPDATE SET date_rank = excluded.date_rank, "
+                "source_rank = excluded.source_rank, row_rank = excluded.row_rank, data = excluded.data "
+                "WHERE (excluded.date_rank, excluded.source_rank, excluded.row_rank) "
+                "> (rows.date_rank, rows.source_rank, rows.row_rank)"
+            )
+
+            with self._file_lock():
+                columns: List[str] = []
+                sources = [self.file_path] + list(source_paths)
+                for source_rank, path in enumerate(sources):
+                    # Rows already in this file always win under the "existing" policy
+                    pinned = policy == "existing" and source_rank == 0
+                    # This file is already locked; sources are locked against writers while they are read
+                    with nullcontext() if source_rank == 0 else self._locked(f"{path}.lock", shared=True):
+                        workbook = load_workbook(path, read_only=True)
+                        try:
+                            rows = workbook.active.iter_rows(values_only=True)
+                            header = [str(name) for name in next(rows, ()) if name is not None]
+                            columns.extend(name for name in header if name not in columns)
+                            if 'Game ID' not in header:
+                                logger.warning(f"Skipping {path}: no Game ID column")
+                                continue
+
+                            batch = []
+                            for row_rank, values in enumerate(rows):
+                                record = dict(zip(header, values))
+                                stats["rows_read"] += 1
+                                try:
+                                    game_id = int(record['Game ID'])
+                                except (ValueError, TypeError):
+                                    stats["skipped"] += 1
+                                    continue
+                                date_rank = '9999-12-31' if pinned else self._date_rank(record.get('Date Added'))
+                                batch.append((game_id, stats["rows_read"], date_rank, source_rank, row_rank,
+                                              json.dumps(record, default=str)))
+                                if len(batch) >= batch_size:
+                                    self._insert_batch(conn, upsert, batch)
+                                    batch = []
+                            self._insert_batch(conn, upsert, batch)
+                        finally:
+                            workbook.close()
+
+                    if source_rank == 0:
+                        stats["games_before"] = conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+                stats["games_after"] = conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+                stats["duplicates"] = stats["rows_read"] - stats["skipped"] - stats["games_after"]
+
+                output_fd, output_path = tempfile.mkstemp(suffix=".xlsx", dir=directory)
+                os.close(output_fd)
+                workbook = Workbook(write_only=True)
+                sheet = workbook.create_sheet()
+                sheet.append(columns)
+                for (data,) in conn.execute("SELECT data FROM rows ORDER BY seq"):
+                    record = json.loads(data)
+                    sheet.append([record.get(name) for name in columns])
+                workbook.save(output_path)
+                conn.close()
+
+                # Swap the merged file in with one rename so readers never see a partial workbook
+                os.replace(output_path, self.file_path)
+                output_path = None
+
+        finally:
+            os.remove(staging_path)
+            if output_path is not None and os.path.exists(output_path):
+                os.remove(output_path)
+
+        logger.info(
+            f"Merged {len(source_paths)} workbooks into {self.file_path}: {stats['rows_read']} rows read, "
+            f"{stats['duplicates']} duplicates, {stats['games_before']} -> {stats['games_after']} games"
+        )
+        return stats
+
+    @staticmethod
+    def _insert_batch(conn: sqlite3.Connection, statement: str, batch: List[tuple]) -> None:
+        """Insert a batch of staged rows in one transaction."""
+        if not batch:
+            return
+        conn.execute("BEGIN")
+        conn.executemany(statement, batch)
+        conn.execute("COMMIT")
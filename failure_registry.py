@@ -0,0 +1,271 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class FailureRegistry:
+    """Persistent record of games that failed to process.
+
+    Every failure stores its reason and stage and pushes the next attempt out
+    with exponential backoff, so a game whose details cannot be fetched or
+    whose entry cannot be generated is not retried on every listing walk.
+    After max_attempts the game is dead-lettered: it is skipped until it is
+    replayed by hand. Blocked IDs are kept in memory, so skipping a known-bad
+    game costs a dictionary lookup instead of API calls.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 5, base_backoff: float = 3600.0,
+                 max_backoff: float = 7 * 24 * 3600.0):
+        """Initialize the failure registry.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_attempts: Failures after which a game is dead-lettered
+            base_backoff: Seconds a game is skipped after its first failure
+            max_backoff: Longest time a game is skipped before it is retried
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        # Game ID -> time the game may be retried (infinity for dead letters)
+        self.blocked: Dict[int, float] = {}
+        self.skipped = 0
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._ensure_schema()
+        self.reload()
+
+    def _ensure_schema(self) -> None:
+        """Create the failures table if it does not exist yet."""
+        with self.lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS game_failures (
+                    game_id INTEGER PRIMARY KEY,
+                    game_name TEXT,
+                    stage TEXT NOT NULL,
+                    reason TEXT,
+                    attempts INTEGER NOT NULL,
+                    dead INTEGER NOT NULL DEFAULT 0,
+                    first_failed_at REAL NOT NULL,
+                    last_failed_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_game_failures_dead ON game_failures (dead, last_failed_at)")
+
+    def reload(self) -> None:
+        """Reload the blocked IDs, picking up failures recorded by other processes."""
+        with self.lock:
+            rows = self._conn.execute(
+                "SELECT game_id, dead, next_attempt_at FROM game_failures WHERE dead = 1 OR next_attempt_at > ?",
+                (time.time(),)
+            ).fetchall()
+            self.blocked = {game_id: float('inf') if dead else next_attempt for game_id, dead, next_attempt in rows}
+            self.skipped = 0
+        logger.info(f"Loaded {len(self.blocked)} games on failure backoff or dead-lettered")
+
+    def is_blocked(self, game_id: int) -> bool:
+        """Check whether a game should be skipped for now.
+
+        Args:
+            game_id: The game to check
+
+        Returns:
+            True if the game is dead-lettered or still backing off
+        """
+        until = self.blocked.get(game_id)
+        if until is None or until <= time.time():
+            return False
+        self.skipped += 1
+        return True
+
+    def backoff(self, attempts: int) -> float:
+        """Get the seconds to wait after a number of failures.
+
+        Args:
+            attempts: Failures so far
+
+        Returns:
+            Backoff in seconds, doubling with every failure up to max_backoff
+        """
+        return min(self.base_backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    def record_failure(self, game_id: int, game_name: str, stage: str, reason: str) -> int:
+        """Record a failed attempt at a game.
+
+        Args:
+            game_id: The game that failed
+            game_name: Name of the game, for inspection
+            stage: Where it failed, such as "details" or "generate"
+            reason: Description of the failure
+
+        Returns:
+            Number of failures recorded for the game
+        """
+        now = time.time()
+        try:
+            with self.lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._conn.execute(
+                        "SELECT attempts FROM game_failures WHERE game_id = ?", (game_id,)
+                    ).fetchone()
+                    attempts = (row[0] if row else 0) + 1
+                    dead = attempts >= self.max_attempts
+                    next_attempt = now + self.backoff(attempts)
+                    self._conn.execute(
+                        "INSERT INTO game_failures (game_id, game_name, stage, reason, attempts, dead, "
+                        "first_failed_at, last_failed_at, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (game_id) DO UPDATE SET game_name = excluded.game_name, stage = excluded.stage, "
+                        "reason = excluded.reason, attempts = excluded.attempts, dead = excluded.dead, "
+                        "last_failed_at = excluded.last_failed_at, next_attempt_at = excluded.next_attempt_at",
+                        (game_id, game_name, stage, reason, attempts, int(dead), now, now, next_attempt)
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self.blocked[game_id] = float('inf') if dead else next_attempt
+
+        except sqlite3.Error as e:
+            logger.error(f"Error recording failure for game {game_name}: {e}")
+            return 0
+
+        if dead:
+            logger.warning(f"Dead-lettered {game_name} after {attempts} failures ({stage}: {reason})")
+        else:
+            logger.info(f"{game_name} failed ({stage}: {reason}), retrying after {self.backoff(attempts) / 3600:.1f}h")
+        return attempts
+
+    def record_success(self, game_id: int) -> None:
+        """Clear the failure record of a game that was processed.
+
+        Args:
+            game_id: The processed game
+        """
+        try:
+            with self.lock:
+                self._conn.execute("DELETE FROM game_failures WHERE game_id = ?", (game_id,))
+                self.blocked.pop(game_id, None)
+        except sqlite3.Error as e:
+            logger.error(f"Error clearing failure record for game {game_id}: {e}")
+
+    def list_failures(self, dead_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """List recorded failures.
+
+        Args:
+            dead_only: Only include dead-lettered games
+            limit: Maximum number of games
+
+        Returns:
+            Failures, most recent first
+        """
+        query = "SELECT * FROM game_failures"
+        if dead_only:
+            query += " WHERE dead = 1"
+        query += " ORDER BY last_failed_at DESC LIMIT ?"
+
+        with self.lock:
+            cursor = self._conn.execute(query, (limit,))
+            rows = cursor.fetchall()
+            columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def replay(self, game_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Make dead-lettered games eligible again with a fresh attempt count.
+
+        Args:
+            game_ids: Games to replay (default: every dead-lettered game)
+
+        Returns:
+            The replayed games, with their ID and name
+        """
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if game_ids is None:
+                    rows = self._conn.execute(
+                        "SELECT game_id, game_name FROM game_failures WHERE dead = 1"
+                    ).fetchall()
+                else:
+                    ids = [int(game_id) for game_id in game_ids]
+                    rows = self._conn.execute(
+                        f"SELECT game_id, game_name FROM game_failures WHERE game_id IN ({', '.join('?' * len(ids))})",
+                        ids
+                    ).fetchall()
+                self._conn.executemany("DELETE FROM game_failures WHERE game_id = ?", [(row[0],) for row in rows])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for game_id, _ in rows:
+                self.blocked.pop(game_id, None)
+
+        logger.info(f"Replayed {len(rows)} failed games")
+        return [{'id': game_id, 'name': name} for game_id, name in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Count games backing off and dead-lettered.
+
+        Returns:
+            Dictionary with "backoff" and "dead" counts
+        """
+        with self.lock:
+            rows = dict(self._conn.execute("SELECT dead, COUNT(*) FROM game_failures GROUP BY dead").fetchall())
+        return {"backoff": rows.get(0, 0), "dead": rows.get(1, 0)}
+
+    def log_stats(self) -> None:
+        """Log how many games are on backoff or dead-lettered."""
+        counts = self.counts()
+        logger.info(f"Failure registry: {self.skipped} known-bad games skipped this run, "
+                    f"{counts['backoff']} on backoff, {counts['dead']} dead-lettered")
+
+if __name__ == "__main__":
+    import argparse
+    from config import Config
+    from logger import setup_logger
+
+    setup_logger()
+    parser = argparse.ArgumentParser(description="Inspect and replay games that failed to process")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List failed games")
+    list_parser.add_argument("--dead", action="store_true", help="Only list dead-lettered games")
+    list_parser.add_argument("--limit", type=int, default=50, help="Maximum number of games")
+
+    replay_parser = subparsers.add_parser("replay", help="Make failed games eligible again")
+    replay_parser.add_argument("game_ids", nargs="*", type=int, help="Games to replay (default: all dead-lettered games)")
+    replay_parser.add_argument("--now", action="store_true", help="Process the replayed games right away")
+    args = parser.parse_args()
+
+    config = Config()
+    registry = FailureRegistry(
+        config.FAILURE_REGISTRY_PATH,
+        max_attempts=config.FAILURE_MAX_ATTEMPTS,
+        base_backoff=config.FAILURE_BACKOFF_SECONDS,
+        max_backoff=config.FAILURE_MAX_BACKOFF_SECONDS
+    )
+
+    if args.command == "list":
+        failures = registry.list_failures(dead_only=args.dead, limit=args.limit)
+        for failure in failures:
+            status = "dead" if failure['dead'] else f"retry after {time.ctime(failure['next_attempt_at'])}"
+            print(f"{failure['game_id']}\t{failure['game_name']}\t{failure['attempts']} attempts\t"
+                  f"{failure['stage']}: {failure['reason']}\t{status}")
+        counts = registry.counts()
+        print(f"{counts['backoff']} on backoff, {counts['dead']} dead-lettered")
+    else:
+        games = registry.replay(args.game_ids or None)
+        print(f"Replayed {len(games)} games")
+        if args.now and games:
+            from main import GameWikiGenerator
+            generator = GameWikiGenerator()
+            processed = sum(1 for game in games if generator.process_game(game))
+            print(f"Processed {processed} of {len(games)} games")
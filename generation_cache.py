@@ -0,0 +1,220 @@
+import json
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple, Dict, Any
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = REGISTRY.counter("generation_cache_lookups_total", "Generation cache lookups by result", ["result"])
+
+class GenerationCache:
+    """Persistent, content-addressed cache for generated wiki entries.
+
+    Entries are keyed on a hash of everything that determines the model output
+    (model, rapid mode, prompt, temperature and max tokens), so reprocessing a
+    game with an unchanged prompt returns the stored result instead of paying
+    for another completion.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 200 * 1024 * 1024, enabled: bool = True):
+        """Initialize the generation cache.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_bytes: Maximum total size of cached entries before eviction
+            enabled: Whether lookups and stores are performed at all
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.lock = threading.Lock()
+
+        # Per-run statistics
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._conn = None
+        if self.enabled:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        """Create the cache table if it does not exist yet."""
+        with self.lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS generations (
+                    key TEXT PRIMARY KEY,
+                    wiki_entry TEXT NOT NULL,
+                    references_html TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_generations_last_access ON generations (last_access)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, rapid_mode: bool, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Build the content-addressed key for a generation request.
+
+        Args:
+            model: The model used for generation
+            rapid_mode: Whether rapid mode was enabled
+            prompt: The full prompt sent to the model
+            temperature: Sampling temperature
+            max_tokens: Maximum completion tokens
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps(
+            [model, bool(rapid_mode), prompt, float(temperature), int(max_tokens)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """Look up a cached generation.
+
+        Args:
+            key: Key produced by make_key
+
+        Returns:
+            A tuple of (wiki_entry, references) or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            with self.lock:
+                row = self._conn.execute(
+                    "SELECT wiki_entry, references_html FROM generations WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self.misses += 1
+                    CACHE_LOOKUPS.inc(1, ("miss",))
+                    return None
+
+                self._conn.execute(
+                    "UPDATE generations SET last_access = ? WHERE key = ?",
+                    (time.time(), key)
+                )
+                self._conn.commit()
+                self.hits += 1
+                CACHE_LOOKUPS.inc(1, ("hit",))
+
+            return row[0], row[1]
+
+        except sqlite3.Error as e:
+            logger.error(f"Error reading generation cache: {e}")
+            return None
+
+    def put(self, key: str, wiki_entry: str, references: str) -> None:
+        """Store a generation and evict old entries if the cache is too large.
+
+        Args:
+            key: Key produced by make_key
+            wiki_entry: Generated wiki entry
+            references: Generated references
+        """
+        if not self.enabled:
+            return
+
+        size = len(wiki_entry.encode('utf-8')) + len(references.encode('utf-8'))
+        now = time.time()
+
+        try:
+            with self.lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO generations "
+                    "(key, wiki_entry, references_html, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, wiki_entry, references, size, now, now)
+                )
+                self.stores += 1
+                self._evict()
+                self._conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Error writing generation cache: {e}")
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache fits max_bytes.
+
+        Must be called with the lock held.
+        """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM generations ORDER BY last_access ASC"
+        )
+        to_delete = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM generations WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+        logger.info(f"Evicted {len(to_delete)} entries from generation cache")
+
+    def reset_stats(self) -> None:
+        """Reset the per-run statistics."""
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def hit_rate(self) -> float:
+        """Get the hit rate for lookups made during this run.
+
+        Returns:
+            Fraction of lookups that were hits (0.0 when there were none)
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics for this run.
+
+        Returns:
+            Dictionary with hits, misses, stores, evictions and hit rate
+        """
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate()
+        }
+
+    def log_stats(self) -> None:
+        """Log the cache statistics for this run."""
+        if not self.enabled:
+            logger.info("Generation cache disabled for this run")
+            return
+
+        stats = self.get_stats()
+        logger.info(
+            f"Generation cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate'] * 100:.1f}% hit rate), {stats['evictions']} evictions"
+        )
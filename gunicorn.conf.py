@@ -0,0 +1,8 @@
+# Gunicorn settings, read automatically when gunicorn is started from this directory
+import os
+
+# Import the app once in the master and fork the workers from it: the library snapshot is
+# loaded before the workers start, and they share the master's mapping of it.
+# API clients and database connections are created in each worker on first use.
+# --reload cannot reload a preloaded app, so development runs set PRELOAD_APP=False.
+preload_app = os.getenv("PRELOAD_APP", "True").lower() == "true"
@@ -0,0 +1,351 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from scheduler import PRIORITIES, BULK
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """Persistent job queue shared by every web worker and the job runner.
+
+    Web workers submit jobs and read their status; a separate runner process
+    claims and executes them. Jobs carry an optional dedupe key, and only one
+    queued or running job per key exists at a time, so two daily jobs never
+    run at once no matter which worker received the request. Queued jobs are
+    claimed by priority class (interactive, refresh, bulk), then in order.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    ACTIVE = (QUEUED, RUNNING)
+
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        """Initialize the job queue.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_attempts: Times a job is restarted after its runner died
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        """Create the jobs table if it does not exist yet."""
+        with self.lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    dedupe_key TEXT,
+                    priority TEXT NOT NULL DEFAULT 'bulk',
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER,
+                    message TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    runner TEXT,
+                    heartbeat_at REAL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if 'priority' not in columns:
+                # Databases created before jobs had a priority
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN priority TEXT NOT NULL DEFAULT 'bulk'")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status)")
+
+    def _transaction(self, statements) -> Any:
+        """Run a function inside an immediate (write-locked) transaction.
+
+        Args:
+            statements: Function taking the connection and returning a result
+
+        Returns:
+            The function's result
+        """
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None,
+               dedupe_key: Optional[str] = None, priority: str = BULK) -> Tuple[int, bool]:
+        """Submit a job unless an active job with the same dedupe key exists.
+
+        Args:
+            kind: Kind of job, such as "daily" or "process_game"
+            params: JSON-serializable job parameters
+            dedupe_key: Key identifying jobs that must not run concurrently
+            priority: Request class the job runs under (interactive, refresh or bulk)
+
+        Returns:
+            Tuple of (job ID, whether a new job was created). If an active job
+            with the same key exists, its ID is returned instead.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown job priority: {priority}")
+
+        def insert(conn):
+            if dedupe_key is not None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY id LIMIT 1",
+                    (dedupe_key, *self.ACTIVE)
+                ).fetchone()
+                if row is not None:
+                    return row[0], False
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, params, dedupe_key, priority, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(params or {}), dedupe_key, priority, self.QUEUED, time.time())
+            )
+            return cursor.lastrowid, True
+
+        job_id, created = self._transaction(insert)
+        if created:
+            logger.info(f"Queued {priority} {kind} job {job_id}")
+        return job_id, created
+
+    def claim(self, runner: str, priorities: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Claim the highest-priority, oldest queued job for a runner.
+
+        Args:
+            runner: Identifier of the runner
+            priorities: Only claim jobs of these classes (default: any)
+
+        Returns:
+            The claimed job, or None if no job is queued
+        """
+        allowed = list(priorities or PRIORITIES)
+        rank = " ".join(f"WHEN '{name}' THEN {value}" for name, value in PRIORITIES.items())
+
+        def take(conn):
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE status = ? AND priority IN ({', '.join('?' * len(allowed))}) "
+                f"ORDER BY CASE priority {rank} ELSE {len(PRIORITIES)} END, id LIMIT 1",
+                (self.QUEUED, *allowed)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, runner = ?, attempts = attempts + 1, "
+                "started_at = ?, heartbeat_at = ? WHERE id = ?",
+                (self.RUNNING, runner, now, now, row[0])
+            )
+            return row[0]
+
+        job_id = self._transaction(take)
+        return self.get(job_id) if job_id is not None else None
+
+    def heartbeat(self, job_id: int, runner: str) -> bool:
+        """Record that the runner executing a job is alive.
+
+        Args:
+            job_id: The running job
+            runner: Identifier of the runner that claimed it
+
+        Returns:
+            False if the runner no longer owns the job (it was requeued
+            after missed heartbeats and possibly claimed by another runner)
+        """
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ? AND runner = ?",
+            (time.time(), job_id, self.RUNNING, runner)
+        ).rowcount) > 0
+
+    def update_progress(self, job_id: int, runner: str, progress: int, total: Optional[int] = None,
+                        message: Optional[str] = None) -> bool:
+        """Record the progress of a running job.
+
+        Args:
+            job_id: The running job
+            runner: Identifier of the runner that claimed it
+            progress: Units of work completed
+            total: Total units of work, if known
+            message: Optional status message
+
+        Returns:
+            False if the runner no longer owns the job
+        """
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET progress = ?, total = COALESCE(?, total), message = COALESCE(?, message), "
+            "heartbeat_at = ? WHERE id = ? AND status = ? AND runner = ?",
+            (progress, total, message, time.time(), job_id, self.RUNNING, runner)
+        ).rowcount) > 0
+
+    def finish(self, job_id: int, runner: str, status: str, error: Optional[str] = None) -> bool:
+        """Mark a job as finished.
+
+        Args:
+            job_id: The job
+            runner: Identifier of the runner that claimed it
+            status: SUCCEEDED, FAILED or CANCELLED
+            error: Error message for failed jobs
+
+        Returns:
+            False if the runner no longer owns the job, which is then left as it is
+        """
+        finished = self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ? AND runner = ?",
+            (status, error, time.time(), job_id, self.RUNNING, runner)
+        ).rowcount) > 0
+        if finished:
+            logger.info(f"Job {job_id} {status}")
+        else:
+            logger.warning(f"Job {job_id} was taken over by another runner; not marking it {status}")
+        return finished
+
+    def request_cancel(self, job_id: int) -> bool:
+        """Cancel a job. Queued jobs are cancelled at once, running jobs at their next check.
+
+        Args:
+            job_id: The job to cancel
+
+        Returns:
+            True if the job was active
+        """
+        def cancel(conn):
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row[0] not in self.ACTIVE:
+                return False
+            if row[0] == self.QUEUED:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, cancel_requested = 1, finished_at = ? WHERE id = ?",
+                    (self.CANCELLED, time.time(), job_id)
+                )
+            else:
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            return True
+
+        return self._transaction(cancel)
+
+    def is_cancel_requested(self, job_id: int) -> bool:
+        """Check whether cancellation was requested for a job.
+
+        Args:
+            job_id: The job
+
+        Returns:
+            True if the job should stop
+        """
+        with self.lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def requeue_stale(self, timeout: float) -> int:
+        """Requeue running jobs whose runner stopped sending heartbeats.
+
+        Jobs that already used max_attempts are marked failed, and jobs with a
+        pending cancellation are marked cancelled, instead.
+
+        Args:
+            timeout: Seconds without a heartbeat after which a runner is presumed dead
+
+        Returns:
+            Number of jobs requeued or failed
+        """
+        def requeue(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN cancel_requested THEN ? WHEN attempts >= ? THEN ? ELSE ? END, "
+                "runner = NULL, error = 'runner stopped responding', "
+                "finished_at = CASE WHEN cancel_requested OR attempts >= ? THEN ? ELSE NULL END "
+                "WHERE status = ? AND heartbeat_at < ?",
+                (self.CANCELLED, self.max_attempts, self.FAILED, self.QUEUED,
+                 self.max_attempts, now, self.RUNNING, now - timeout)
+            )
+            return cursor.rowcount
+
+        count = self._transaction(requeue)
+        if count:
+            logger.warning(f"Recovered {count} jobs from runners that stopped responding")
+        return count
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job.
+
+        Args:
+            job_id: The job
+
+        Returns:
+            The job as a dictionary, or None if it does not exist
+        """
+        with self.lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            columns = [column[0] for column in cursor.description]
+        return self._to_dict(columns, row) if row else None
+
+    def list_jobs(self, limit: int = 20, active_only: bool = False,
+                  kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List the most recent jobs.
+
+        Args:
+            limit: Maximum number of jobs
+            active_only: Only include queued and running jobs
+            kind: Only include jobs of this kind
+
+        Returns:
+            Jobs, newest first
+        """
+        query = "SELECT * FROM jobs WHERE 1 = 1"
+        params: List[Any] = []
+        if active_only:
+            query += " AND status IN (?, ?)"
+            params.extend(self.ACTIVE)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        with self.lock:
+            cursor = self._conn.execute(query, params)
+            rows = cursor.fetchall()
+            columns = [column[0] for column in cursor.description]
+        return [self._to_dict(columns, row) for row in rows]
+
+    def count_active(self) -> Dict[str, int]:
+        """Count queued and running jobs.
+
+        Returns:
+            Dictionary of status to number of jobs
+        """
+        with self.lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?) GROUP BY status", self.ACTIVE
+            ).fetchall()
+        counts = {status: 0 for status in self.ACTIVE}
+        counts.update(dict(rows))
+        return counts
+
+    @staticmethod
+    def _to_dict(columns: List[str], row: tuple) -> Dict[str, Any]:
+        """Convert a jobs row to a dictionary with decoded parameters."""
+        job = dict(zip(columns, row))
+        job['params'] = json.loads(job['params'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
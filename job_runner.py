@@ -0,0 +1,220 @@
+import os
+import socket
+import signal
+import threading
+
+from logger import setup_logger
+from job_queue import JobQueue
+from services import SERVICES
+from scheduler import priority, INTERACTIVE
+from metrics import REGISTRY
+from tracing import TRACER
+
+# Set up the logger
+logger = setup_logger()
+
+class JobRunner:
+    """Executes jobs from the shared job queue outside the web workers.
+
+    Every slot takes the highest-priority queued job. Extra slots take only
+    interactive jobs, so a single-game request starts at once even while bulk
+    jobs occupy every other slot. Jobs run under their request class, which
+    the API schedulers use to order their calls.
+    """
+
+    def __init__(self, runner_id=None, concurrency=None, interactive_slots=None):
+        """Initialize the job runner.
+
+        Args:
+            runner_id: Identifier recorded on claimed jobs (default: host name and process ID)
+            concurrency: Number of jobs of any class executed at the same time
+            interactive_slots: Additional slots reserved for interactive jobs
+        """
+        self.config = SERVICES.config
+        REGISTRY.configure(self.config.METRICS_DIR, self.config.METRICS_FLUSH_INTERVAL)
+        TRACER.configure(self.config.TRACE_EXPORTER, path=self.config.TRACE_FILE_PATH,
+                         max_bytes=self.config.TRACE_FILE_MAX_BYTES, endpoint=self.config.TRACE_OTLP_ENDPOINT)
+        self.job_queue = SERVICES.job_queue
+        self.runner_id = runner_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency or self.config.JOB_RUNNER_CONCURRENCY
+        self.interactive_slots = (
+            self.config.JOB_RUNNER_INTERACTIVE_SLOTS if interactive_slots is None else interactive_slots
+        )
+        self.stopping = threading.Event()
+        self.handlers = {
+            "daily": self._run_daily,
+            "process_game": self._run_process_game,
+            "refresh_reviews": self._run_refresh_reviews,
+            "static_pages": self._run_static_pages,
+        }
+
+    def stop(self, *args):
+        """Stop claiming new jobs. Running jobs are recovered by the next runner."""
+        logger.info(f"Job runner {self.runner_id} stopping")
+        self.stopping.set()
+
+    def run_forever(self):
+        """Claim and execute jobs until stopped."""
+        logger.info(f"Job runner {self.runner_id} started with {self.concurrency} slots "
+                    f"and {self.interactive_slots} interactive slots")
+        slots = [
+            threading.Thread(target=self._run_slot, name=f"job-slot-{index}", daemon=True)
+            for index in range(self.concurrency)
+        ] + [
+            threading.Thread(target=self._run_slot, args=([INTERACTIVE],), name=f"job-interactive-slot-{index}",
+                             daemon=True)
+            for index in range(self.interactive_slots)
+        ]
+        for slot in slots:
+            slot.start()
+
+        while not self.stopping.wait(self.config.JOB_POLL_INTERVAL):
+            try:
+                self.job_queue.requeue_stale(self.config.JOB_HEARTBEAT_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Error recovering stale jobs: {e}")
+
+    def _run_slot(self, priorities=None):
+        """Claim and execute one job at a time.
+        
+        Args:
+            priorities: Only claim jobs of these classes (default: any)
+        """
+        while not self.stopping.is_set():
+            try:
+                job = self.job_queue.claim(self.runner_id, priorities)
+            except Exception as e:
+                logger.error(f"Error claiming job: {e}")
+                job = None
+
+            if job is None:
+                self.stopping.wait(self.config.JOB_POLL_INTERVAL)
+                continue
+            self.execute(job)
+
+    def execute(self, job):
+        """Execute a claimed job and record its outcome.
+
+        Args:
+            job: The job as returned by JobQueue.claim
+        """
+        handler = self.handlers.get(job['kind'])
+        if handler is None:
+            self.job_queue.finish(job['id'], self.runner_id, JobQueue.FAILED, f"Unknown job kind: {job['kind']}")
+            return
+
+        logger.info(f"Running {job['priority']} {job['kind']} job {job['id']}")
+        # Set when the job was handed to another runner, so this one stops working on it
+        job['lost'] = threading.Event()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._run_heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+
+        try:
+            with priority(job['priority']):
+                status = handler(job)
+            self.job_queue.finish(job['id'], self.runner_id, status)
+        except Exception as e:
+            logger.error(f"Error in {job['kind']} job {job['id']}: {e}")
+            self.job_queue.finish(job['id'], self.runner_id, JobQueue.FAILED, str(e))
+        finally:
+            done.set()
+
+    def _run_heartbeat(self, job, done):
+        """Send heartbeats for a job until it finishes or this runner stops owning it.
+
+        Args:
+            job: The running job
+            done: Event set when the job finishes
+        """
+        interval = max(self.config.JOB_HEARTBEAT_TIMEOUT / 4, 1)
+        while not done.wait(interval):
+            try:
+                if not self.job_queue.heartbeat(job['id'], self.runner_id):
+                    logger.warning(f"Job {job['id']} was requeued after missed heartbeats; cancelling it here")
+                    job['lost'].set()
+                    return
+            except Exception as e:
+                logger.error(f"Error sending heartbeat for job {job['id']}: {e}")
+
+    def _should_cancel(self, job):
+        """Check whether a running job should stop: cancelled by a user, or taken over by another runner."""
+        return job['lost'].is_set() or self.job_queue.is_cancel_requested(job['id'])
+
+    def _run_daily(self, job):
+        """Run the daily processing job.
+
+        Args:
+            job: The job, with an optional "limit" parameter
+
+        Returns:
+            The final job status
+        """
+        from main import GameWikiGenerator
+        generator = GameWikiGenerator()
+
+        def on_progress(processed, total):
+            if not self.job_queue.update_progress(job['id'], self.runner_id, processed, total,
+                                                  f"Processed {processed} games"):
+                job['lost'].set()
+
+        generator.run_daily_job(
+            limit=job['params'].get('limit'),
+            on_progress=on_progress,
+            should_cancel=lambda: self._should_cancel(job)
+        )
+        return JobQueue.CANCELLED if self._should_cancel(job) else JobQueue.SUCCEEDED
+
+    def _run_process_game(self, job):
+        """Process a single game.
+
+        Args:
+            job: The job, with a "game" parameter holding the game ID and name
+
+        Returns:
+            The final job status
+        """
+        from main import GameWikiGenerator
+        generator = GameWikiGenerator()
+
+        game = job['params']['game']
+        self.job_queue.update_progress(job['id'], self.runner_id, 0, 1, f"Processing {game['name']}")
+        # Fetches the details first, recording games RAWG does not return in the failure registry
+        if not generator.process_game(game):
+            raise RuntimeError(f"Could not process {game['name']} (ID: {game['id']})")
+        self.job_queue.update_progress(job['id'], self.runner_id, 1, 1, f"Processed {game['name']}")
+        return JobQueue.SUCCEEDED
+
+    def _run_refresh_reviews(self, job):
+        """Refresh the review counts of stored games.
+
+        Args:
+            job: The job
+
+        Returns:
+            The final job status
+        """
+        from update_existing_games import update_review_counts
+        update_review_counts()
+        return JobQueue.SUCCEEDED
+
+    def _run_static_pages(self, job):
+        """Render the static page of every game.
+
+        Args:
+            job: The job
+
+        Returns:
+            The final job status
+        """
+        from app import app, generate_static_pages
+        with app.app_context():
+            count = generate_static_pages()
+        self.job_queue.update_progress(job['id'], self.runner_id, count, count, f"Rendered {count} games")
+        return JobQueue.SUCCEEDED
+
+if __name__ == "__main__":
+    runner = JobRunner()
+    signal.signal(signal.SIGTERM, runner.stop)
+    signal.signal(signal.SIGINT, runner.stop)
+    runner.run_forever()
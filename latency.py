@@ -0,0 +1,250 @@
+import bisect
+import logging
+import threading
+import time
+import concurrent.futures
+from typing import Callable, Dict, Any, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+def _default_buckets() -> List[float]:
+    """Build log-spaced latency bucket bounds from 50ms to about 5 minutes."""
+    bounds = []
+    bound = 0.05
+    while bound < 300:
+        bounds.append(round(bound, 4))
+        bound *= 1.25
+    return bounds
+
+class LatencyHistogram:
+    """Thread-safe bucketed latency histogram with quantile estimates."""
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        """Initialize the histogram.
+
+        Args:
+            buckets: Sorted upper bounds of the buckets in seconds
+        """
+        self.buckets = buckets or _default_buckets()
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record one latency sample.
+
+        Args:
+            seconds: Observed latency
+        """
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a latency quantile.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Quantile interpolated within its bucket, or None if no samples
+            have been recorded
+        """
+        with self.lock:
+            if self.count == 0:
+                return None
+            target = q * self.count
+            cumulative = 0
+            for index, bucket_count in enumerate(self.counts):
+                if bucket_count and cumulative + bucket_count >= target:
+                    if index >= len(self.buckets):
+                        return self.buckets[-1]
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = self.buckets[index]
+                    return lower + (upper - lower) * (target - cumulative) / bucket_count
+                cumulative += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a summary of the histogram.
+
+        Returns:
+            Dictionary with count, mean, p50, p95 and p99
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+class LatencyTracker:
+    """Per-model latency histograms used to pick hedge thresholds."""
+
+    def __init__(self, hedge_quantile: float = 0.95, min_samples: int = 20):
+        """Initialize the tracker.
+
+        Args:
+            hedge_quantile: Latency quantile after which a hedged request is sent
+            min_samples: Samples required before the quantile is trusted
+        """
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, key: str) -> LatencyHistogram:
+        """Get the histogram for a model key, creating it on first use.
+
+        Args:
+            key: Model (and request kind) identifier
+
+        Returns:
+            The histogram for the key
+        """
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            return self.histograms[key]
+
+    def observe(self, key: str, seconds: float) -> None:
+        """Record a latency sample for a model key.
+
+        Args:
+            key: Model (and request kind) identifier
+            seconds: Observed latency
+        """
+        self.histogram(key).observe(seconds)
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Get how long to wait before sending a hedged duplicate.
+
+        Args:
+            key: Model (and request kind) identifier
+
+        Returns:
+            The hedge quantile latency, or None while there are too few samples
+        """
+        histogram = self.histogram(key)
+        if histogram.count < self.min_samples:
+            return None
+        return histogram.quantile(self.hedge_quantile)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get a summary of every tracked histogram.
+
+        Returns:
+            Dictionary mapping model key to its histogram summary
+        """
+        with self.lock:
+            keys = list(self.histograms)
+        return {key: self.histograms[key].snapshot() for key in keys}
+
+def call_with_hedging(
+    fn: Callable[[float], T],
+    deadline: float,
+    hedge_delay: Optional[float],
+    executor: concurrent.futures.Executor,
+    on_latency: Optional[Callable[[float], None]] = None
+) -> T:
+    """Run a call with a deadline, sending a hedged duplicate if it runs slow.
+
+    fn receives the seconds left until the deadline and must pass them on as
+    its own request timeout, so attempts still running when the deadline
+    passes are aborted by the client rather than left behind.
+
+    Args:
+        fn: The call to make, taking its timeout in seconds
+        deadline: Seconds allowed for the whole call including any hedge
+        hedge_delay: Seconds to wait before hedging, or None to never hedge
+        executor: Executor the attempts run on
+        on_latency: Optional callback receiving each attempt's latency. Failed
+            attempts report the time they took. Attempts still running when the
+            call returns or gives up report the time they ran so far, a lower
+            bound, so slow upstreams are not left out of the histogram.
+
+    Returns:
+        The result of whichever attempt succeeds first
+
+    Raises:
+        TimeoutError: If no attempt succeeds before the deadline
+        Exception: The last attempt's error if every attempt failed
+    """
+    start = time.monotonic()
+    end = start + deadline
+
+    # Attempt number -> start time, and the attempts whose latency was reported
+    starts: Dict[int, float] = {}
+    reported = set()
+    report_lock = threading.Lock()
+
+    def report(number: int, seconds: float) -> None:
+        if on_latency is None:
+            return
+        with report_lock:
+            if number in reported:
+                return
+            reported.add(number)
+        on_latency(seconds)
+
+    def attempt(number: int):
+        attempt_start = starts[number] = time.monotonic()
+        try:
+            return fn(max(end - attempt_start, 0.001))
+        finally:
+            report(number, time.monotonic() - attempt_start)
+
+    numbers: Dict[concurrent.futures.Future, int] = {}
+
+    def submit() -> concurrent.futures.Future:
+        number = len(numbers)
+        future = executor.submit(attempt, number)
+        numbers[future] = number
+        return future
+
+    futures = [submit()]
+    hedged = hedge_delay is None or hedge_delay >= deadline
+    last_error: Optional[BaseException] = None
+
+    try:
+        while futures:
+            now = time.monotonic()
+            if now >= end:
+                break
+            wait_until = end if hedged else min(end, start + hedge_delay)
+            done, _ = concurrent.futures.wait(
+                futures,
+                timeout=wait_until - now,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                futures.remove(future)
+                error = future.exception()
+                if error is None:
+                    return future.result()
+                last_error = error
+
+            # Hedge once: when the primary is slow, or fails early with time to spare
+            if not hedged and (not done or not futures) and time.monotonic() < end:
+                hedged = True
+                logger.info(f"Sending hedged request after {time.monotonic() - start:.2f}s")
+                futures.append(submit())
+
+        if last_error is not None and not futures:
+            raise last_error
+        raise TimeoutError(f"Call did not complete within {deadline:.1f}s deadline")
+
+    finally:
+        now = time.monotonic()
+        for future in futures:
+            number = numbers[future]
+            # Attempts that already started are left to their client timeout
+            if not future.cancel() and number in starts:
+                report(number, now - starts[number])
@@ -0,0 +1,298 @@
+import os
+import json
+import mmap
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GWLSNP01"
+
+# Column kinds stored as fixed-width arrays, and their dtypes
+_NUMERIC_KINDS = {"int64": np.int64, "float64": np.float64, "bool": np.uint8}
+
+def _align(offset: int) -> int:
+    """Round up to a multiple of 8 so arrays in the file are aligned."""
+    return (offset + 7) & ~7
+
+def build_snapshot(df: pd.DataFrame, version: int = 0, source: Optional[Tuple[int, ...]] = None) -> bytes:
+    """Serialize a library to the snapshot layout.
+
+    The file is the magic bytes, the header length as a little-endian
+    uint64, a JSON header describing the columns, and one 8-byte aligned
+    data section per array. Integer, float and boolean columns are stored
+    as fixed-width arrays. Other columns are stored as an offsets array, a
+    null mask and a UTF-8 blob of the values, which are strings or, for
+    columns holding anything else, JSON. A Game ID index (IDs sorted, with
+    their row numbers) allows lookups without a scan.
+
+    Args:
+        df: The library
+        version: Snapshot version recorded in the header
+        source: Version of the workbook the library was read from
+
+    Returns:
+        The snapshot file contents
+    """
+    data = bytearray()
+
+    def add(array: np.ndarray) -> int:
+        offset = _align(len(data))
+        data.extend(b"\0" * (offset - len(data)))
+        data.extend(np.ascontiguousarray(array).tobytes())
+        return offset
+
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        column: Dict[str, Any] = {"name": str(name)}
+        if pd.api.types.is_bool_dtype(series.dtype):
+            column.update(kind="bool", offset=add(series.to_numpy(dtype=np.uint8)))
+        elif pd.api.types.is_integer_dtype(series.dtype) and series.dtype.kind in "iu":
+            column.update(kind="int64", offset=add(series.to_numpy(dtype=np.int64)))
+        elif pd.api.types.is_float_dtype(series.dtype):
+            column.update(kind="float64", offset=add(series.to_numpy(dtype=np.float64)))
+        else:
+            values = series.tolist()
+            nulls = series.isna().to_numpy(dtype=np.uint8)
+            is_text = all(isinstance(value, str) for value, null in zip(values, nulls) if not null)
+            encoded = [
+                b"" if null else (value if is_text else json.dumps(value, default=str)).encode("utf-8")
+                for value, null in zip(values, nulls)
+            ]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum(np.array([len(value) for value in encoded], dtype=np.int64), out=offsets[1:])
+            column.update(
+                kind="text" if is_text else "json",
+                offsets=add(offsets),
+                nulls=add(nulls),
+                blob=add(np.frombuffer(b"".join(encoded), dtype=np.uint8))
+            )
+        columns.append(column)
+
+    ids, id_rows = _game_id_index(df)
+    index = {"count": len(ids), "ids": add(ids), "rows": add(id_rows)}
+
+    header = json.dumps({
+        "version": version,
+        "rows": len(df),
+        "source": list(source) if source else None,
+        "columns": columns,
+        "index": index
+    }).encode("utf-8")
+    prefix = MAGIC + len(header).to_bytes(8, "little") + header
+    return prefix + b"\0" * (_align(len(prefix)) - len(prefix)) + bytes(data)
+
+def _game_id_index(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the valid Game IDs in ascending order with their row numbers (first occurrence first)."""
+    if 'Game ID' not in df.columns:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ids, rows = [], []
+    for row, game_id in enumerate(df['Game ID'].tolist()):
+        try:
+            if game_id == game_id:  # Skip NaN
+                ids.append(int(game_id))
+                rows.append(row)
+        except (ValueError, TypeError):
+            pass
+    ids = np.array(ids, dtype=np.int64)
+    rows = np.array(rows, dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    return ids[order], rows[order]
+
+class LibrarySnapshot:
+    """Read-only columnar view of the library.
+
+    The buffer is a published snapshot file mapped into memory, which every
+    process mapping the same file shares through the page cache, or bytes
+    built in memory. Numeric columns and the Game ID index are numpy views
+    on the buffer, so nothing is copied until a row is read, and text values
+    are decoded only for the rows read.
+    """
+
+    def __init__(self, buffer, name: Optional[str] = None):
+        """Open a snapshot.
+
+        Args:
+            buffer: The snapshot contents (an mmap or bytes)
+            name: File name of a published snapshot
+
+        Raises:
+            ValueError: If the buffer is not a snapshot
+        """
+        if buffer[:8] != MAGIC:
+            raise ValueError("Not a library snapshot")
+        header_length = int.from_bytes(buffer[8:16], "little")
+        header = json.loads(buffer[16:16 + header_length])
+        self.buffer = buffer
+        self.name = name
+        self.version = header["version"]
+        self.source = tuple(header["source"]) if header["source"] else None
+        self.rows = header["rows"]
+        self.columns = [column["name"] for column in header["columns"]]
+        self._base = _align(16 + header_length)
+        self._kinds: Dict[str, str] = {}
+        self._arrays: Dict[str, Any] = {}
+        for column in header["columns"]:
+            name, kind = column["name"], column["kind"]
+            self._kinds[name] = kind
+            if kind in _NUMERIC_KINDS:
+                self._arrays[name] = self._array(column["offset"], _NUMERIC_KINDS[kind], self.rows)
+            else:
+                offsets = self._array(column["offsets"], np.int64, self.rows + 1)
+                nulls = self._array(column["nulls"], np.uint8, self.rows)
+                self._arrays[name] = (offsets, nulls, self._base + column["blob"])
+        index = header["index"]
+        self._ids = self._array(index["ids"], np.int64, index["count"])
+        self._id_rows = self._array(index["rows"], np.int64, index["count"])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, source: Optional[Tuple[int, ...]] = None) -> 'LibrarySnapshot':
+        """Build an in-memory snapshot of a library."""
+        return cls(build_snapshot(df, source=source))
+
+    def _array(self, offset: int, dtype, count: int) -> np.ndarray:
+        return np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self._base + offset)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def value(self, column: str, row: int) -> Any:
+        """Get one value; missing values are NaN, as in a DataFrame read from the workbook."""
+        kind = self._kinds[column]
+        if kind in _NUMERIC_KINDS:
+            value = self._arrays[column][row].item()
+            return bool(value) if kind == "bool" else value
+        offsets, nulls, blob = self._arrays[column]
+        if nulls[row]:
+            return float("nan")
+        raw = self.buffer[blob + int(offsets[row]):blob + int(offsets[row + 1])]
+        return raw.decode("utf-8") if kind == "text" else json.loads(raw)
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """Get one game as a dictionary of column names to values."""
+        return {column: self.value(column, row) for column in self.columns}
+
+    def records(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        """Get several games, in the given order."""
+        return [self.row(int(row)) for row in rows]
+
+    def values(self, column: str) -> List[Any]:
+        """Get every value of a column."""
+        kind = self._kinds[column]
+        if kind == "bool":
+            return [bool(value) for value in self._arrays[column]]
+        if kind in _NUMERIC_KINDS:
+            return self._arrays[column].tolist()
+        return [self.value(column, row) for row in range(self.rows)]
+
+    def numeric(self, column: str) -> np.ndarray:
+        """Get a column as floats, with NaN for missing or non-numeric values."""
+        if self._kinds[column] in _NUMERIC_KINDS:
+            return self._arrays[column].astype(np.float64)
+        return pd.to_numeric(pd.Series(self.values(column), dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+    def find(self, game_id: int) -> Optional[int]:
+        """Get the row of a game, or None if it is not in the library."""
+        position = int(np.searchsorted(self._ids, game_id))
+        if position < len(self._ids) and self._ids[position] == game_id:
+            return int(self._id_rows[position])
+        return None
+
+    def game_ids(self) -> np.ndarray:
+        """Get the valid Game IDs in ascending order (a read-only view)."""
+        return self._ids
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy the snapshot into a DataFrame."""
+        return pd.DataFrame({column: self.values(column) for column in self.columns}, columns=self.columns)
+
+class SnapshotStore:
+    """Versioned, immutable snapshot files in a directory.
+
+    A writer publishes a new library_<version>.snap and then points the
+    CURRENT file at it, each with an atomic rename, so a reader sees either
+    the old or the new version and never a partial one. Readers map the
+    current file and switch to a newer one as soon as it is published. The
+    previous version is kept for readers opening it during a publish;
+    older ones are deleted, which does not affect processes that still have
+    them mapped. Callers serialize publishes with an exclusive lock on
+    lock_path.
+    """
+
+    def __init__(self, directory: str):
+        """Initialize the store.
+
+        Args:
+            directory: Directory for the snapshot files
+        """
+        self.directory = directory
+        self.pointer_path = os.path.join(directory, "CURRENT")
+        self.lock_path = os.path.join(directory, "publish.lock")
+        self._current: Optional[LibrarySnapshot] = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _read_pointer(self) -> Optional[str]:
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _open(self, name: str) -> LibrarySnapshot:
+        with open(os.path.join(self.directory, name), "rb") as f:
+            return LibrarySnapshot(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), name=name)
+
+    def _swap(self, snapshot: LibrarySnapshot) -> LibrarySnapshot:
+        with self._lock:
+            if self._current is None or snapshot.version > self._current.version:
+                self._current = snapshot
+            return self._current
+
+    def current(self) -> Optional[LibrarySnapshot]:
+        """Get the latest published snapshot, or None if none has been published."""
+        for _ in range(5):
+            name = self._read_pointer()
+            current = self._current
+            if name is None or (current is not None and current.name == name):
+                return current
+            try:
+                return self._swap(self._open(name))
+            except FileNotFoundError:
+                # Replaced by two newer versions since the pointer was read
+                continue
+        return self._current
+
+    def publish(self, df: pd.DataFrame, source: Tuple[int, ...]) -> LibrarySnapshot:
+        """Publish a new version of the library.
+
+        Args:
+            df: The library
+            source: Version of the workbook the library was read from
+
+        Returns:
+            The published snapshot
+        """
+        previous = self._read_pointer()
+        version = int(previous[8:-5]) + 1 if previous else 1
+        name = f"library_{version:08d}.snap"
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(build_snapshot(df, version, source))
+        os.replace(f"{path}.tmp", path)
+        with open(f"{self.pointer_path}.tmp", "w") as f:
+            f.write(name)
+        os.replace(f"{self.pointer_path}.tmp", self.pointer_path)
+
+        for filename in os.listdir(self.directory):
+            if filename.startswith("library_") and filename.endswith(".snap") and filename not in (name, previous):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+        logger.debug(f"Published library snapshot {version} with {len(df)} games")
+        return self._swap(self._open(name))
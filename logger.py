@@ -1,46 +1,199 @@
 import os
+import json
+import time
+import queue
+import atexit
 import logging
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
-def setup_logger():
-    """Set up and configure the application logger.
-    
-    Returns:
-        Configured logger instance
+# Attributes every LogRecord has; anything else was passed with extra= and goes into the JSON output
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed"}
+
+_setup_lock = threading.Lock()
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Fields passed with extra= (e.g. extra={"game_id": 3498}) are included
+    as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """The plain console format, noting messages dropped by the rate limit."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most `burst` INFO and DEBUG messages per call site per interval.
+
+    Per-game messages come from the same few log calls, so limiting by call
+    site keeps one-off messages while capping the per-game ones. Warnings
+    and errors always pass. The first message after a suppressed stretch
+    carries the number of messages dropped in its `suppressed` attribute.
     """
-    # Create logs directory if it doesn't exist
+
+    def __init__(self, burst: int, interval: float):
+        """Initialize the filter.
+
+        Args:
+            burst: Messages allowed per call site in each interval
+            interval: Interval length in seconds
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        # Call site -> [interval start, messages in the interval, messages suppressed]
+        self.windows: Dict[Tuple[str, int], list] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+class _QueueHandler(QueueHandler):
+    """Queue handler that keeps tracebacks apart from the message, so JSON output can put them in their own field."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(vars(record))
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+def _log_handlers(log_format: str):
+    """Create the console and file handlers the listener writes to."""
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    
-    # Create a unique log file name with timestamp
+
+    # Create a log file name with the date
     timestamp = datetime.now().strftime("%Y%m%d")
     log_file = log_dir / f"game_wiki_generator_{timestamp}.log"
-    
-    # Configure logging
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Create console handler
+
+    # Create console handler (JSON when LOG_FORMAT=json, for log collectors reading stdout)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_format)
-    
-    # Create file handler
+    if log_format == "json":
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(TextFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    # Create file handler, always one JSON object per line
     file_handler = RotatingFileHandler(
         log_file,
         maxBytes=10*1024*1024,  # 10 MB
         backupCount=5
     )
     file_handler.setLevel(logging.DEBUG)
-    file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(file_format)
-    
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    
+    file_handler.setFormatter(JsonFormatter())
+    return console_handler, file_handler
+
+def _start_listener(handlers) -> None:
+    global _listener
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def _stop_listener() -> None:
+    """Write out queued records at exit."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+def _after_fork() -> None:
+    """The listener thread does not survive a fork, so a forked child starts its own."""
+    global _setup_lock
+    # Another thread may have held these locks at the fork, so replace rather than acquire them
+    _setup_lock = threading.Lock()
+    if _queue_handler is not None:
+        for log_filter in _queue_handler.filters:
+            if isinstance(log_filter, RateLimitFilter):
+                log_filter.lock = threading.Lock()
+    if _listener is not None:
+        _start_listener(_listener.handlers)
+
+def setup_logger():
+    """Set up and configure the application logger.
+
+    Records are put on a queue and written to the console and the log file
+    by a background thread, so logging never blocks on I/O. Calling this
+    more than once (every entry point does, and they import each other)
+    returns the already configured logger.
+
+    Environment:
+        LOG_LEVEL: Root level (default INFO)
+        LOG_FORMAT: "json" for JSON console output (default text; the file is always JSON)
+        LOG_RATE_LIMIT: INFO messages per call site per LOG_RATE_INTERVAL seconds (default 20 per 10, 0 for no limit)
+
+    Returns:
+        Configured logger instance
+    """
+    global _queue_handler
+    logger = logging.getLogger()
+    with _setup_lock:
+        if _queue_handler is not None:
+            return logger
+
+        logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+        _queue_handler = _QueueHandler(queue.SimpleQueue())
+        rate_limit = int(os.getenv("LOG_RATE_LIMIT", "20"))
+        if rate_limit > 0:
+            _queue_handler.addFilter(RateLimitFilter(rate_limit, float(os.getenv("LOG_RATE_INTERVAL", "10"))))
+        _start_listener(_log_handlers(os.getenv("LOG_FORMAT", "text").lower()))
+        logger.addHandler(_queue_handler)
+
+        atexit.register(_stop_listener)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_after_fork)
+
     logger.info("Logger initialized")
     return logger
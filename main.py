@@ -1,14 +1,15 @@
 import os
 import time
 import logging
+import threading
 import schedule  # type: ignore
 from datetime import datetime
 
-from config import Config
 from logger import setup_logger
-from rawg_api import RawgAPI
-from openai_api import OpenAIAPI
-from excel_manager import ExcelManager
+from services import SERVICES
+from model_router import GenerationError
+from pipeline import Pipeline, Stage
+from tracing import TRACER
 from app import app
 
 # Set up the logger
@@ -19,11 +20,16 @@ class GameWikiGenerator:
         """Initialize the Game Wiki Generator with required APIs and components."""
         logger.info("Initializing Game Wiki Generator")
         
-        # Initialize APIs and managers
-        self.config = Config()
-        self.rawg_api = RawgAPI(self.config.RAWG_API_KEY)
-        self.openai_api = OpenAIAPI(self.config.OPENAI_API_KEY)
-        self.excel_manager = ExcelManager(self.config.EXCEL_FILE_PATH)
+        # Clients and stores are shared process-wide, so a generator per job is cheap
+        self.config = SERVICES.config
+        self.rawg_api = SERVICES.rawg_api
+        self.generation_cache = SERVICES.generation_cache
+        self.model_router = SERVICES.model_router
+        self.openai_api = SERVICES.openai_api
+        self.excel_manager = SERVICES.excel_manager
+        self.usage_tracker = SERVICES.usage_tracker
+        self.run_id = self.usage_tracker.new_run_id("manual")
+        self.failure_registry = SERVICES.failure_registry
         
         # Track processed games to avoid duplicates
         self.processed_games = set()
@@ -54,89 +60,156 @@ class GameWikiGenerator:
     def process_game(self, game):
         """Process a single game by fetching details, generating wiki entry, and saving to Excel."""
         try:
-            game_id = game['id']
-            
-            # Skip if already processed
-            if game_id in self.processed_games:
-                logger.info(f"Skipping already processed game: {game['name']}")
+            item = self.fetch_game(game)
+            if item is None:
                 return False
             
-            # Get detailed game info
-            logger.info(f"Fetching details for game: {game['name']}")
-            game_details = self.rawg_api.get_game_details(game_id)
-            
-            if not game_details:
-                logger.warning(f"Could not fetch details for game: {game['name']}")
+            item = self.generate_entry(item)
+            if item is None:
                 return False
             
-            # Prepare game data for wiki generation
-            wiki_input = self.prepare_wiki_input(game_details)
-            
-            # Generate wiki entry
-            logger.info(f"Generating wiki entry for: {game['name']}")
-            logger.info(f"Generating wiki entry for {game['name']}")
-            wiki_entry, references = self.openai_api.generate_wiki_entry(wiki_input)
-            
-            # Handle potential None values from the API response
-            if wiki_entry is None:
-                wiki_entry = f"No wiki entry could be generated for {game['name']}."
-                logger.warning(f"Generated empty wiki entry for {game['name']}")
-            
-            if references is None:
-                references = "No references available."
-                logger.warning(f"Generated empty references for {game['name']}")
-            
-            # Ensure game_details keys exist before accessing
-            developers = game_details.get('developers', [])
-            dev_names = [dev.get('name', '') for dev in developers if dev and isinstance(dev, dict)]
-            
-            # Log the available fields for debugging
-            logger.info(f"Available game_details fields: {list(game_details.keys())}")
-            
-            # Always prioritize using Metacritic score instead of ratings_count
-            # This is the score we want to display, not the number of ratings
-            metacritic_score = game_details.get('metacritic', 0)
-            ratings_count = game_details.get('ratings_count', 0)
+            return self.store_entry(item)
+        
+        except Exception as e:
+            logger.error(f"Error processing game {game.get('name', 'unknown')}: {e}")
+            return False
+
+    def fetch_game(self, game):
+        """Fetch details for a game and prepare its wiki input.
+        
+        Args:
+            game: Game data from a RAWG listing
             
-            # Log the retrieved data for debugging
-            logger.info(f"Game {game['name']} has ratings_count: {ratings_count}")
+        Returns:
+            Dictionary with the game, its details and wiki input, or None if
+            the game was skipped or could not be fetched
+        """
+        game_id = game['id']
+        
+        # Skip if already processed
+        if game_id in self.processed_games:
+            logger.info(f"Skipping already processed game: {game['name']}")
+            return None
+        
+        # The game span covers every stage and ends once the game is stored or given up
+        trace = TRACER.span("game", game_id=game_id, game=game['name'])
+        
+        # Get detailed game info
+        logger.info(f"Fetching details for game: {game['name']}")
+        fetch_start = time.monotonic()
+        with TRACER.span("fetch", parent=trace):
+            game_details = self.rawg_api.get_game_details(game_id)
+        rawg_seconds = time.monotonic() - fetch_start
+        
+        if not game_details:
+            logger.warning(f"Could not fetch details for game: {game['name']}")
+            self.failure_registry.record_failure(game_id, game['name'], "details", "Could not fetch game details")
+            trace.end("error")
+            return None
+        
+        return {
+            'game': game,
+            'game_details': game_details,
+            # Prepare game data for wiki generation
+            'wiki_input': self.prepare_wiki_input(game_details),
+            'rawg_seconds': rawg_seconds,
+            'trace': trace
+        }
+
+    def generate_entry(self, item):
+        """Generate the wiki entry for a fetched game.
+        
+        Args:
+            item: Fetched game as returned by fetch_game
             
-            # Prepare data for Excel
-            excel_data = {
-                'Game ID': game_id,
-                'Name': game_details.get('name', ''),
-                'Studio': ', '.join(dev_names),
-                'Release Date': game_details.get('released', ''),
-                'Metacritic': metacritic_score,  # Store as Metacritic rather than Review Count
-                'Review Count': ratings_count,  # Store ratings count as Review Count to match existing data
-                'Image URL': game_details.get('background_image', ''),
-                'Wiki Entry': wiki_entry,
-                'References': references,
-                'Additional Info': self.get_additional_info(game_details),
-                'Steam URL': game_details.get('steam_url', ''),
-                'Store Links': self.format_store_links(game_details.get('store_links', {}))
-            }
+        Returns:
+            The item with wiki_entry, references and usage added, or None if
+            generation failed
+        """
+        game = item['game']
+        
+        # Generate wiki entry
+        logger.info(f"Generating wiki entry for: {game['name']}")
+        usage = {}
+        try:
+            with TRACER.span("generate", parent=item['trace']):
+                wiki_entry, references = self.openai_api.generate_wiki_entry(item['wiki_input'], usage=usage)
+        except GenerationError as e:
+            # Leave the game unprocessed so a later run picks it up again after its backoff
+            logger.warning(f"Requeuing {game['name']}, generation failed: {e}")
+            self.failure_registry.record_failure(game['id'], game['name'], "generate", str(e))
+            item['trace'].end("error")
+            return None
+        
+        item['wiki_entry'] = wiki_entry
+        item['references'] = references
+        item['usage'] = usage
+        return item
+
+    def store_entry(self, item):
+        """Save a generated wiki entry to Excel and mark the game as processed.
+        
+        Args:
+            item: Generated game as returned by generate_entry
             
-            # Save to Excel
-            logger.info(f"Saving data for: {game['name']}")
+        Returns:
+            True if successful
+        """
+        game = item['game']
+        game_id = game['id']
+        game_details = item['game_details']
+        
+        # Ensure game_details keys exist before accessing
+        developers = game_details.get('developers', [])
+        dev_names = [dev.get('name', '') for dev in developers if dev and isinstance(dev, dict)]
+        
+        # Log the available fields for debugging
+        logger.debug(f"Available game_details fields: {list(game_details.keys())}")
+        
+        # Always prioritize using Metacritic score instead of ratings_count
+        # This is the score we want to display, not the number of ratings
+        metacritic_score = game_details.get('metacritic', 0)
+        ratings_count = game_details.get('ratings_count', 0)
+        
+        # Log the retrieved data for debugging
+        logger.debug(f"Game {game['name']} has ratings_count: {ratings_count}")
+        
+        # Prepare data for Excel
+        excel_data = {
+            'Game ID': game_id,
+            'Name': game_details.get('name', ''),
+            'Studio': ', '.join(dev_names),
+            'Release Date': game_details.get('released', ''),
+            'Metacritic': metacritic_score,  # Store as Metacritic rather than Review Count
+            'Review Count': ratings_count,  # Store ratings count as Review Count to match existing data
+            'Image URL': game_details.get('background_image', ''),
+            'Wiki Entry': item['wiki_entry'],
+            'References': item['references'],
+            'Additional Info': self.get_additional_info(game_details),
+            'Steam URL': game_details.get('steam_url', ''),
+            'Store Links': self.format_store_links(game_details.get('store_links', {}))
+        }
+        
+        # Save to Excel
+        logger.info(f"Saving data for: {game['name']}")
+        with TRACER.span("store", parent=item['trace']):
             self.excel_manager.add_game_entry(excel_data)
-            
-            # Mark as processed
-            self.processed_games.add(game_id)
-            
-            # Increment request counter
-            self.daily_request_count += 1
-            
-            logger.info(f"Successfully processed game: {game['name']}")
-            
-            # No delay in the web request context to avoid worker timeout
-            # Delays should be handled at the scheduling level
-            
-            return True
+            self.usage_tracker.record(self.run_id, game_id, game['name'], item['usage'], item['rawg_seconds'])
         
-        except Exception as e:
-            logger.error(f"Error processing game {game.get('name', 'unknown')}: {e}")
-            return False
+        # Mark as processed
+        self.processed_games.add(game_id)
+        self.failure_registry.record_success(game_id)
+        
+        # Increment request counter
+        self.daily_request_count += 1
+        
+        logger.info(f"Successfully processed game: {game['name']}")
+        item['trace'].end()
+        
+        # No delay in the web request context to avoid worker timeout
+        # Delays should be handled at the scheduling level
+        
+        return True
 
     def prepare_wiki_input(self, game_details):
         """Prepare game data as input for wiki generation."""
@@ -196,13 +269,21 @@ class GameWikiGenerator:
                 
         return "\n".join(formatted_links)
 
-    def run_daily_job(self, limit=None):
+    def run_daily_job(self, limit=None, on_progress=None, should_cancel=None):
         """Main job to run daily processing of games.
         
         Args:
             limit: Optional maximum number of games to process in this run
+            on_progress: Optional callback receiving (processed, limit) after each saved game
+            should_cancel: Optional callable returning True when the job should stop
+            
+        Returns:
+            Number of games processed
         """
         logger.info(f"Starting daily job for processing games{' (limited mode)' if limit else ''}")
+        self.generation_cache.reset_stats()
+        self.failure_registry.reload()
+        self.run_id = self.usage_tracker.new_run_id("daily")
         
         # Reset counter if it's a new day
         current_date = datetime.now().date()
@@ -215,49 +296,119 @@ class GameWikiGenerator:
         # Check if we've hit the daily limit
         if self.daily_request_count >= effective_limit:
             logger.info(f"Request limit reached ({effective_limit}). Stopping.")
-            return
+            return 0
         
-        page = 1
         processed_count = 0
-        while self.daily_request_count < self.request_limit and processed_count < effective_limit:
-            try:
+        # Games admitted to the pipeline and not yet stored or given up, by Game ID.
+        # Admission stops while they could fill the rest of the limit, so nothing
+        # fetched or generated is thrown away when the limit is reached.
+        in_flight = {}
+        admission = threading.Condition()
+        
+        def remaining():
+            return min(effective_limit - processed_count, self.request_limit - self.daily_request_count)
+        
+        def list_games():
+            """Walk the indie game listing, yielding games not processed yet."""
+            page = 1
+            while True:
                 # Get indie games with a minimum ratings count of 1 and metacritic score of 60
                 # This helps ensure we're processing games with reviews
                 games = self.rawg_api.get_indie_games(page, metacritic_min=60, min_reviews=1)
                 
                 if not games:
                     logger.info("No more games to process or API limit reached")
-                    break
+                    return
                 
-                # Process each game
-                success_count = 0
                 for game in games:
-                    if self.daily_request_count >= self.request_limit or processed_count >= effective_limit:
+                    # Games that failed recently or were dead-lettered cost no API calls
+                    if game['id'] not in self.processed_games and not self.failure_registry.is_blocked(game['id']):
+                        yield game
+                page += 1
+        
+        def admit(games):
+            """Pass games on while the games in flight cannot fill the limit."""
+            for game in games:
+                with admission:
+                    # Games in flight may still fail, so wait for them before admitting more
+                    while 0 < remaining() <= len(in_flight) and not pipeline.stopping.is_set():
+                        admission.wait(1.0)
+                    if pipeline.stopping.is_set():
+                        return
+                    if remaining() <= 0:
                         logger.info(f"Request limit reached ({effective_limit}). Stopping.")
                         return
-                    
-                    success = self.process_game(game)
-                    if success:
-                        success_count += 1
-                        processed_count += 1
-                        # Add a delay between processing games to avoid API rate limits
-                        # This is safe in the background thread
-                        time.sleep(2)
-                
-                if success_count == 0:
-                    # If we processed a page with no new games, move to the next page
-                    page += 1
-                
-                # Break if no games were returned
-                if not games:
-                    break
-                    
-            except Exception as e:
-                logger.error(f"Error in run_daily_job: {e}")
-                # Reduce sleep time to avoid worker timeout
-                time.sleep(5)  # Wait before retrying
+                    in_flight[game['id']] = None
+                yield game
+        
+        def finish(game_id):
+            with admission:
+                in_flight.pop(game_id, None)
+                admission.notify_all()
+        
+        def tracked(func):
+            """Wrap a stage so games it gives up on leave the in-flight set."""
+            def run(item):
+                game_id = item['id'] if 'id' in item else item['game']['id']
+                try:
+                    result = func(item)
+                except Exception:
+                    finish(game_id)
+                    raise
+                if result is None:
+                    finish(game_id)
+                else:
+                    with admission:
+                        in_flight[game_id] = result
+                return result
+            return run
+        
+        def store(item):
+            """Save a generated entry."""
+            nonlocal processed_count
+            try:
+                if not self.store_entry(item):
+                    return None
+                processed_count += 1
+            finally:
+                finish(item['game']['id'])
+            
+            if on_progress is not None:
+                on_progress(processed_count, effective_limit)
+            return True
+        
+        # Fetch, generate and store overlap; a single store worker serializes workbook writes
+        pipeline = Pipeline(
+            "daily",
+            admit(list_games()),
+            [
+                Stage("details", tracked(self.fetch_game), workers=self.config.DAILY_DETAIL_WORKERS,
+                      max_queue=self.config.PIPELINE_QUEUE_SIZE),
+                Stage("generate", tracked(self.generate_entry), workers=self.config.DAILY_GENERATION_WORKERS,
+                      max_queue=self.config.PIPELINE_QUEUE_SIZE),
+                Stage("store", store, workers=1, max_queue=self.config.PIPELINE_QUEUE_SIZE)
+            ],
+            monitor_interval=self.config.PIPELINE_MONITOR_INTERVAL
+        )
+        pipeline.start()
+        while not pipeline.join(1.0):
+            if should_cancel is not None and should_cancel():
+                logger.info("Daily job cancelled")
+                pipeline.stop()
+        pipeline.log_stats()
+        
+        # A cancelled run abandons the games still in the pipeline
+        for item in in_flight.values():
+            if item is not None:
+                item['trace'].end("cancelled")
         
         logger.info(f"Daily job completed. Processed {processed_count} games.")
+        logger.info(f"Concurrency limits: RAWG {self.rawg_api.scheduler.limit()}, "
+                    f"OpenAI {self.openai_api.scheduler.limit()}")
+        self.generation_cache.log_stats()
+        self.failure_registry.log_stats()
+        self.usage_tracker.log_summary(self.run_id)
+        return processed_count
 
 def start_scheduler():
     """Start the scheduler for periodic processing."""
@@ -287,11 +438,9 @@ def start_scheduler():
         logger.critical(f"Critical error in scheduler: {e}")
         raise
 
-# Create the data directory and ensure the Excel file exists
-config = Config()
-os.makedirs(config.DATA_DIR, exist_ok=True)
-excel_manager = ExcelManager(config.EXCEL_FILE_PATH)
-excel_manager._ensure_file_exists()
+# Ensure the Excel file exists and map its snapshot; with gunicorn's preload_app this runs
+# in the master, so workers start with the snapshot mapped
+SERVICES.warm()
 
 if __name__ == "__main__":
     # Run the app directly if script is executed
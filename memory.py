@@ -0,0 +1,112 @@
+import sys
+import base64
+import logging
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+    logger.warning("resource module not available. Peak memory use is not reported.")
+
+class GameIdSet:
+    """Compact set of game IDs backed by a bitmap.
+
+    RAWG game IDs are dense non-negative integers, so one bit per possible ID
+    is far smaller than a Python set of ints (about 60 bytes per entry) and,
+    unlike a Bloom filter, has no false positives. Memory use is bounded by
+    the largest ID seen (1 MB covers IDs up to about 8 million), not by how
+    many games a run processes.
+    """
+
+    __slots__ = ("bits", "count")
+
+    def __init__(self, game_ids: Iterable[int] = ()):
+        """Initialize the set.
+
+        Args:
+            game_ids: Initial game IDs
+        """
+        self.bits = bytearray()
+        self.count = 0
+        self.update(game_ids)
+
+    def add(self, game_id: int) -> None:
+        """Add a game ID.
+
+        Args:
+            game_id: Non-negative game ID
+        """
+        game_id = int(game_id)
+        if game_id < 0:
+            raise ValueError(f"Game IDs must not be negative: {game_id}")
+        index, mask = game_id >> 3, 1 << (game_id & 7)
+        if index >= len(self.bits):
+            # Grow geometrically so adding increasing IDs stays cheap
+            self.bits.extend(bytes(max(index + 1 - len(self.bits), len(self.bits))))
+        if not self.bits[index] & mask:
+            self.bits[index] |= mask
+            self.count += 1
+
+    def update(self, game_ids: Iterable[int]) -> None:
+        """Add several game IDs.
+
+        Args:
+            game_ids: Non-negative game IDs
+        """
+        for game_id in game_ids:
+            self.add(game_id)
+
+    def __contains__(self, game_id) -> bool:
+        try:
+            index = int(game_id) >> 3
+        except (ValueError, TypeError):
+            return False
+        return 0 <= index < len(self.bits) and bool(self.bits[index] & (1 << (int(game_id) & 7)))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[int]:
+        for index, byte in enumerate(self.bits):
+            if byte:
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield (index << 3) | bit
+
+    def to_base64(self) -> str:
+        """Encode the bitmap for a checkpoint.
+
+        Returns:
+            The bitmap as a base64 string
+        """
+        return base64.b64encode(bytes(self.bits).rstrip(b'\0')).decode('ascii')
+
+    @classmethod
+    def from_base64(cls, data: str) -> 'GameIdSet':
+        """Decode a bitmap written by to_base64.
+
+        Args:
+            data: The base64 string
+
+        Returns:
+            The set
+        """
+        game_ids = cls()
+        game_ids.bits = bytearray(base64.b64decode(data))
+        game_ids.count = sum(bin(byte).count('1') for byte in game_ids.bits)
+        return game_ids
+
+def peak_rss_bytes() -> Optional[int]:
+    """Get the peak resident set size of this process.
+
+    Returns:
+        Peak RSS in bytes, or None where it cannot be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
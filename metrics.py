@@ -0,0 +1,359 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from fast storage reads to slow model calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+class _Metric:
+    """Base class for a metric family with a fixed set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], Any] = {}
+        self.lock = threading.Lock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the metric and its values in a JSON-serializable form."""
+        with self.lock:
+            values = [[list(labels), value] for labels, value in self.values.items()]
+        return {"kind": self.kind, "help": self.help, "labelnames": list(self.labelnames), "values": values}
+
+class Counter(_Metric):
+    """Monotonically increasing count, summed across processes."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, labels: Tuple[str, ...] = ()) -> None:
+        """Increase the counter.
+
+        Args:
+            amount: Amount to add
+            labels: Label values, in the order of labelnames
+        """
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+class Gauge(_Metric):
+    """Value that goes up and down.
+
+    Gauges either hold values set by the process or call a function at
+    collection time. Across processes they are summed, or with
+    aggregate="max" the largest value is kept, which suits values every
+    process reads from shared state such as the job queue.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), aggregate: str = "sum"):
+        super().__init__(name, help_text, labelnames)
+        self.aggregate = aggregate
+        self.function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        """Set the gauge.
+
+        Args:
+            value: New value
+            labels: Label values, in the order of labelnames
+        """
+        with self.lock:
+            self.values[labels] = value
+
+    def inc(self, amount: float = 1.0, labels: Tuple[str, ...] = ()) -> None:
+        """Increase the gauge (decrease with a negative amount)."""
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Tuple[str, ...] = ()) -> None:
+        """Decrease the gauge."""
+        self.inc(-amount, labels)
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+        """Compute the gauge's values when metrics are collected.
+
+        Args:
+            function: Returns a dictionary of label values to values
+        """
+        self.function = function
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self.function is not None:
+            try:
+                values = self.function()
+                with self.lock:
+                    self.values = dict(values)
+            except Exception as e:
+                logger.error(f"Error collecting gauge {self.name}: {e}")
+        snapshot = super().snapshot()
+        snapshot["aggregate"] = self.aggregate
+        return snapshot
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values, summed across processes."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        """Record one observation.
+
+        Args:
+            value: Observed value, usually seconds
+            labels: Label values, in the order of labelnames
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), then the sum
+                state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        # Copy the mutable bucket lists so later observations do not leak in
+        snapshot["values"] = [[labels, list(state)] for labels, state in snapshot["values"]]
+        return snapshot
+
+class MetricsRegistry:
+    """Process-wide metrics with aggregation across processes.
+
+    Recording a value only touches memory. When a directory is configured,
+    each process periodically writes its values to metrics_<pid>.json there,
+    and collect() merges every process's file, so any gunicorn worker serves
+    the totals of all workers, the job runner and command-line runs sharing
+    the data directory. Files of processes that have exited are removed when
+    a process starts; until then their counters and histograms still count,
+    but their gauges do not.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = threading.Lock()
+        self.directory: Optional[str] = None
+        self.flush_interval = 5.0
+        self.pid = os.getpid()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (), aggregate: str = "sum") -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge(name, help_text, labelnames, aggregate))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def configure(self, directory: Optional[str], flush_interval: float = 5.0) -> None:
+        """Share metrics with other processes through a directory.
+
+        Args:
+            directory: Directory for per-process metric files, or None to
+                keep metrics local to this process
+            flush_interval: Seconds between writes of this process's file
+        """
+        if self.directory == directory:
+            return
+        self.directory = directory
+        self.flush_interval = flush_interval
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self._remove_dead_files()
+        self._start_flusher()
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics_{pid}.json")
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _process_files(self) -> List[Tuple[int, str]]:
+        """List (pid, path) for every process file in the directory."""
+        files = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith("metrics_") and filename.endswith(".json"):
+                try:
+                    files.append((int(filename[8:-5]), os.path.join(self.directory, filename)))
+                except ValueError:
+                    continue
+        return files
+
+    def _remove_dead_files(self) -> None:
+        for pid, path in self._process_files():
+            if pid != self.pid and not self._is_alive(pid):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._run_flusher, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _after_fork(self) -> None:
+        """Start afresh in a forked child: its values and flusher are not the parent's."""
+        self.pid = os.getpid()
+        self._flusher = None
+        # Another thread may have held a lock at the fork, so replace rather than acquire them
+        self.lock = threading.Lock()
+        for metric in self.metrics.values():
+            metric.lock = threading.Lock()
+            metric.values = {}
+        if self.directory:
+            self._start_flusher()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get this process's metrics."""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def flush(self, snapshot: Optional[Dict[str, Any]] = None) -> None:
+        """Write this process's metrics to its file in the shared directory.
+
+        Args:
+            snapshot: Snapshot to write (default: take one now)
+        """
+        if not self.directory:
+            return
+        path = self._path(self.pid)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"pid": self.pid, "time": time.time(), "metrics": snapshot or self.snapshot()}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error writing metrics file {path}: {e}")
+
+    def collect(self) -> Dict[str, Any]:
+        """Merge the metrics of this process and every other process sharing the directory.
+
+        Returns:
+            Metrics keyed by name, in the snapshot format
+        """
+        local = self.snapshot()
+        if not self.directory:
+            return local
+        self.flush(local)
+
+        merged: Dict[str, Any] = {}
+        for pid, path in self._process_files():
+            if pid == self.pid:
+                metrics = local
+            else:
+                try:
+                    with open(path) as f:
+                        metrics = json.load(f)["metrics"]
+                except (OSError, ValueError, KeyError):
+                    continue
+            alive = pid == self.pid or self._is_alive(pid)
+            for name, metric in metrics.items():
+                if metric["kind"] == "gauge" and not alive:
+                    continue
+                target = merged.setdefault(name, {**metric, "values": {}})
+                for labels, value in metric["values"]:
+                    key = tuple(labels)
+                    current = target["values"].get(key)
+                    if current is None:
+                        target["values"][key] = value
+                    elif metric["kind"] == "histogram":
+                        target["values"][key] = [a + b for a, b in zip(current, value)]
+                    elif metric.get("aggregate") == "max":
+                        target["values"][key] = max(current, value)
+                    else:
+                        target["values"][key] = current + value
+        for metric in merged.values():
+            metric["values"] = [[list(labels), value] for labels, value in metric["values"].items()]
+        return merged
+
+    def render(self) -> str:
+        """Render the merged metrics in the Prometheus text exposition format.
+
+        Returns:
+            The metrics page
+        """
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            labelnames = metric["labelnames"]
+            for labels, value in sorted(metric["values"]):
+                pairs = [f'{label}="{_escape(str(v))}"' for label, v in zip(labelnames, labels)]
+                if metric["kind"] == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(metric["buckets"] + [float("inf")], value[:-1]):
+                        cumulative += count
+                        le = 'le="' + _format(bound) + '"'
+                        lines.append(f"{name}_bucket{_labels(pairs + [le])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(pairs)} {_format(value[-1])}")
+                    lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_labels(pairs)} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format(value: float) -> str:
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+# The registry every module records into
+REGISTRY = MetricsRegistry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=REGISTRY._after_fork)
+
+atexit.register(REGISTRY.flush)
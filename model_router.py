@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Set, Any
+
+logger = logging.getLogger(__name__)
+
+class GenerationError(Exception):
+    """Raised when no model tier could produce a wiki entry."""
+
+class CircuitBreaker:
+    """Tracks recent outcomes for one model and trips when it degrades.
+
+    The breaker is closed while the model is healthy. It opens when the error
+    rate or the average latency over the recent window crosses its threshold,
+    and after a cooldown it lets a single probe call through (half-open). A
+    successful probe closes it again; a failed probe reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 20, min_calls: int = 5, error_threshold: float = 0.5,
+                 latency_threshold: Optional[float] = None, cooldown: float = 60.0):
+        """Initialize the circuit breaker.
+
+        Args:
+            window: Number of recent calls considered
+            min_calls: Calls required in the window before the breaker can trip
+            error_threshold: Error rate at which the breaker opens
+            latency_threshold: Average latency in seconds at which the breaker opens
+            cooldown: Seconds to wait before probing an open breaker
+        """
+        self.window = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check whether a call may be sent to this model.
+
+        Returns:
+            True if the call is allowed
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def available(self) -> bool:
+        """Check, without claiming the probe, whether allow() could let a call through.
+
+        Returns:
+            True if the breaker is closed, its cooldown is over or its probe is free
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return not self.probe_in_flight
+
+    def release(self) -> None:
+        """Give back a probe claimed by allow() when no call was made."""
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+
+    def record(self, success: bool, latency: float) -> None:
+        """Record the outcome of a call.
+
+        Args:
+            success: Whether the call produced a usable entry
+            latency: Seconds the call took
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+                if success:
+                    self.state = self.CLOSED
+                    self.window.clear()
+                else:
+                    self._open()
+                return
+
+            self.window.append((success, latency))
+            if len(self.window) < self.min_calls:
+                return
+
+            error_rate = sum(1 for ok, _ in self.window if not ok) / len(self.window)
+            average_latency = sum(seconds for _, seconds in self.window) / len(self.window)
+            if error_rate >= self.error_threshold or (
+                self.latency_threshold is not None and average_latency >= self.latency_threshold
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        """Open the breaker. Must be called with the lock held."""
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.window.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the breaker state and recent error rate.
+
+        Returns:
+            Dictionary with state, calls in window and error rate
+        """
+        with self.lock:
+            calls = len(self.window)
+            errors = sum(1 for ok, _ in self.window if not ok)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "error_rate": errors / calls if calls else 0.0
+            }
+
+class ModelRouter:
+    """Routes generation requests across ordered model tiers per mode."""
+
+    def __init__(self, tiers: Dict[str, List[str]], latency_threshold: Optional[float] = None,
+                 error_threshold: float = 0.5, cooldown: float = 60.0):
+        """Initialize the model router.
+
+        Args:
+            tiers: Ordered models to try for each mode ("standard" and "rapid")
+            latency_threshold: Average latency in seconds at which a tier is considered degraded
+            error_threshold: Error rate at which a tier is considered degraded
+            cooldown: Seconds before a degraded tier is probed again
+        """
+        self.tiers = tiers
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        # Modes whose tiers were all found degraded, so the warning is logged once
+        self.exhausted: Set[str] = set()
+        for models in tiers.values():
+            for model in models:
+                if model not in self.breakers:
+                    self.breakers[model] = CircuitBreaker(
+                        error_threshold=error_threshold,
+                        latency_threshold=latency_threshold,
+                        cooldown=cooldown
+                    )
+
+    def candidates(self, mode: str) -> List[str]:
+        """Get the models to try, in order, for a request.
+
+        Tiers whose breaker is open are skipped. If every tier is open, the
+        first tier is returned anyway; acquire() then lets a single probe
+        through once its cooldown is over and rejects the rest.
+        Nothing is claimed: call acquire() just before each call is sent.
+
+        Args:
+            mode: "standard" or "rapid"
+
+        Returns:
+            Ordered list of models
+        """
+        models = self._models(mode)
+        available = [model for model in models if self.breakers[model].available()]
+        if not available and models:
+            return models[:1]
+        return available
+
+    def acquire(self, model: str, mode: str) -> bool:
+        """Check that a call may be sent to a model, just before sending it.
+
+        A half-open tier lets one probe call through, which this claims, so
+        every True must be followed by record() or, if no call is made,
+        release().
+
+        Args:
+            model: The model about to be called
+            mode: "standard" or "rapid"
+
+        Returns:
+            True if the call may be sent
+        """
+        breaker = self.breakers.get(model)
+        if breaker is None or breaker.allow():
+            self.exhausted.discard(mode)
+            return True
+        models = self._models(mode)
+        if mode not in self.exhausted and not any(self.breakers[tier].available() for tier in models):
+            # Each tier still gets its single probe once its cooldown is over
+            self.exhausted.add(mode)
+            logger.warning(f"All {mode} model tiers are degraded, rejecting calls until a probe succeeds")
+        return False
+
+    def release(self, model: str) -> None:
+        """Give back a call acquired with acquire() that was not made.
+
+        Args:
+            model: The model that was not called
+        """
+        breaker = self.breakers.get(model)
+        if breaker is not None:
+            breaker.release()
+
+    def _models(self, mode: str) -> List[str]:
+        return self.tiers.get(mode) or self.tiers.get("standard", [])
+
+    def record(self, model: str, success: bool, latency: float) -> None:
+        """Record the outcome of a call to a model.
+
+        Args:
+            model: The model that was called
+            success: Whether the call produced a usable entry
+            latency: Seconds the call took
+        """
+        breaker = self.breakers.get(model)
+        if breaker is None:
+            return
+        previous = breaker.state
+        breaker.record(success, latency)
+        if breaker.state != previous:
+            logger.warning(f"Model {model} circuit breaker {previous} -> {breaker.state}")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get breaker statistics for every model.
+
+        Returns:
+            Dictionary mapping model to its breaker statistics
+        """
+        return {model: breaker.get_stats() for model, breaker in self.breakers.items()}
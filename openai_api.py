@@ -1,24 +1,84 @@
 import json
+import time
 import logging
-from typing import Dict, Any, Tuple
-from openai import OpenAI
+import concurrent.futures
+from typing import Dict, Any, Tuple, Optional, List, Callable, TypeVar
+from openai import OpenAI, RateLimitError, APITimeoutError
+
+from generation_cache import GenerationCache
+from latency import LatencyTracker, call_with_hedging
+from model_router import ModelRouter, GenerationError
+from prompt_builder import TokenCounter, compact_game_data
+from scheduler import PriorityScheduler, get_scheduler
+from concurrency import AIMDController
+from metrics import REGISTRY
+from tracing import TRACER
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+OPENAI_REQUEST_SECONDS = REGISTRY.histogram(
+    "openai_request_seconds", "OpenAI call latency, including hedged attempts", ["model", "kind", "outcome"]
+)
+OPENAI_TOKENS = REGISTRY.counter("openai_tokens_total", "OpenAI tokens used", ["model", "type"])
+
+SYSTEM_PROMPT = (
+    "You are a video game historian and journalist who writes professional wiki "
+    "entries about video games. Your entries are well-structured, factual, "
+    "comprehensive and engaging for readers. Focus on the game's development, "
+    "gameplay, reception, and cultural impact. Use a neutral, encyclopedic tone."
+)
+
+# Batched generation limits
+BATCH_TOKENS_PER_ENTRY = 900
+MAX_COMPLETION_TOKENS = 4096
+MIN_ENTRY_LENGTH = 50
+
 class OpenAIAPI:
     """API client for OpenAI to generate wiki entries."""
     
-    def __init__(self, api_key: str, model="gpt-3.5-turbo"):
+    def __init__(self, api_key: str, model="gpt-3.5-turbo", cache: Optional[GenerationCache] = None,
+                 prompt_token_budget: int = 1200, rapid_prompt_token_budget: int = 600, batch_size: int = 4,
+                 request_timeout: float = 60.0, hedging_enabled: bool = True,
+                 latency_tracker: Optional[LatencyTracker] = None, max_concurrent_calls: int = 50,
+                 router: Optional[ModelRouter] = None, scheduler: Optional[PriorityScheduler] = None,
+                 base_url: Optional[str] = None):
         """Initialize the OpenAI API client.
         
         Args:
             api_key: The API key for OpenAI
-            model: The model to use (default: gpt-3.5-turbo)
+            model: The model to use when no router is given (default: gpt-3.5-turbo)
+            cache: Optional generation cache to reuse previously generated entries
+            prompt_token_budget: Maximum tokens for the user prompt
+            rapid_prompt_token_budget: Maximum tokens for the user prompt in rapid mode
+            batch_size: Maximum number of games packed into one request by generate_wiki_entries
+            request_timeout: Deadline in seconds for a single-game model call
+            hedging_enabled: Whether slow calls get a hedged duplicate request
+            latency_tracker: Per-model latency histograms that drive the hedge threshold
+            max_concurrent_calls: Maximum number of model requests in flight, including hedges
+            router: Model tiers per mode with circuit breakers (default: only model)
+            scheduler: Priority scheduler limiting concurrent model calls (default: the shared OpenAI scheduler)
+            base_url: OpenAI-compatible endpoint, such as the local simulator (default: the OpenAI API)
         """
         self.api_key = api_key
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.model = model
         self.rapid_mode = False
+        self.cache = cache
+        self.prompt_token_budget = prompt_token_budget
+        self.rapid_prompt_token_budget = rapid_prompt_token_budget
+        self.batch_size = batch_size
+        self.request_timeout = request_timeout
+        self.hedging_enabled = hedging_enabled
+        self.latency_tracker = latency_tracker or LatencyTracker()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrent_calls,
+            thread_name_prefix="openai-call"
+        )
+        self.router = router or ModelRouter({"standard": [model], "rapid": [model]})
+        self.scheduler = scheduler or get_scheduler("openai")
+        self.token_counter = TokenCounter(model)
         
     def set_rapid_mode(self, enabled=True):
         """Enable or disable rapid processing mode.
@@ -29,61 +89,419 @@ class OpenAIAPI:
         self.rapid_mode = enabled
         logger.info(f"Rapid processing mode {'enabled' if enabled else 'disabled'}")
         
-    def generate_wiki_entry(self, game_data: Dict[str, Any]) -> Tuple[str, str]:
+    @TRACER.traced("openai.generate_wiki_entry")
+    def generate_wiki_entry(self, game_data: Dict[str, Any], force_regenerate: bool = False,
+                            usage: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
         """Generate a wiki entry for a game.
         
+        Model tiers for the current mode are tried in order, skipping tiers
+        whose circuit breaker is open, until one produces an entry.
+        
         Args:
             game_data: Information about the game
+            force_regenerate: Skip the generation cache lookup and always call the model
+            usage: Optional dict filled with the model, prompt_tokens,
+                completion_tokens, latency, batch_size and whether the entry was cached
             
         Returns:
             A tuple containing (wiki_entry, references)
+            
+        Raises:
+            GenerationError: If no model tier produced an entry
         """
-        try:
-            # In ultra-rapid mode, generate minimal content
-            if self.rapid_mode and self.model == "gpt-3.5-turbo-instruct":
-                # Prepare minimalist prompt
-                game_name = game_data.get('name', 'Unknown Game')
-                description = game_data.get('description', '')[:300]  # Truncate for faster processing
-                release_date = game_data.get('released', '')
-                developers = ', '.join(game_data.get('developers', []))[:100]
-                
-                # Use the completion API for fastest possible response
-                completion = self.client.completions.create(
-                    model="gpt-3.5-turbo-instruct",
-                    prompt=f"Write a 2-paragraph wiki entry for the game '{game_name}' (released {release_date} by {developers}). Include 3 references.",
-                    max_tokens=500,
-                    temperature=0.3,
+        game_name = game_data.get('name', 'unknown game')
+        last_error = None
+        started = time.monotonic()
+        mode = self._mode()
+        
+        for model in self.router.candidates(mode):
+            try:
+                request = self._build_request(game_data, model)
+            except Exception as e:
+                raise GenerationError(f"Could not prepare prompt for {game_name}: {e}") from e
+            
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(
+                    request['model'],
+                    self.rapid_mode,
+                    request['prompt'],
+                    request['temperature'],
+                    request['max_tokens']
                 )
+                if not force_regenerate:
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        logger.info(f"Using cached wiki entry for {game_name}")
+                        TRACER.current().set("cached", True)
+                        self._fill_usage(usage, model, None, time.monotonic() - started, cached=True)
+                        return cached
+            
+            # Claimed only now, so a half-open tier's probe is always recorded or released
+            if not self.router.acquire(model, mode):
+                last_error = last_error or f"{model} is degraded"
+                continue
+            logger.info(f"Generating wiki entry for {game_name} with {model}")
+            start = time.monotonic()
+            try:
+                wiki_entry, references, counts = self._complete(request)
+                if not wiki_entry or not wiki_entry.strip():
+                    raise ValueError("model returned an empty wiki entry")
+            except Exception as e:
+                self.router.record(model, False, time.monotonic() - start)
+                logger.warning(f"Model {model} failed to generate wiki entry for {game_name}: {e}")
+                last_error = e
+                continue
+            except BaseException:
+                self.router.release(model)
+                raise
+            
+            self.router.record(model, True, time.monotonic() - start)
+            self._fill_usage(usage, model, counts, time.monotonic() - started)
+            
+            if cache_key is not None:
+                self.cache.put(cache_key, wiki_entry, references or "")
+            
+            return wiki_entry, references or ""
+        
+        raise GenerationError(f"Could not generate wiki entry for {game_name}: {last_error}")
+    
+    @TRACER.traced("openai.generate_wiki_entries")
+    def generate_wiki_entries(self, games: List[Dict[str, Any]], force_regenerate: bool = False,
+                              usages: Optional[List[Dict[str, Any]]] = None) -> List[Optional[Tuple[str, str]]]:
+        """Generate wiki entries for several games, packing them into shared requests.
+        
+        In rapid mode with a chat model, up to batch_size games are sent in a
+        single JSON-mode request whose response is keyed by game. Entries that
+        are missing or malformed in the batched response are regenerated with
+        individual generate_wiki_entry calls. Outside rapid mode every game is
+        generated individually.
+        
+        Args:
+            games: Information about each game
+            force_regenerate: Skip the generation cache lookup and always call the model
+            usages: Optional list of dicts, one per game, filled as in generate_wiki_entry.
+                Tokens of a batched call are split evenly across its games.
+            
+        Returns:
+            A list of (wiki_entry, references) tuples in the same order as
+            games, with None for games no model tier could generate
+        """
+        results: List[Optional[Tuple[str, str]]] = [None] * len(games)
+        if usages is None:
+            usages = [{} for _ in games]
+        
+        # Batch with the first healthy tier that supports JSON-mode chat
+        batch_model = None
+        if self.rapid_mode and self.batch_size > 1:
+            batch_model = next(
+                (model for model in self.router.candidates(self._mode()) if not self._is_instruct(model)),
+                None
+            )
+        
+        if batch_model is None:
+            return [self._generate_or_none(game, force_regenerate, usage) for game, usage in zip(games, usages)]
+        
+        # Resolve cache hits first so only new games are packed into requests
+        pending = []
+        for index, game in enumerate(games):
+            try:
+                request = self._build_request(game, batch_model)
+            except Exception as e:
+                logger.error(f"Error preparing prompt for {game.get('name', 'unknown game')}: {e}")
+                continue
+            
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(
+                    request['model'],
+                    self.rapid_mode,
+                    request['prompt'],
+                    request['temperature'],
+                    request['max_tokens']
+                )
+                if not force_regenerate:
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        results[index] = cached
+                        self._fill_usage(usages[index], batch_model, None, 0.0, cached=True)
+                        continue
+            
+            pending.append((index, cache_key))
+        
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            entries, counts, latency = self._generate_batch([games[index] for index, _ in chunk], batch_model)
+            shared_counts = {
+                'prompt_tokens': counts['prompt_tokens'] // len(chunk),
+                'completion_tokens': counts['completion_tokens'] // len(chunk)
+            }
+            
+            for position, (index, cache_key) in enumerate(chunk):
+                entry = entries.get(f"g{position + 1}")
+                if not self._is_valid_entry(entry):
+                    continue
                 
-                text = completion.choices[0].text
-                
-                # Very basic split between wiki entry and references
-                parts = text.split("References:")
-                wiki_entry = parts[0].strip()
-                references = f"<ol><li>{'</li><li>'.join(parts[1].strip().split('\\n')[:3] if len(parts) > 1 else ['Reference 1', 'Reference 2', 'Reference 3'])}</li></ol>"
-                
-                return wiki_entry, references
+                wiki_entry, references = entry["wiki_entry"], entry["references"]
+                results[index] = (wiki_entry, references)
+                self._fill_usage(usages[index], batch_model, shared_counts, latency, batch_size=len(chunk))
+                if cache_key is not None:
+                    self.cache.put(cache_key, wiki_entry, references)
+        
+        # Fall back to single-game calls for anything the batches did not produce
+        failed = [index for index, result in enumerate(results) if result is None]
+        if failed:
+            logger.warning(f"Falling back to single-game generation for {len(failed)} of {len(games)} games")
+        for index in failed:
+            results[index] = self._generate_or_none(games[index], True, usages[index])
+        
+        return results
+    
+    def _generate_or_none(self, game_data: Dict[str, Any], force_regenerate: bool,
+                          usage: Optional[Dict[str, Any]] = None) -> Optional[Tuple[str, str]]:
+        """Generate a single wiki entry, returning None instead of raising.
+        
+        Args:
+            game_data: Information about the game
+            force_regenerate: Skip the generation cache lookup and always call the model
+            usage: Optional dict filled as in generate_wiki_entry
             
-            # Regular processing for other models or when not in rapid mode
-            # Prepare a detailed prompt with all available game information
-            prompt = self._prepare_wiki_prompt(game_data)
+        Returns:
+            A tuple containing (wiki_entry, references), or None on failure
+        """
+        try:
+            return self.generate_wiki_entry(game_data, force_regenerate=force_regenerate, usage=usage)
+        except GenerationError as e:
+            logger.error(str(e))
+            return None
+    
+    @staticmethod
+    def _fill_usage(usage: Optional[Dict[str, Any]], model: str, counts: Optional[Dict[str, int]],
+                    latency: float, cached: bool = False, batch_size: int = 1) -> None:
+        """Fill a caller-supplied usage dict.
+        
+        Args:
+            usage: The dict to fill, or None to do nothing
+            model: The model that produced the entry
+            counts: Prompt and completion token counts, or None for cache hits
+            latency: Seconds spent generating the entry
+            cached: Whether the entry came from the generation cache
+            batch_size: Number of games that shared the model call
+        """
+        if usage is None:
+            return
+        counts = counts or {}
+        usage.update({
+            'model': model,
+            'prompt_tokens': counts.get('prompt_tokens', 0),
+            'completion_tokens': counts.get('completion_tokens', 0),
+            'latency': latency,
+            'cached': cached,
+            'batch_size': batch_size
+        })
+    
+    @staticmethod
+    def _usage_counts(response: Any) -> Dict[str, int]:
+        """Extract token counts from an OpenAI response.
+        
+        Args:
+            response: Completion or chat completion response
+            
+        Returns:
+            Dictionary with prompt_tokens and completion_tokens
+        """
+        usage = getattr(response, 'usage', None)
+        return {
+            'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+            'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0
+        }
+    
+    def _generate_batch(self, games: List[Dict[str, Any]], model: str) -> Tuple[Dict[str, Any], Dict[str, int], float]:
+        """Generate entries for a group of games in one JSON-mode request.
+        
+        Args:
+            games: Information about each game in the group
+            model: The model to use
+            
+        Returns:
+            A tuple of the response object keyed by game key ("g1", "g2", ...),
+            the call's token counts and its latency. The response object is
+            empty if the request failed or the model's circuit breaker did
+            not let it through.
+        """
+        if not self.router.acquire(model, self._mode()):
+            logger.warning(f"Model {model} is degraded, generating {len(games)} wiki entries individually")
+            return {}, {'prompt_tokens': 0, 'completion_tokens': 0}, 0.0
+        start = time.monotonic()
+        try:
+            prompt = self._prepare_batch_prompt(games)
+            prompt_tokens = self.token_counter.count(SYSTEM_PROMPT) + self.token_counter.count(prompt)
+            logger.info(f"Generating {len(games)} wiki entries in one request ({prompt_tokens} prompt tokens)")
             
-            logger.info(f"Generating wiki entry for {game_data.get('name', 'unknown game')}")
+            result, counts = self._chat_json(
+                model,
+                prompt,
+                0.5,
+                min(BATCH_TOKENS_PER_ENTRY * len(games), MAX_COMPLETION_TOKENS),
+                kind=f"batch{len(games)}",
+                # Larger completions need proportionally more time
+                deadline=self.request_timeout * (1 + 0.5 * (len(games) - 1))
+            )
+            if not isinstance(result, dict):
+                raise ValueError("batched response is not a JSON object")
+            
+            latency = time.monotonic() - start
+            self.router.record(model, True, latency)
+            return result, counts, latency
+            
+        except Exception as e:
+            latency = time.monotonic() - start
+            self.router.record(model, False, latency)
+            logger.error(f"Error generating batched wiki entries with {model}: {e}")
+            return {}, {'prompt_tokens': 0, 'completion_tokens': 0}, latency
+        except BaseException:
+            self.router.release(model)
+            raise
+    
+    @staticmethod
+    def _is_valid_entry(entry: Any) -> bool:
+        """Check that a batched response entry has usable content.
+        
+        Args:
+            entry: One value from the batched response object
+            
+        Returns:
+            True if the entry has a non-empty wiki entry and references
+        """
+        if not isinstance(entry, dict):
+            return False
+        wiki_entry = entry.get("wiki_entry")
+        references = entry.get("references")
+        return (
+            isinstance(wiki_entry, str) and len(wiki_entry.strip()) >= MIN_ENTRY_LENGTH
+            and isinstance(references, str) and bool(references.strip())
+        )
+    
+    def _mode(self) -> str:
+        """Get the routing mode for the current settings."""
+        return "rapid" if self.rapid_mode else "standard"
+    
+    @staticmethod
+    def _is_instruct(model: str) -> bool:
+        """Check whether a model uses the instruct completion API."""
+        return model.endswith("-instruct")
+    
+    def _build_request(self, game_data: Dict[str, Any], model: str) -> Dict[str, Any]:
+        """Build the model request for a game without sending it.
+        
+        Args:
+            game_data: Information about the game
+            model: The model the request is for
+            
+        Returns:
+            Dictionary with model, prompt, temperature, max_tokens and whether
+            the instruct completion API is used
+        """
+        # Instruct models get a minimal prompt for the fastest possible response
+        if self._is_instruct(model):
+            # Prepare minimalist prompt
+            game_name = game_data.get('name', 'Unknown Game')
+            release_date = game_data.get('released', '')
+            developers = ', '.join(game_data.get('developers', []))[:100]
             
+            return {
+                'model': model,
+                'prompt': f"Write a 2-paragraph wiki entry for the game '{game_name}' (released {release_date} by {developers}). Include 3 references.",
+                'temperature': 0.3,
+                'max_tokens': 500,
+                'instruct': True
+            }
+        
+        # Regular processing for other models or when not in rapid mode
+        # Prepare a detailed prompt with all available game information
+        prompt = self._prepare_wiki_prompt(game_data)
+        prompt_tokens = self.token_counter.count(SYSTEM_PROMPT) + self.token_counter.count(prompt)
+        logger.info(f"Prompt for {game_data.get('name', 'unknown game')}: {prompt_tokens} tokens")
+        
+        return {
+            'model': model,
+            'prompt': prompt,
             # Adjust parameters based on mode
-            temperature = 0.5 if self.rapid_mode else 0.7
-            max_tokens = 1000 if self.rapid_mode else 2000
+            'temperature': 0.5 if self.rapid_mode else 0.7,
+            'max_tokens': 1000 if self.rapid_mode else 2000,
+            'instruct': False
+        }
+    
+    def _complete(self, request: Dict[str, Any]) -> Tuple[str, str, Dict[str, int]]:
+        """Send a prepared request to OpenAI and parse the result.
+        
+        Args:
+            request: Request built by _build_request
+            
+        Returns:
+            A tuple containing (wiki_entry, references, token counts)
+        """
+        if request['instruct']:
+            # Use the completion API for fastest possible response
+            completion = self._call_model(
+                request['model'],
+                "instruct",
+                self.request_timeout,
+                lambda client: client.completions.create(
+                    model=request['model'],
+                    prompt=request['prompt'],
+                    max_tokens=request['max_tokens'],
+                    temperature=request['temperature'],
+                )
+            )
             
-            # Make the request to OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
+            text = completion.choices[0].text
+            
+            # Very basic split between wiki entry and references
+            parts = text.split("References:")
+            wiki_entry = parts[0].strip()
+            if len(parts) > 1:
+                reference_items = parts[1].strip().split('\n')[:3]
+            else:
+                reference_items = ['Reference 1', 'Reference 2', 'Reference 3']
+            references = f"<ol><li>{'</li><li>'.join(reference_items)}</li></ol>"
+            
+            return wiki_entry, references, self._usage_counts(completion)
+        
+        result, counts = self._chat_json(request['model'], request['prompt'], request['temperature'], request['max_tokens'])
+        
+        wiki_entry = result.get("wiki_entry", "")
+        references = result.get("references", "")
+        
+        return wiki_entry, references, counts
+    
+    def _chat_json(self, model: str, prompt: str, temperature: float, max_tokens: int,
+                   kind: str = "single", deadline: Optional[float] = None) -> Tuple[Any, Dict[str, int]]:
+        """Send a JSON-mode chat completion request.
+        
+        Args:
+            model: The model to use
+            prompt: The user prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum completion tokens
+            kind: Request kind used to keep separate latency histograms
+            deadline: Seconds allowed for the call (default: request_timeout)
+            
+        Returns:
+            A tuple of the parsed JSON from the response (an object unless the
+            model misbehaved) and the call's token counts
+        """
+        # Make the request to OpenAI
+        response = self._call_model(
+            model,
+            kind,
+            deadline or self.request_timeout,
+            lambda client: client.chat.completions.create(
+                model=model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are a video game historian and journalist who writes professional wiki "
-                                  "entries about video games. Your entries are well-structured, factual, "
-                                  "comprehensive and engaging for readers. Focus on the game's development, "
-                                  "gameplay, reception, and cultural impact. Use a neutral, encyclopedic tone."
+                        "content": SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -94,33 +512,108 @@ class OpenAIAPI:
                 temperature=temperature,
                 max_tokens=max_tokens
             )
+        )
+        
+        # Extract the response
+        return json.loads(response.choices[0].message.content), self._usage_counts(response)
+    
+    @TRACER.traced("openai.request")
+    def _call_model(self, model: str, kind: str, deadline: float, send: Callable[[OpenAI], T]) -> T:
+        """Make a model call under a deadline, hedging it once it runs past p95.
+        
+        Each attempt gets a client whose timeout is the time left until the
+        deadline, so a slow attempt is aborted instead of holding its worker.
+        The call holds one scheduler slot of the caller's request class, and
+        its deadline starts once the slot is granted. Its outcome feeds the
+        scheduler's adaptive concurrency limit.
+        
+        Args:
+            model: The model being called
+            kind: Request kind used to keep separate latency histograms
+            deadline: Seconds allowed for the whole call
+            send: Function making the request with the given client
             
-            # Extract the response
-            result = json.loads(response.choices[0].message.content)
-            
-            wiki_entry = result.get("wiki_entry", "")
-            references = result.get("references", "")
-            
-            return wiki_entry, references
-            
-        except Exception as e:
-            logger.error(f"Error generating wiki entry: {e}")
-            return (
-                "Error generating wiki entry. Please try again later.",
-                "No references available due to error."
-            )
-            
+        Returns:
+            The response of the first attempt to succeed
+        """
+        key = f"{model}/{kind}"
+        span = TRACER.current()
+        span.set("model", model)
+        span.set("kind", kind)
+        hedge_delay = self.latency_tracker.hedge_delay(key) if self.hedging_enabled else None
+        
+        with self.scheduler.slot():
+            start = time.monotonic()
+            try:
+                result = call_with_hedging(
+                    lambda timeout: send(self.client.with_options(timeout=timeout, max_retries=0)),
+                    deadline,
+                    hedge_delay,
+                    self._executor,
+                    on_latency=lambda seconds: self.latency_tracker.observe(key, seconds)
+                )
+            except (RateLimitError, APITimeoutError, TimeoutError):
+                self.scheduler.record(AIMDController.OVERLOAD)
+                OPENAI_REQUEST_SECONDS.observe(time.monotonic() - start, (model, kind, "overload"))
+                raise
+            except Exception:
+                self.scheduler.record(AIMDController.ERROR)
+                OPENAI_REQUEST_SECONDS.observe(time.monotonic() - start, (model, kind, "error"))
+                raise
+            self.scheduler.record(AIMDController.OK, time.monotonic() - start)
+            OPENAI_REQUEST_SECONDS.observe(time.monotonic() - start, (model, kind, "ok"))
+            counts = self._usage_counts(result)
+            span.set("completion_tokens", counts['completion_tokens'])
+            OPENAI_TOKENS.inc(counts['prompt_tokens'], (model, "prompt"))
+            OPENAI_TOKENS.inc(counts['completion_tokens'], (model, "completion"))
+            return result
+    
     def _prepare_wiki_prompt(self, game_data: Dict[str, Any]) -> str:
         """Prepare a detailed prompt for the wiki entry generation.
         
+        The description is converted from HTML to plain text, names are
+        deduplicated, and the description is truncated so the whole prompt
+        fits the token budget for the current mode.
+        
+        Args:
+            game_data: Information about the game
+            
+        Returns:
+            A formatted prompt string
+        """
+        return self._render_wiki_prompt(self._compact_to_budget(game_data))
+    
+    def _compact_to_budget(self, game_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Compact game data so its single-game prompt fits the token budget.
+        
         Args:
             game_data: Information about the game
             
+        Returns:
+            Compacted game data with a truncated plain-text description
+        """
+        compacted = compact_game_data(game_data)
+        description = compacted['description'] or 'No description available.'
+        budget = self.rapid_prompt_token_budget if self.rapid_mode else self.prompt_token_budget
+        
+        # Give the description whatever the rest of the prompt leaves over
+        compacted['description'] = ''
+        remaining = budget - self.token_counter.count(self._render_wiki_prompt(compacted))
+        compacted['description'] = self.token_counter.truncate(description, remaining)
+        
+        return compacted
+    
+    def _render_wiki_prompt(self, game_data: Dict[str, Any]) -> str:
+        """Render the wiki prompt template from compacted game data.
+        
+        Args:
+            game_data: Compacted information about the game
+            
         Returns:
             A formatted prompt string
         """
         game_name = game_data.get('name', 'Unknown Game')
-        description = game_data.get('description', 'No description available.')
+        description = game_data.get('description', '')
         release_date = game_data.get('released', 'Unknown release date')
         developers = ', '.join(game_data.get('developers', ['Unknown developer']))
         publishers = ', '.join(game_data.get('publishers', ['Unknown publisher']))
@@ -135,12 +628,7 @@ class OpenAIAPI:
 Create a brief wiki entry for the game "{game_name}".
 
 Game info:
-- Description: {description}
-- Release: {release_date}
-- Dev: {developers}
-- Publisher: {publishers}
-- Genres: {genres}
-- Platforms: {platforms}
+{self._render_game_facts(game_data)}
 
 Write 2-3 paragraphs covering gameplay, development, and reception.
 Include 3 references in HTML format.
@@ -186,7 +674,56 @@ Example reference format:
   </li>
 </ol>
 
-Note: If the description is in HTML format, please parse it and use the actual content rather than the HTML tags.
 The image URL will be displayed alongside your wiki entry, so you don't need to describe the image in detail. Focus on the game itself.
 """
         return prompt
+    
+    def _prepare_batch_prompt(self, games: List[Dict[str, Any]]) -> str:
+        """Prepare a prompt asking for several rapid-mode wiki entries at once.
+        
+        Args:
+            games: Information about each game
+            
+        Returns:
+            A formatted prompt string
+        """
+        sections = []
+        for position, game_data in enumerate(games, start=1):
+            compacted = self._compact_to_budget(game_data)
+            sections.append(
+                f'Game "g{position}": "{compacted.get("name", "Unknown Game")}"\n'
+                f'{self._render_game_facts(compacted)}'
+            )
+        games_info = "\n\n".join(sections)
+        keys = ", ".join(f'"g{position}"' for position in range(1, len(games) + 1))
+        
+        return f"""
+Create a brief wiki entry for each of the following games.
+
+{games_info}
+
+For each game write 2-3 paragraphs covering gameplay, development, and reception.
+Include 3 references in HTML format for each game.
+
+Format as a JSON object with the keys {keys}. Each value must be an object with:
+1. "wiki_entry": HTML-formatted wiki entry
+2. "references": HTML-formatted references list with <ol> and <li> tags
+"""
+    
+    def _render_game_facts(self, game_data: Dict[str, Any]) -> str:
+        """Render the concise list of game facts used by rapid-mode prompts.
+        
+        Args:
+            game_data: Compacted information about the game
+            
+        Returns:
+            The facts as a bulleted list
+        """
+        return "\n".join([
+            f"- Description: {game_data.get('description', '')}",
+            f"- Release: {game_data.get('released', 'Unknown release date')}",
+            f"- Dev: {', '.join(game_data.get('developers', ['Unknown developer']))}",
+            f"- Publisher: {', '.join(game_data.get('publishers', ['Unknown publisher']))}",
+            f"- Genres: {', '.join(game_data.get('genres', ['Unknown genre']))}",
+            f"- Platforms: {', '.join(game_data.get('platforms', ['Unknown platform']))}",
+        ])
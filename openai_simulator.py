@@ -0,0 +1,319 @@
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Batched rapid prompts name every game as: Game "g1": "Name"
+BATCH_GAME_PATTERN = re.compile(r'Game "(g\d+)": "([^"\n]*)"')
+# Single-game prompts: ...for the game "Name" / for the video game "Name" / for the game 'Name'
+GAME_NAME_PATTERN = re.compile(r'for the (?:video )?game ["\']([^"\'\n]*)["\']')
+
+WORDS = (
+    "gameplay level design narrative soundtrack combat exploration puzzle platforming pixel art studio "
+    "release reception critics players community update roguelike crafting dungeon story atmosphere "
+    "mechanics progression controls boss world character developer indie campaign multiplayer"
+).split()
+
+class SimulatorSettings:
+    """Behaviour of the simulated OpenAI backend."""
+
+    def __init__(self, seed: int = 0, latency_median: float = 0.8, latency_sigma: float = 0.4,
+                 seconds_per_token: float = 0.0, completion_tokens: int = 350, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, max_concurrency: Optional[int] = None):
+        """Initialize the settings.
+
+        Args:
+            seed: Seed that makes output, latency and failures repeatable
+            latency_median: Median base latency in seconds (lognormal distribution)
+            latency_sigma: Spread of the lognormal latency (0 for a fixed latency)
+            seconds_per_token: Extra latency per completion token
+            completion_tokens: Mean completion tokens per wiki entry
+            error_rate: Fraction of requests answered with a 500 error
+            rate_limit_rate: Fraction of requests answered with a 429 error
+            max_concurrency: Requests in flight above which every request gets a 429 (default: unlimited)
+        """
+        self.seed = seed
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.seconds_per_token = seconds_per_token
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_concurrency = max_concurrency
+
+class OpenAISimulator:
+    """Deterministic stand-in for the OpenAI chat and completions endpoints.
+
+    Every request is answered from a random generator seeded with the seed,
+    a hash of the request body and how often that body was seen before, so
+    the same sequence of requests produces the same latencies, failures and
+    output on every run, while a retried request gets a fresh draw. JSON
+    mode chat requests get the wiki_entry/references object the pipeline
+    expects, including one object per game for batched prompts.
+    """
+
+    def __init__(self, settings: Optional[SimulatorSettings] = None):
+        """Initialize the simulator.
+
+        Args:
+            settings: Simulator behaviour (default: SimulatorSettings())
+        """
+        self.settings = settings or SimulatorSettings()
+        self.lock = threading.Lock()
+        self.seen = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.statuses = Counter()
+        self.completion_tokens = 0
+        self.prompt_tokens = 0
+
+    def _rng(self, body: bytes) -> random.Random:
+        """Get the random generator for a request."""
+        digest = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            attempt = self.seen[digest]
+            self.seen[digest] += 1
+        return random.Random(f"{self.settings.seed}:{digest}:{attempt}")
+
+    @staticmethod
+    def _count_tokens(text: str) -> int:
+        """Approximate a token count (about four characters per token)."""
+        return max(1, len(text) // 4)
+
+    @staticmethod
+    def _paragraphs(rng: random.Random, name: str, tokens: int) -> str:
+        """Write filler wiki paragraphs of roughly the given token count."""
+        words = [rng.choice(WORDS) for _ in range(max(tokens * 3 // 4, 20))]
+        paragraphs = []
+        for start in range(0, len(words), 60):
+            paragraphs.append(f"<p>{name} {' '.join(words[start:start + 60])}.</p>")
+        return "".join(paragraphs)
+
+    @staticmethod
+    def _references(name: str) -> str:
+        """Write a references list."""
+        items = "".join(f'<li class="mb-2">Reviewer {index}. (2024). {name} review.</li>' for index in range(1, 4))
+        return f'<ol class="ps-4">{items}</ol>'
+
+    def _entry(self, rng: random.Random, name: str) -> Tuple[Dict[str, str], int]:
+        """Build one wiki entry and its completion token count."""
+        tokens = max(50, int(rng.gauss(self.settings.completion_tokens, self.settings.completion_tokens * 0.2)))
+        entry = {"wiki_entry": self._paragraphs(rng, name, tokens), "references": self._references(name)}
+        return entry, tokens
+
+    def _chat_content(self, rng: random.Random, prompt: str) -> Tuple[str, int]:
+        """Build a JSON-mode chat completion for a wiki prompt."""
+        games = BATCH_GAME_PATTERN.findall(prompt)
+        if games:
+            result, tokens = {}, 0
+            for key, name in games:
+                result[key], entry_tokens = self._entry(rng, name)
+                tokens += entry_tokens
+            return json.dumps(result), tokens
+
+        match = GAME_NAME_PATTERN.search(prompt)
+        entry, tokens = self._entry(rng, match.group(1) if match else "The game")
+        return json.dumps(entry), tokens
+
+    def _instruct_text(self, rng: random.Random, prompt: str) -> Tuple[str, int]:
+        """Build an instruct completion for a wiki prompt."""
+        match = GAME_NAME_PATTERN.search(prompt)
+        name = match.group(1) if match else "The game"
+        entry, tokens = self._entry(rng, name)
+        references = "\n".join(f"{index}. Reviewer {index}. (2024). {name} review." for index in range(1, 4))
+        return f"{entry['wiki_entry']}\n\nReferences:\n{references}", tokens
+
+    def _latency(self, rng: random.Random, completion_tokens: int) -> float:
+        """Draw the latency of a request."""
+        settings = self.settings
+        base = settings.latency_median * math.exp(rng.gauss(0, settings.latency_sigma)) if settings.latency_sigma else settings.latency_median
+        return base + completion_tokens * settings.seconds_per_token
+
+    def handle(self, path: str, body: bytes) -> Tuple[int, Dict[str, Any], float]:
+        """Answer a request.
+
+        Args:
+            path: Request path, such as /v1/chat/completions
+            body: JSON request body
+
+        Returns:
+            Tuple of (HTTP status, response object, seconds to wait before answering)
+        """
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}}, 0.0
+
+        rng = self._rng(body)
+        model = request.get("model", "gpt-3.5-turbo")
+
+        with self.lock:
+            overloaded = self.settings.max_concurrency is not None and self.in_flight > self.settings.max_concurrency
+
+        roll = rng.random()
+        if overloaded or roll < self.settings.rate_limit_rate:
+            # Rate limit responses come back quickly, like the real API's
+            return 429, {"error": {"message": "Rate limit reached (simulated)", "type": "requests",
+                                   "code": "rate_limit_exceeded"}}, self.settings.latency_median * 0.05
+        if roll < self.settings.rate_limit_rate + self.settings.error_rate:
+            return 500, {"error": {"message": "The server had an error (simulated)", "type": "server_error"}}, \
+                self._latency(rng, 0)
+
+        if path.endswith("/chat/completions"):
+            prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+            content, completion_tokens = self._chat_content(rng, prompt)
+            choice = {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            kind = "chat.completion"
+        elif path.endswith("/completions"):
+            prompt = str(request.get("prompt", ""))
+            text, completion_tokens = self._instruct_text(rng, prompt)
+            choice = {"index": 0, "text": text, "logprobs": None, "finish_reason": "stop"}
+            kind = "text_completion"
+        else:
+            return 404, {"error": {"message": f"Unknown endpoint {path}", "type": "invalid_request_error"}}, 0.0
+
+        prompt_tokens = self._count_tokens(prompt)
+        with self.lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+        response = {
+            "id": f"sim-{rng.getrandbits(64):016x}",
+            "object": kind,
+            "created": int(time.time()),
+            "model": model,
+            "choices": [choice],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+        return 200, response, self._latency(rng, completion_tokens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request counts since the simulator started.
+
+        Returns:
+            Dictionary with requests per status, peak concurrency and token totals
+        """
+        with self.lock:
+            return {
+                "requests": sum(self.statuses.values()),
+                "statuses": {str(status): count for status, count in self.statuses.items()},
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens
+            }
+
+def _make_handler(simulator: OpenAISimulator):
+    """Build the HTTP request handler class for a simulator."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send(200, simulator.get_stats())
+            elif self.path.rstrip("/").endswith("/models"):
+                self._send(200, {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model"}]})
+            else:
+                self._send(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with simulator.lock:
+                simulator.in_flight += 1
+                simulator.peak_in_flight = max(simulator.peak_in_flight, simulator.in_flight)
+            try:
+                status, payload, delay = simulator.handle(self.path, body)
+                time.sleep(delay)
+                with simulator.lock:
+                    simulator.statuses[status] += 1
+                self._send(status, payload)
+            finally:
+                with simulator.lock:
+                    simulator.in_flight -= 1
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+def start_simulator(settings: Optional[SimulatorSettings] = None, host: str = "127.0.0.1",
+                    port: int = 0) -> Tuple[ThreadingHTTPServer, OpenAISimulator]:
+    """Start a simulator in a background thread.
+
+    Args:
+        settings: Simulator behaviour
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free port)
+
+    Returns:
+        Tuple of (server, simulator). The base URL for OpenAIAPI is
+        http://<host>:<server.server_port>/v1; call server.shutdown() to stop.
+    """
+    simulator = OpenAISimulator(settings)
+    server = ThreadingHTTPServer((host, port), _make_handler(simulator))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="openai-simulator", daemon=True)
+    thread.start()
+    logger.info(f"Simulated OpenAI backend listening on http://{host}:{server.server_port}/v1")
+    return server, simulator
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Simulated OpenAI-compatible backend for load tests")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8089, help="Port to listen on")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for repeatable output, latency and failures")
+    parser.add_argument("--latency-median", type=float, default=0.8, help="Median latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Lognormal latency spread (0 for fixed)")
+    parser.add_argument("--seconds-per-token", type=float, default=0.0, help="Extra latency per completion token")
+    parser.add_argument("--completion-tokens", type=int, default=350, help="Mean completion tokens per entry")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--max-concurrency", type=int, help="Requests in flight above which requests get 429")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server, _ = start_simulator(
+        SimulatorSettings(
+            seed=args.seed,
+            latency_median=args.latency_median,
+            latency_sigma=args.latency_sigma,
+            seconds_per_token=args.seconds_per_token,
+            completion_tokens=args.completion_tokens,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            max_concurrency=args.max_concurrency
+        ),
+        host=args.host,
+        port=args.port
+    )
+    print(f"Set OPENAI_BASE_URL=http://{args.host}:{server.server_port}/v1 to use the simulator")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,348 @@
+import time
+import queue
+import logging
+import threading
+import contextvars
+import weakref
+from collections import deque
+from typing import Callable, Iterable, List, Dict, Any, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Pipelines of this process, for the queue depth gauge
+_pipelines: 'weakref.WeakSet[Pipeline]' = weakref.WeakSet()
+
+def _queue_depths() -> Dict[tuple, float]:
+    """Get the queue depth of every stage of the running pipelines."""
+    return {
+        (pipeline.name, stage.name): stage.depth()
+        for pipeline in list(_pipelines) if pipeline.is_running()
+        for stage in pipeline.stages
+    }
+
+REGISTRY.gauge("pipeline_queue_depth", "Items waiting for each pipeline stage", ["pipeline", "stage"]).set_function(_queue_depths)
+
+class Stage:
+    """One step of a pipeline with its own workers and bounded input queue.
+
+    Workers take items from the input queue, call func on them and pass every
+    non-None result on to the next stage. When batch_size is greater than one,
+    func receives a list of up to batch_size items and returns an iterable of
+    results. Putting into a full queue blocks, so a slow stage applies
+    backpressure to the stages before it.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1, max_queue: int = 100,
+                 batch_size: int = 1, batch_wait: float = 0.5):
+        """Initialize the stage.
+
+        Args:
+            name: Name used in logs and statistics
+            func: Function applied to each item (or list of items when batching)
+            workers: Number of worker threads
+            max_queue: Capacity of the input queue
+            batch_size: Maximum number of items passed to func at once
+            batch_wait: Seconds to wait for a batch to fill before processing it
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.retries = deque()
+        self.next_stage: Optional['Stage'] = None
+        self.pipeline: Optional['Pipeline'] = None
+
+        self.upstream_done = threading.Event()
+        self.done = threading.Event()
+        self.active_workers = 0
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.processed = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def requeue(self, item: Any) -> None:
+        """Queue an item for another pass through this stage.
+
+        Requeued items bypass the bounded queue so a worker can requeue
+        without blocking on its own input.
+
+        Args:
+            item: The item to process again
+        """
+        self.retries.append(item)
+
+    def depth(self) -> int:
+        """Get the number of items waiting for this stage."""
+        return self.queue.qsize() + len(self.retries)
+
+    def put(self, item: Any) -> bool:
+        """Put an item into the input queue, blocking while it is full.
+
+        Args:
+            item: The item to queue
+
+        Returns:
+            True if queued, False if the pipeline stopped while waiting
+        """
+        while not self.pipeline.stopping.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def start(self) -> None:
+        """Start the worker threads, carrying over the caller's context (such as its request priority)."""
+        self.active_workers = self.workers
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._run_worker,),
+                name=f"{self.pipeline.name}-{self.name}-{index}",
+                daemon=True
+            )
+            thread.start()
+
+    def _exhausted(self) -> bool:
+        """Check whether no more input will arrive for this stage."""
+        return self.upstream_done.is_set() and self.queue.empty() and not self.retries
+
+    def _take_one(self, timeout: float) -> Any:
+        """Take one item, preferring requeued items.
+
+        Args:
+            timeout: Seconds to wait for an item
+
+        Returns:
+            The item, or None if none arrived in time
+        """
+        try:
+            return self.retries.popleft()
+        except IndexError:
+            pass
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _take(self) -> List[Any]:
+        """Take the next batch of items (a single item unless batching).
+
+        Returns:
+            List of items, empty if none arrived in time
+        """
+        first = self._take_one(0.1)
+        if first is None:
+            return []
+
+        items = [first]
+        wait_until = time.monotonic() + self.batch_wait
+        while len(items) < self.batch_size and not self.pipeline.stopping.is_set():
+            remaining = wait_until - time.monotonic()
+            if remaining <= 0 or self._exhausted():
+                break
+            item = self._take_one(min(remaining, 0.1))
+            if item is not None:
+                items.append(item)
+        return items
+
+    def _run_worker(self) -> None:
+        """Worker loop: process items until the stage is exhausted or stopped."""
+        try:
+            while not self.pipeline.stopping.is_set():
+                items = self._take()
+                if not items:
+                    if self._exhausted():
+                        break
+                    continue
+
+                start = time.monotonic()
+                try:
+                    if self.batch_size > 1:
+                        results = list(self.func(items) or [])
+                    else:
+                        results = [self.func(items[0])]
+                except Exception as e:
+                    logger.error(f"Error in pipeline stage {self.name}: {e}")
+                    results = []
+                    with self.lock:
+                        self.errors += len(items)
+
+                outputs = [result for result in results if result is not None]
+                with self.lock:
+                    self.busy_seconds += time.monotonic() - start
+                    self.processed += len(items)
+                    self.emitted += len(outputs)
+                    self.dropped += len(items) - len(outputs)
+
+                if self.next_stage is not None:
+                    for output in outputs:
+                        if not self.next_stage.put(output):
+                            break
+        finally:
+            with self.lock:
+                self.active_workers -= 1
+                last_worker = self.active_workers == 0
+            if last_worker:
+                self.done.set()
+                if self.next_stage is not None:
+                    self.next_stage.upstream_done.set()
+
+    def get_stats(self, elapsed: float) -> Dict[str, Any]:
+        """Get statistics for the stage.
+
+        Args:
+            elapsed: Seconds since the pipeline started
+
+        Returns:
+            Dictionary with queue depth, counters, throughput and utilization
+        """
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.depth(),
+                "processed": self.processed,
+                "emitted": self.emitted,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "throughput_per_min": self.processed / elapsed * 60 if elapsed > 0 else 0.0,
+                "utilization": self.busy_seconds / (elapsed * self.workers) if elapsed > 0 else 0.0
+            }
+
+class Pipeline:
+    """Streams items from a source through a chain of stages.
+
+    The source runs on its own thread and feeds the first stage; every stage
+    runs its own workers, so fetching, generation and persistence overlap and
+    items flow through continuously instead of waiting on batch barriers.
+    """
+
+    def __init__(self, name: str, source: Iterable[Any], stages: List[Stage], monitor_interval: float = 30.0):
+        """Initialize the pipeline.
+
+        Args:
+            name: Name used in logs and thread names
+            source: Iterable producing the items for the first stage
+            stages: Stages in processing order
+            monitor_interval: Seconds between stage statistics log lines (0 to disable)
+        """
+        self.name = name
+        self.source = source
+        self.stages = stages
+        self.monitor_interval = monitor_interval
+        self.stopping = threading.Event()
+        self.produced = 0
+        self.start_time = None
+
+        for stage, next_stage in zip(stages, stages[1:] + [None]):
+            stage.pipeline = self
+            stage.next_stage = next_stage
+
+    def stage(self, name: str) -> Stage:
+        """Get a stage by name.
+
+        Args:
+            name: The stage name
+
+        Returns:
+            The stage
+        """
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def start(self) -> None:
+        """Start the source, stage workers and monitor threads."""
+        self.start_time = time.monotonic()
+        _pipelines.add(self)
+        for stage in self.stages:
+            stage.start()
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._run_source,),
+            name=f"{self.name}-source",
+            daemon=True
+        ).start()
+        if self.monitor_interval:
+            threading.Thread(target=self._run_monitor, name=f"{self.name}-monitor", daemon=True).start()
+        logger.info(f"Pipeline {self.name} started with stages: "
+                    f"{', '.join(f'{stage.name} x{stage.workers}' for stage in self.stages)}")
+
+    def _run_source(self) -> None:
+        """Feed source items into the first stage."""
+        first = self.stages[0]
+        try:
+            for item in self.source:
+                if self.stopping.is_set() or not first.put(item):
+                    break
+                self.produced += 1
+        except Exception as e:
+            logger.error(f"Error in pipeline {self.name} source: {e}")
+        finally:
+            first.upstream_done.set()
+
+    def _run_monitor(self) -> None:
+        """Periodically log stage statistics while the pipeline runs."""
+        while not self.stopping.wait(self.monitor_interval):
+            if not self.is_running():
+                break
+            self.log_stats()
+
+    def stop(self) -> None:
+        """Stop the pipeline: no new items are taken, queued items are abandoned."""
+        if not self.stopping.is_set():
+            logger.info(f"Stopping pipeline {self.name}")
+            self.stopping.set()
+
+    def is_running(self) -> bool:
+        """Check whether any stage still has active workers."""
+        return any(not stage.done.is_set() for stage in self.stages)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every stage's workers to finish, including in-flight items after a stop.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the pipeline finished
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        for stage in self.stages:
+            remaining = None if end is None else max(end - time.monotonic(), 0)
+            if not stage.done.wait(remaining):
+                return False
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics for the source and every stage.
+
+        Returns:
+            Dictionary with elapsed time, items produced and per-stage statistics
+        """
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0.0
+        return {
+            "elapsed": elapsed,
+            "produced": self.produced,
+            "stages": {stage.name: stage.get_stats(elapsed) for stage in self.stages}
+        }
+
+    def log_stats(self) -> None:
+        """Log queue depth, throughput and utilization for every stage."""
+        stats = self.get_stats()
+        for name, stage in stats["stages"].items():
+            logger.info(
+                f"Pipeline {self.name} [{name}] queue={stage['queue_depth']} "
+                f"processed={stage['processed']} dropped={stage['dropped']} errors={stage['errors']} "
+                f"rate={stage['throughput_per_min']:.1f}/min busy={stage['utilization'] * 100:.0f}%"
+            )
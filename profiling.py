@@ -0,0 +1,170 @@
+import io
+import os
+import hmac
+import time
+import marshal
+import random
+import pstats
+import logging
+import cProfile
+import threading
+from datetime import datetime
+from urllib.parse import parse_qs
+from typing import Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+class _Profile:
+    """One profiling session with either cProfile or the pyinstrument sampling profiler."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.profiler = SamplingProfiler() if kind == "pyinstrument" else cProfile.Profile()
+
+    def __enter__(self) -> '_Profile':
+        if self.kind == "pyinstrument":
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.kind == "pyinstrument":
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    def render(self, output: str) -> Tuple[bytes, str, str]:
+        """Render the profile.
+
+        Args:
+            output: "text", "pstats" or "html" (html needs pyinstrument)
+
+        Returns:
+            Tuple of (body, content type, file extension)
+        """
+        if self.kind == "pyinstrument":
+            if output == "html":
+                return self.profiler.output_html().encode("utf-8"), "text/html", "html"
+            return self.profiler.output_text(unicode=True).encode("utf-8"), "text/plain", "txt"
+        if output == "pstats":
+            # Same format as Profile.dump_stats, readable with pstats.Stats or snakeviz
+            self.profiler.create_stats()
+            return marshal.dumps(self.profiler.stats), "application/octet-stream", "prof"
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(60)
+        return stream.getvalue().encode("utf-8"), "text/plain", "txt"
+
+class ProfilerMiddleware:
+    """WSGI middleware that profiles requests on demand or by sampling.
+
+    On demand, a request carrying ?profile=1 and the admin token (in the
+    X-Profile-Token header or a profile_token parameter) gets the profile
+    back instead of the page; ?profile_format= picks text (default), pstats
+    or html. With sample_rate N, about one in N requests is profiled and
+    its profile written to the output directory. Python allows one
+    profiler at a time, so requests arriving while another one is profiled
+    are served unprofiled.
+    """
+
+    def __init__(self, wsgi_app: Callable, token: Optional[str] = None, sample_rate: int = 0,
+                 output_dir: Optional[str] = None, profiler: str = "cprofile", max_files: int = 200):
+        """Initialize the middleware.
+
+        Args:
+            wsgi_app: The application to wrap
+            token: Admin token for on-demand profiles (None disables them)
+            sample_rate: Profile about one in this many requests (0 disables sampling)
+            output_dir: Directory sampled profiles are written to
+            profiler: "cprofile" (deterministic) or "pyinstrument" (sampling)
+            max_files: Sampled profiles kept; older ones are deleted
+        """
+        if profiler == "pyinstrument" and SamplingProfiler is None:
+            logger.warning("pyinstrument not installed. Falling back to cProfile.")
+            profiler = "cprofile"
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.profiler = profiler
+        self.max_files = max_files
+        self.lock = threading.Lock()
+        if sample_rate and output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        logger.info(f"Request profiling enabled ({profiler}, on demand: {'yes' if token else 'no'}, "
+                    f"sampling: {f'1 in {sample_rate}' if sample_rate else 'off'})")
+
+    def __call__(self, environ, start_response) -> Iterable[bytes]:
+        query = parse_qs(environ.get("QUERY_STRING", ""))
+        if query.get("profile", ["0"])[0] not in ("", "0") and self._authorized(environ, query):
+            return self._profile_on_demand(environ, start_response, query.get("profile_format", ["text"])[0])
+        if self.sample_rate and random.random() * self.sample_rate < 1:
+            return self._profile_sampled(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+    def _authorized(self, environ, query) -> bool:
+        if not self.token:
+            return False
+        supplied = environ.get("HTTP_X_PROFILE_TOKEN") or query.get("profile_token", [""])[0]
+        return hmac.compare_digest(supplied.encode("utf-8"), self.token.encode("utf-8"))
+
+    def _run(self, environ, start_response) -> List[bytes]:
+        """Run the request to completion, including rendering a streamed body."""
+        app_iter = self.wsgi_app(environ, start_response)
+        try:
+            return list(app_iter)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+    def _profile_on_demand(self, environ, start_response, output: str) -> Iterable[bytes]:
+        if not self.lock.acquire(timeout=30):
+            start_response("503 Service Unavailable", [("Content-Type", "text/plain")])
+            return [b"Another request is being profiled"]
+        try:
+            # The page's own status and headers are replaced by the profile's
+            with _Profile(self.profiler) as profile:
+                self._run(environ, lambda status, headers, exc_info=None: None)
+        finally:
+            self.lock.release()
+        body, content_type, extension = profile.render(output)
+        headers = [("Content-Type", content_type), ("Content-Length", str(len(body)))]
+        if extension == "prof":
+            headers.append(("Content-Disposition", "attachment; filename=request.prof"))
+        start_response("200 OK", headers)
+        return [body]
+
+    def _profile_sampled(self, environ, start_response) -> Iterable[bytes]:
+        if not self.lock.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+        start = time.monotonic()
+        try:
+            with _Profile(self.profiler) as profile:
+                body = self._run(environ, start_response)
+        finally:
+            self.lock.release()
+        elapsed_ms = (time.monotonic() - start) * 1000
+        try:
+            self._save(profile, environ, elapsed_ms)
+        except Exception as e:
+            logger.error(f"Error saving request profile: {e}")
+        return body
+
+    def _save(self, profile: _Profile, environ, elapsed_ms: float) -> None:
+        """Write a sampled profile and delete the oldest ones beyond max_files."""
+        data, _, extension = profile.render("html" if self.profiler == "pyinstrument" else "pstats")
+        path_label = environ.get("PATH_INFO", "/").strip("/").replace("/", "_") or "index"
+        filename = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{path_label[:60]}_{elapsed_ms:.0f}ms.{extension}"
+        with open(os.path.join(self.output_dir, filename), "wb") as f:
+            f.write(data)
+
+        files = sorted(
+            entry.path for entry in os.scandir(self.output_dir) if entry.is_file()
+        )
+        for old in files[:max(len(files) - self.max_files, 0)]:
+            os.remove(old)
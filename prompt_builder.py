@@ -0,0 +1,158 @@
+import re
+import html
+import logging
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Iterable
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+    logger.warning("tiktoken package not found. Prompt token counts will be approximate.")
+
+# Rough characters-per-token ratio used when tiktoken is unavailable
+APPROX_CHARS_PER_TOKEN = 4
+
+class _TextExtractor(HTMLParser):
+    """HTML parser that collects text content, keeping paragraph breaks."""
+
+    BLOCK_TAGS = {'p', 'br', 'div', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+def html_to_text(content: str) -> str:
+    """Convert an HTML fragment (such as a RAWG description) to plain text.
+
+    Args:
+        content: HTML or plain text
+
+    Returns:
+        Plain text with collapsed whitespace and paragraphs separated by blank lines
+    """
+    if not content:
+        return ""
+
+    parser = _TextExtractor()
+    try:
+        parser.feed(content)
+        parser.close()
+        text = ''.join(parser.parts)
+    except Exception:
+        # Fall back to a simple tag strip for malformed markup
+        text = html.unescape(re.sub('<[^<]+?>', ' ', content))
+
+    paragraphs = [re.sub(r'\s+', ' ', p).strip() for p in text.split('\n')]
+    return '\n\n'.join(p for p in paragraphs if p)
+
+def dedupe(items: Iterable[str]) -> List[str]:
+    """Remove empty and case-insensitive duplicate names, preserving order.
+
+    Args:
+        items: Names such as tags or platforms
+
+    Returns:
+        List of unique names
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        name = (item or '').strip()
+        key = name.lower()
+        if name and key not in seen:
+            seen.add(key)
+            unique.append(name)
+    return unique
+
+class TokenCounter:
+    """Counts and truncates text by model tokens."""
+
+    def __init__(self, model: str):
+        """Initialize the token counter.
+
+        Args:
+            model: The model whose tokenizer should be used
+        """
+        self.model = model
+        self.encoding = None
+
+        if tiktoken is not None:
+            # tiktoken downloads encodings on first use, which fails offline
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self.encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"Could not load tiktoken encoding for {model}, token counts will be approximate: {e}")
+
+    def count(self, text: str) -> int:
+        """Count the tokens in a piece of text.
+
+        Args:
+            text: The text to count
+
+        Returns:
+            Number of tokens
+        """
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return (len(text) + APPROX_CHARS_PER_TOKEN - 1) // APPROX_CHARS_PER_TOKEN
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Truncate text to at most max_tokens tokens, ending on a word boundary.
+
+        Args:
+            text: The text to truncate
+            max_tokens: Maximum number of tokens to keep
+
+        Returns:
+            The truncated text
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+
+        if self.encoding is not None:
+            truncated = self.encoding.decode(self.encoding.encode(text)[:max_tokens])
+        else:
+            truncated = text[:max_tokens * APPROX_CHARS_PER_TOKEN]
+
+        # Avoid ending in the middle of a word
+        if ' ' in truncated:
+            truncated = truncated.rsplit(' ', 1)[0]
+        return truncated.rstrip() + '...'
+
+def compact_game_data(game_data: Dict[str, Any], max_tags: int = 15) -> Dict[str, Any]:
+    """Prepare game data for prompting: plain-text description and unique names.
+
+    Args:
+        game_data: Information about the game
+        max_tags: Maximum number of tags to keep
+
+    Returns:
+        A copy of the game data with compacted fields
+    """
+    compacted = dict(game_data)
+    compacted['description'] = html_to_text(game_data.get('description', ''))
+    for field in ('developers', 'publishers', 'genres', 'platforms'):
+        compacted[field] = dedupe(game_data.get(field, []))
+    compacted['tags'] = dedupe(game_data.get('tags', []))[:max_tags]
+    return compacted
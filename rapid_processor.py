@@ -1,8 +1,10 @@
 import os
+import json
 import time
 import logging
 import concurrent.futures
 import threading
+from collections import deque
 from tqdm import tqdm
 from datetime import datetime
 
@@ -11,6 +13,16 @@ from logger import setup_logger
 from rawg_api import RawgAPI
 from openai_api import OpenAIAPI
 from excel_manager import ExcelManager
+from generation_cache import GenerationCache
+from model_router import ModelRouter
+from usage_tracker import UsageTracker
+from failure_registry import FailureRegistry
+from pipeline import Pipeline, Stage
+from scheduler import get_scheduler
+from latency import LatencyHistogram
+from memory import GameIdSet, peak_rss_bytes
+from metrics import REGISTRY
+from tracing import TRACER, NOOP_SPAN
 
 # Set up the logger
 logger = setup_logger()
@@ -18,12 +30,17 @@ logger = setup_logger()
 class RapidGameProcessor:
     """Specialized processor for rapidly generating many game wiki entries."""
     
-    def __init__(self, target_count=10000, time_limit_minutes=5):
+    def __init__(self, target_count=10000, time_limit_minutes=5, use_cache=True, excel_path=None,
+                 checkpoint_path=None, resume=False):
         """Initialize the rapid processor.
         
         Args:
             target_count: Target number of games to process
             time_limit_minutes: Time limit in minutes
+            use_cache: Whether to reuse previously generated wiki entries
+            excel_path: Excel file to write to (default: a new timestamped rapid_wiki file)
+            checkpoint_path: File the run state is checkpointed to (default: no checkpoints)
+            resume: Continue the run saved in checkpoint_path instead of starting a new one
         """
         logger.info(f"Initializing Rapid Game Processor (target: {target_count} games in {time_limit_minutes} minutes)")
         
@@ -32,20 +49,87 @@ class RapidGameProcessor:
         
         # Initialize configuration and components
         self.config = Config()
-        self.rawg_api = RawgAPI(self.config.RAWG_API_KEY)
-        self.openai_api = OpenAIAPI(self.config.OPENAI_API_KEY)
+        REGISTRY.configure(self.config.METRICS_DIR, self.config.METRICS_FLUSH_INTERVAL)
+        TRACER.configure(self.config.TRACE_EXPORTER, path=self.config.TRACE_FILE_PATH,
+                         max_bytes=self.config.TRACE_FILE_MAX_BYTES, endpoint=self.config.TRACE_OTLP_ENDPOINT)
+        self.rawg_api = RawgAPI(
+            self.config.RAWG_API_KEY,
+            request_timeout=self.config.RAWG_REQUEST_TIMEOUT,
+            scheduler=get_scheduler(
+                "rawg", self.config.RAWG_MAX_CONCURRENCY, self.config.INTERACTIVE_RESERVED_SLOTS,
+                initial=self.config.RAWG_INITIAL_CONCURRENCY
+            )
+        )
+        self.generation_cache = GenerationCache(
+            self.config.GENERATION_CACHE_PATH,
+            max_bytes=self.config.GENERATION_CACHE_MAX_BYTES,
+            enabled=use_cache and self.config.GENERATION_CACHE_ENABLED
+        )
+        self.model_router = ModelRouter(
+            self.config.OPENAI_MODEL_TIERS,
+            latency_threshold=self.config.MODEL_LATENCY_THRESHOLD,
+            error_threshold=self.config.MODEL_ERROR_THRESHOLD,
+            cooldown=self.config.MODEL_COOLDOWN
+        )
+        self.openai_api = OpenAIAPI(
+            self.config.OPENAI_API_KEY,
+            model=self.config.OPENAI_MODEL,
+            base_url=self.config.OPENAI_BASE_URL,
+            cache=self.generation_cache,
+            router=self.model_router,
+            prompt_token_budget=self.config.PROMPT_TOKEN_BUDGET,
+            rapid_prompt_token_budget=self.config.RAPID_PROMPT_TOKEN_BUDGET,
+            request_timeout=self.config.OPENAI_REQUEST_TIMEOUT,
+            hedging_enabled=self.config.HEDGE_REQUESTS,
+            scheduler=get_scheduler(
+                "openai", self.config.OPENAI_MAX_CONCURRENCY, self.config.INTERACTIVE_RESERVED_SLOTS,
+                initial=self.config.OPENAI_INITIAL_CONCURRENCY
+            ),
+            batch_size=self.config.GENERATION_BATCH_SIZE,
+            max_concurrent_calls=self.config.OPENAI_MAX_CONCURRENCY * 2
+        )
         self.openai_api.set_rapid_mode(True)
         
-        # Create a separate Excel file for rapid processing
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.excel_path = str(self.config.DATA_DIR / f"rapid_wiki_{timestamp}.xlsx")
+        # A resumed run keeps writing to the Excel file of the interrupted run
+        self.checkpoint_path = checkpoint_path
+        checkpoint = self._load_checkpoint() if resume else None
+        if checkpoint is not None:
+            excel_path = checkpoint['excel_path']
+        
+        # Create a separate Excel file for rapid processing unless one is given
+        if excel_path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            excel_path = str(self.config.DATA_DIR / f"rapid_wiki_{timestamp}.xlsx")
+        self.excel_path = excel_path
         self.excel_manager = ExcelManager(self.excel_path)
+        self.usage_tracker = UsageTracker(self.config.USAGE_METRICS_PATH)
+        self.run_id = self.usage_tracker.new_run_id("rapid")
+        self.failure_registry = FailureRegistry(
+            self.config.FAILURE_REGISTRY_PATH,
+            max_attempts=self.config.FAILURE_MAX_ATTEMPTS,
+            base_backoff=self.config.FAILURE_BACKOFF_SECONDS,
+            max_backoff=self.config.FAILURE_MAX_BACKOFF_SECONDS
+        )
         
         # Set processing parameters
         self.target_count = target_count
         self.time_limit_seconds = time_limit_minutes * 60
-        self.processed_games = set()
-        self.processing_queue = []
+        # Only IDs and names are kept for queued and seen games, so long runs stay small
+        self.processed_games = GameIdSet()
+        self.processing_queue = deque()
+        # Games taken from the queue that are not stored or given up yet
+        self.in_flight = {}
+        self.next_page = 1
+        self.listing_exhausted = False
+        self.listing_pages = 5
+        self.listing_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.listing_pages, thread_name_prefix="rapid-listing"
+        )
+        self.game_seconds = LatencyHistogram()
+        self.end_time = None
+        self.admission_closed = False
+        self.generation_attempts = {}
+        self.pipeline = None
         self.games_processed = 0
         self.start_time = None
         self.lock = threading.Lock()
@@ -54,7 +138,81 @@ class RapidGameProcessor:
         self.success_count = 0
         self.error_count = 0
         
+        if checkpoint is not None:
+            self._restore_checkpoint(checkpoint)
+        
         logger.info("Rapid Game Processor initialized")
+    
+    def _load_checkpoint(self):
+        """Read the checkpoint of an interrupted run.
+        
+        Returns:
+            The checkpoint as a dictionary, or None if there is none to resume
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            logger.warning(f"No checkpoint at {self.checkpoint_path}, starting a new run")
+            return None
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading checkpoint {self.checkpoint_path}: {e}")
+            return None
+    
+    def _restore_checkpoint(self, checkpoint):
+        """Restore the queue, listing cursor and completed games of an interrupted run.
+        
+        Args:
+            checkpoint: Checkpoint as written by _write_checkpoint
+        """
+        self.next_page = checkpoint['next_page']
+        self.listing_exhausted = checkpoint['listing_exhausted']
+        self.processing_queue = deque((game_id, name) for game_id, name in checkpoint['queue'])
+        # Games stored after the last checkpoint are already in the Excel file
+        self.processed_games = GameIdSet.from_base64(checkpoint['completed'])
+        self.processed_games.update(self.excel_manager.get_processed_game_ids())
+        self.games_processed = checkpoint['games_processed']
+        self.success_count = checkpoint['success_count']
+        self.error_count = checkpoint['error_count']
+        logger.info(f"Resuming run from {self.checkpoint_path}: {len(self.processed_games)} games done, "
+                    f"{len(self.processing_queue)} queued, listing at page {self.next_page}")
+    
+    def _write_checkpoint(self):
+        """Atomically save the run state so an interrupted run can be resumed."""
+        if not self.checkpoint_path:
+            return
+        
+        with self.lock:
+            # Games in flight go first so a resumed run finishes them before new ones
+            queue = list(self.in_flight.items())
+            queue.extend(self.processing_queue)
+            checkpoint = {
+                'excel_path': self.excel_path,
+                'next_page': self.next_page,
+                'listing_exhausted': self.listing_exhausted,
+                'queue': queue,
+                'completed': self.processed_games.to_base64(),
+                'games_processed': self.games_processed,
+                'success_count': self.success_count,
+                'error_count': self.error_count,
+                'updated_at': time.time()
+            }
+        
+        temp_path = f"{self.checkpoint_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # The rename replaces the previous checkpoint in one step, so a crash never leaves half a file
+            os.replace(temp_path, self.checkpoint_path)
+        except OSError as e:
+            logger.error(f"Error writing checkpoint {self.checkpoint_path}: {e}")
+    
+    def _finish_game(self, game_id):
+        """Drop a game from the in-flight set once it is stored or given up."""
+        with self.lock:
+            self.in_flight.pop(game_id, None)
         
     def _load_game_batch(self, page_size=40, page_count=5):
         """Load a batch of games to process.
@@ -63,56 +221,124 @@ class RapidGameProcessor:
             page_size: Number of games to fetch per page
             page_count: Number of pages to fetch
         """
-        logger.info(f"Loading game batch (page_size={page_size}, page_count={page_count})")
+        first_page = self.next_page
+        logger.info(f"Loading game batch (pages {first_page}-{first_page + page_count - 1}, page_size={page_size})")
         games = []
         
-        # Fetch multiple pages in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=page_count) as executor:
-            futures = []
-            for page in range(1, page_count + 1):
-                futures.append(executor.submit(
-                    self.rawg_api.get_indie_games, 
-                    page=page, 
-                    page_size=page_size, 
-                    min_reviews=1
-                ))
-            
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    page_games = future.result()
-                    if page_games:
-                        games.extend(page_games)
-                except Exception as e:
-                    logger.error(f"Error fetching game page: {e}")
+        # Fetch multiple pages in parallel on the long-lived listing pool
+        futures = [
+            self.listing_executor.submit(
+                self.rawg_api.get_indie_games,
+                page=page,
+                page_size=page_size,
+                min_reviews=1
+            )
+            for page in range(first_page, first_page + page_count)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                page_games = future.result()
+                if page_games:
+                    games.extend(page_games)
+            except Exception as e:
+                logger.error(f"Error fetching game page: {e}")
         
-        # Filter out already processed games
-        new_games = [g for g in games if g['id'] not in self.processed_games]
+        if not games:
+            self.listing_exhausted = True
+        
+        # Filter out already processed games and games that failed recently, keeping
+        # only the ID and name of each listing entry
+        new_games = [
+            (g['id'], g.get('name', '')) for g in games
+            if g['id'] not in self.processed_games and not self.failure_registry.is_blocked(g['id'])
+        ]
         
         logger.info(f"Loaded {len(new_games)} new games for processing")
         return new_games
     
-    def _process_single_game(self, game):
-        """Process a single game.
+    def _list_games(self):
+        """Yield games to process, loading further listing pages as the queue runs low.
+        
+        Pages whose games are all processed already are skipped over. Stops
+        when the listing is exhausted or once the remaining time can no longer
+        fit a median game, so the pipeline drains the games already admitted
+        instead of being cut off.
+        """
+        while self._can_admit():
+            if len(self.processing_queue) < 100 and not self.listing_exhausted:
+                games = self._load_game_batch(page_size=self.config.PAGE_SIZE, page_count=self.listing_pages)
+                # Advance the cursor together with the queue so a checkpoint never skips pages
+                with self.lock:
+                    self.next_page += self.listing_pages
+                    self.processing_queue.extend(games)
+            with self.lock:
+                if not self.processing_queue:
+                    if self.listing_exhausted:
+                        return
+                    # Every game on the pages just loaded is done or blocked, so load the next ones
+                    continue
+                game_id, name = self.processing_queue.popleft()
+                self.in_flight[game_id] = name
+            yield {'id': game_id, 'name': name}
+    
+    def _can_admit(self):
+        """Check whether a new game can still finish within the time limit.
+        
+        Returns:
+            True while the remaining time fits the median time a game takes
+            from detail fetch to save (always True before any game finished)
+        """
+        if self.admission_closed:
+            return False
+        if self.end_time is None:
+            return True
+        
+        remaining = self.end_time - time.time()
+        median = self.game_seconds.quantile(0.5) or 0.0
+        if remaining > median:
+            return True
+        
+        self.admission_closed = True
+        logger.info(f"Not admitting new games: {remaining:.1f}s left, median game takes {median:.1f}s")
+        return False
+    
+    def _fetch_game(self, game):
+        """Fetch details for a game and prepare its wiki input.
         
         Args:
             game: Game data from RAWG API
             
         Returns:
-            True if successful, False otherwise
+            Dictionary with the game ID, name, details and wiki input, or None
+            if the game was skipped or could not be fetched
         """
         game_id = game['id']
         game_name = game.get('name', 'Unknown Game')
+        trace = NOOP_SPAN
         
         try:
             # Skip if already processed
             if game_id in self.processed_games:
-                return False
+                self._finish_game(game_id)
+                return None
+            # Games that can no longer finish in time stay in flight for a resumed run
+            if not self._can_admit():
+                return None
                 
+            # The game span covers every stage and ends once the game is stored or given up
+            trace = TRACER.span("game", game_id=game_id, game=game_name)
+            
             # Get game details
-            game_details = self.rawg_api.get_game_details(game_id)
+            fetch_start = time.monotonic()
+            with TRACER.span("fetch", parent=trace):
+                game_details = self.rawg_api.get_game_details(game_id)
+            rawg_seconds = time.monotonic() - fetch_start
             if not game_details:
                 logger.warning(f"Could not fetch details for game: {game_name}")
-                return False
+                self.failure_registry.record_failure(game_id, game_name, "details", "Could not fetch game details")
+                self._finish_game(game_id)
+                trace.end("error")
+                return None
             
             # Prepare wiki input
             wiki_input = {
@@ -127,16 +353,124 @@ class RapidGameProcessor:
                 'rating': game_details.get('rating', 0),
             }
             
-            # Generate wiki content
-            wiki_entry, references = self.openai_api.generate_wiki_entry(wiki_input)
+            return {
+                'game_id': game_id,
+                'game_name': game_name,
+                'details': game_details,
+                'wiki_input': wiki_input,
+                'rawg_seconds': rawg_seconds,
+                'admitted_at': fetch_start,
+                'trace': trace
+            }
+            
+        except Exception as e:
+            logger.error(f"Error fetching game {game_name}: {e}")
+            self.failure_registry.record_failure(game_id, game_name, "details", str(e))
+            self._finish_game(game_id)
+            trace.end("error")
+            with self.lock:
+                self.error_count += 1
+            return None
+    
+    def _generate_group(self, items):
+        """Generate wiki entries for a group of fetched games.
+        
+        Args:
+            items: Fetched games as returned by _fetch_game
+            
+        Returns:
+            The items that were generated, with wiki_entry, references and
+            usage added. Failed items are requeued instead.
+        """
+        if not items:
+            return []
+        
+        usages = [{} for _ in items]
+        # Every game gets a generate span; the shared model calls are traced under the first game's
+        spans = [TRACER.span("generate", parent=item['trace'], batch_size=len(items)) for item in items]
+        try:
+            with spans[0]:
+                entries = self.openai_api.generate_wiki_entries([item['wiki_input'] for item in items], usages=usages)
+        except Exception as e:
+            logger.error(f"Error generating wiki entries for {len(items)} games: {e}")
+            entries = [None] * len(items)
+        
+        generated = []
+        for item, entry, usage, span in zip(items, entries, usages, spans):
+            span.end("error" if entry is None else None)
+            if entry is None:
+                self._requeue(item)
+                continue
+            item['wiki_entry'], item['references'] = entry
+            item['usage'] = usage
+            generated.append(item)
+        return generated
+    
+    def _requeue(self, item):
+        """Queue a fetched game for another generation attempt instead of saving it.
+        
+        Args:
+            item: Fetched game as returned by _fetch_game
+        """
+        with self.lock:
+            attempts = self.generation_attempts.get(item['game_id'], 0) + 1
+            self.generation_attempts[item['game_id']] = attempts
+            if attempts < self.config.MAX_GENERATION_ATTEMPTS and self.pipeline is not None:
+                self.pipeline.stage("generate").requeue(item)
+                logger.info(f"Requeued {item['game_name']} after failed generation (attempt {attempts})")
+            else:
+                self.error_count += 1
+                logger.warning(f"Giving up on {item['game_name']} after {attempts} failed generations")
+        if attempts >= self.config.MAX_GENERATION_ATTEMPTS:
+            self.failure_registry.record_failure(
+                item['game_id'], item['game_name'], "generate", f"Generation failed {attempts} times"
+            )
+            self._finish_game(item['game_id'])
+            item['trace'].end("error")
+    
+    def _store_item(self, item):
+        """Save a generated game and record its usage.
+        
+        Args:
+            item: Generated game as returned by _generate_group
+            
+        Returns:
+            True if successful, None otherwise
+        """
+        with TRACER.span("store", parent=item['trace']):
+            saved = self._save_game(item, item['wiki_entry'], item['references'])
+        if not saved:
+            item['trace'].end("error")
+            return None
+        self.usage_tracker.record(self.run_id, item['game_id'], item['game_name'], item['usage'], item['rawg_seconds'])
+        self.game_seconds.observe(time.monotonic() - item['admitted_at'])
+        item['trace'].end()
+        
+        if self.games_processed >= self.target_count and self.pipeline is not None:
+            self.pipeline.stop()
+        return True
+    
+    def _save_game(self, item, wiki_entry, references):
+        """Save a generated wiki entry to Excel.
+        
+        Args:
+            item: Fetched game as returned by _fetch_game
+            wiki_entry: Generated wiki entry
+            references: Generated references
             
+        Returns:
+            True if successful, False otherwise
+        """
+        game_details = item['details']
+        
+        try:
             # Format developer names
             developers = game_details.get('developers', [])
             dev_names = [dev.get('name', '') for dev in developers if dev and isinstance(dev, dict)]
             
             # Prepare Excel data
             excel_data = {
-                'Game ID': game_id,
+                'Game ID': item['game_id'],
                 'Name': game_details.get('name', ''),
                 'Studio': ', '.join(dev_names),
                 'Release Date': game_details.get('released', ''),
@@ -150,62 +484,94 @@ class RapidGameProcessor:
             
             # Save to Excel
             with self.lock:
-                self.excel_manager.add_game_entry(excel_data)
-                self.processed_games.add(game_id)
+                if not self.excel_manager.add_game_entry(excel_data):
+                    self.error_count += 1
+                    return False
+                self.processed_games.add(item['game_id'])
+                self.in_flight.pop(item['game_id'], None)
                 self.success_count += 1
                 self.games_processed += 1
+            self.failure_registry.record_success(item['game_id'])
             
             return True
             
         except Exception as e:
-            logger.error(f"Error processing game {game_name}: {e}")
+            logger.error(f"Error saving game {item['game_name']}: {e}")
             with self.lock:
                 self.error_count += 1
             return False
     
+    def _process_single_game(self, game):
+        """Process a single game outside the pipeline.
+        
+        Args:
+            game: Game data from RAWG API
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        item = self._fetch_game(game)
+        if item is None:
+            return False
+        generated = self._generate_group([item])
+        return bool(generated) and self._store_item(generated[0]) is True
+    
     def run(self):
         """Run the rapid processing job."""
         self.start_time = time.time()
-        current_time = self.start_time
-        end_time = self.start_time + self.time_limit_seconds
+        self.end_time = self.start_time + self.time_limit_seconds
         
         logger.info(f"Starting rapid processing (target: {self.target_count} games in {self.time_limit_seconds} seconds)")
         
         # Initialize progress bar
         pbar = tqdm(total=self.target_count, desc="Processing games")
         
-        # Processing loop
-        while (current_time < end_time and self.games_processed < self.target_count):
-            # Load more games if needed
-            if len(self.processing_queue) < 100:
-                new_games = self._load_game_batch(
-                    page_size=self.config.PAGE_SIZE,
-                    page_count=5
-                )
-                self.processing_queue.extend(new_games)
-            
-            # Process games in parallel batches
-            batch_size = min(self.config.BATCH_SIZE, len(self.processing_queue))
-            if batch_size > 0:
-                batch = self.processing_queue[:batch_size]
-                self.processing_queue = self.processing_queue[batch_size:]
+        # Listing, detail fetching, generation and saving run as overlapping stages. Stages
+        # get enough workers for the maximum concurrency; the adaptive limits of the RAWG
+        # and OpenAI schedulers decide how many calls are actually in flight.
+        self.pipeline = Pipeline(
+            "rapid",
+            self._list_games(),
+            [
+                Stage("details", self._fetch_game, workers=self.config.RAWG_MAX_CONCURRENCY,
+                      max_queue=self.config.PIPELINE_QUEUE_SIZE),
+                Stage("generate", self._generate_group, workers=self.config.OPENAI_MAX_CONCURRENCY,
+                      max_queue=self.config.PIPELINE_QUEUE_SIZE, batch_size=self.config.GENERATION_BATCH_SIZE),
+                # A single writer keeps workbook writes serialized
+                Stage("store", self._store_item, workers=1, max_queue=self.config.PIPELINE_QUEUE_SIZE)
+            ],
+            monitor_interval=self.config.PIPELINE_MONITOR_INTERVAL
+        )
+        self.pipeline.start()
+        last_checkpoint = time.time()
+        
+        try:
+            while self.pipeline.is_running():
+                # Admission control normally drains the pipeline before the limit;
+                # stopping here only cuts off games that overrun it
+                if time.time() >= self.end_time or self.games_processed >= self.target_count:
+                    self.pipeline.stop()
                 
-                # Process batch in parallel
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.config.PARALLEL_REQUESTS) as executor:
-                    list(executor.map(self._process_single_game, batch))
-            
-            # Update progress bar
-            pbar.n = self.games_processed
-            pbar.refresh()
-            
-            # Check time
-            current_time = time.time()
-            
-            # Small delay to prevent CPU overuse
-            time.sleep(0.01)
+                # Update progress bar
+                pbar.n = self.games_processed
+                pbar.refresh()
+                
+                if time.time() - last_checkpoint >= self.config.RAPID_CHECKPOINT_INTERVAL:
+                    self._write_checkpoint()
+                    last_checkpoint = time.time()
+                
+                self.pipeline.join(0.5)
+        finally:
+            # Also reached on Ctrl-C or SIGTERM, so the next run can resume from here
+            if self.pipeline.is_running():
+                self.pipeline.stop()
+            self._write_checkpoint()
         
         # Close progress bar
+        pbar.n = self.games_processed
         pbar.close()
+        self.listing_executor.shutdown(wait=False)
+        self.pipeline.log_stats()
         
         # Calculate statistics
         elapsed_time = time.time() - self.start_time
@@ -217,7 +583,26 @@ class RapidGameProcessor:
         logger.info(f"- Errors: {self.error_count}")
         logger.info(f"- Time elapsed: {elapsed_time:.2f} seconds")
         logger.info(f"- Processing rate: {games_per_minute:.2f} games per minute")
+        logger.info(f"- Median time per game: {self.game_seconds.quantile(0.5) or 0:.2f} seconds")
+        peak_rss = peak_rss_bytes()
+        if peak_rss is not None:
+            logger.info(f"- Peak memory (RSS): {peak_rss / (1024 * 1024):.1f} MB")
         logger.info(f"- Results saved to: {self.excel_path}")
+        self.generation_cache.log_stats()
+        self.failure_registry.log_stats()
+        usage_summary = self.usage_tracker.log_summary(self.run_id)
+        for model, stats in self.model_router.get_stats().items():
+            logger.info(f"- Model tier {model}: {stats['state']}, error rate {stats['error_rate'] * 100:.1f}%")
+        for key, stats in self.openai_api.latency_tracker.get_stats().items():
+            logger.info(f"- Model latency {key}: {stats['count']} calls, p50 {stats['p50'] or 0:.2f}s, p95 {stats['p95'] or 0:.2f}s")
+        concurrency = {
+            "rawg": self.rawg_api.scheduler.get_stats(),
+            "openai": self.openai_api.scheduler.get_stats()
+        }
+        for name, stats in concurrency.items():
+            controller = stats['controller'] or {}
+            logger.info(f"- {name} concurrency limit: {stats['limit']} of {stats['capacity']} "
+                        f"({controller.get('increases', 0)} increases, {controller.get('decreases', 0)} cuts)")
         
         return {
             "games_processed": self.games_processed,
@@ -225,6 +610,11 @@ class RapidGameProcessor:
             "error_count": self.error_count,
             "elapsed_time": elapsed_time,
             "games_per_minute": games_per_minute,
+            "cache_hit_rate": self.generation_cache.hit_rate(),
+            "usage": usage_summary,
+            "pipeline": self.pipeline.get_stats(),
+            "concurrency": {name: stats['limit'] for name, stats in concurrency.items()},
+            "peak_rss_bytes": peak_rss,
             "excel_path": self.excel_path
         }
 
@@ -234,10 +624,23 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Rapid Game Wiki Generator")
     parser.add_argument("--count", type=int, default=10000, help="Target number of games to process")
     parser.add_argument("--time", type=int, default=5, help="Time limit in minutes")
+    parser.add_argument("--no-cache", action="store_true", help="Regenerate entries instead of reusing cached ones")
+    parser.add_argument("--resume", action="store_true", help="Continue the last interrupted run from its checkpoint")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: RAPID_CHECKPOINT_PATH)")
     args = parser.parse_args()
     
+    # Treat SIGTERM (deploys, process managers) like Ctrl-C so a final checkpoint is written
+    import signal
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    
     # Run the processor
-    processor = RapidGameProcessor(target_count=args.count, time_limit_minutes=args.time)
+    processor = RapidGameProcessor(
+        target_count=args.count,
+        time_limit_minutes=args.time,
+        use_cache=not args.no_cache,
+        checkpoint_path=args.checkpoint or Config().RAPID_CHECKPOINT_PATH,
+        resume=args.resume
+    )
     results = processor.run()
     
     # Print summary
@@ -246,4 +649,8 @@ if __name__ == "__main__":
     print(f"Success rate: {results['success_count']}/{results['games_processed']} ({results['success_count']/max(1, results['games_processed'])*100:.1f}%)")
     print(f"Time elapsed: {results['elapsed_time']:.2f} seconds")
     print(f"Processing rate: {results['games_per_minute']:.2f} games per minute")
+    print(f"Generation cache hit rate: {results['cache_hit_rate']*100:.1f}%")
+    if results['peak_rss_bytes'] is not None:
+        print(f"Peak memory: {results['peak_rss_bytes'] / (1024 * 1024):.1f} MB")
+    print(f"Estimated cost: ${results['usage']['cost_usd']:.4f} (${results['usage']['cost_per_game_usd']:.5f} per game)")
     print(f"Results saved to: {results['excel_path']}") 
\ No newline at end of file
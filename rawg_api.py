@@ -1,20 +1,34 @@
+import re
 import time
 import requests
 import logging
 from typing import Dict, List, Optional, Any
 
+from scheduler import PriorityScheduler, get_scheduler
+from concurrency import AIMDController
+from metrics import REGISTRY
+from tracing import TRACER
+
 logger = logging.getLogger(__name__)
 
+RAWG_REQUEST_SECONDS = REGISTRY.histogram(
+    "rawg_request_seconds", "RAWG API request latency by endpoint and HTTP status", ["endpoint", "status"]
+)
+
 class RawgAPI:
     """API client for RAWG.io video game database."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, scheduler: Optional[PriorityScheduler] = None, request_timeout: float = 30.0):
         """Initialize the RAWG API client.
         
         Args:
             api_key: The API key for RAWG.io
+            scheduler: Priority scheduler limiting concurrent requests (default: the shared RAWG scheduler)
+            request_timeout: Seconds before a request is abandoned
         """
         self.api_key = api_key
+        self.request_timeout = request_timeout
+        self.scheduler = scheduler or get_scheduler("rawg")
         self.base_url = "https://api.rawg.io/api"
         self.session = requests.Session()
         self.rate_limit_remaining = 1000  # Default high value, will be updated with API responses
@@ -42,6 +56,7 @@ class RawgAPI:
             logger.warning(f"Rate limit approaching, sleeping for {sleep_time} seconds")
             time.sleep(sleep_time)
     
+    @TRACER.traced("rawg.request")
     def _make_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a request to the RAWG API.
         
@@ -59,10 +74,35 @@ class RawgAPI:
         params['key'] = self.api_key
         
         url = f"{self.base_url}/{endpoint}"
+        # Game IDs in the path would give every game its own series
+        endpoint_label = re.sub(r'/\d+', '/{id}', endpoint)
+        span = TRACER.current()
+        span.set("endpoint", endpoint_label)
         
         try:
             logger.debug(f"Making request to {url} with params {params}")
-            response = self.session.get(url, params=params)
+            start = time.monotonic()
+            try:
+                with self.scheduler.slot():
+                    response = self.session.get(url, params=params, timeout=self.request_timeout)
+            except requests.exceptions.Timeout:
+                self.scheduler.record(AIMDController.OVERLOAD)
+                RAWG_REQUEST_SECONDS.observe(time.monotonic() - start, (endpoint_label, "timeout"))
+                raise
+            except requests.exceptions.RequestException:
+                self.scheduler.record(AIMDController.ERROR)
+                RAWG_REQUEST_SECONDS.observe(time.monotonic() - start, (endpoint_label, "error"))
+                raise
+            RAWG_REQUEST_SECONDS.observe(time.monotonic() - start, (endpoint_label, str(response.status_code)))
+            span.set("status", response.status_code)
+            
+            # Rate limits and server errors shrink the concurrency limit; healthy responses grow it
+            if response.status_code == 429:
+                self.scheduler.record(AIMDController.OVERLOAD)
+            elif response.status_code >= 500:
+                self.scheduler.record(AIMDController.ERROR)
+            else:
+                self.scheduler.record(AIMDController.OK, time.monotonic() - start)
             
             # Handle rate limiting
             self._handle_rate_limit(response)
@@ -121,6 +161,7 @@ class RawgAPI:
         
         return []
     
+    @TRACER.traced("rawg.game_details")
     def get_game_details(self, game_id: int) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific game.
         
@@ -143,9 +184,6 @@ class RawgAPI:
         else:
             game_data['developers'] = []
             
-        # Sleep briefly to prevent hitting rate limits
-        time.sleep(0.5)
-        
         # Get game screenshots
         screenshots = self._make_request(f'games/{game_id}/screenshots')
         if screenshots and 'results' in screenshots:
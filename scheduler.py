@@ -0,0 +1,231 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from latency import LatencyHistogram
+from concurrency import AIMDController
+
+logger = logging.getLogger(__name__)
+
+# Request classes, highest priority first
+INTERACTIVE = "interactive"
+REFRESH = "refresh"
+BULK = "bulk"
+PRIORITIES = {INTERACTIVE: 0, REFRESH: 1, BULK: 2}
+
+# Work that does not say otherwise is bulk work
+_current_priority = contextvars.ContextVar("request_priority", default=BULK)
+
+def current_priority() -> str:
+    """Get the request class of the current context."""
+    return _current_priority.get()
+
+def set_priority(name: str) -> contextvars.Token:
+    """Set the request class of the current context.
+
+    Args:
+        name: INTERACTIVE, REFRESH or BULK
+
+    Returns:
+        Token for reset_priority
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown request priority: {name}")
+    return _current_priority.set(name)
+
+def reset_priority(token: contextvars.Token) -> None:
+    """Restore the request class that was set before set_priority.
+
+    Args:
+        token: Token returned by set_priority
+    """
+    _current_priority.reset(token)
+
+@contextmanager
+def priority(name: str):
+    """Run the enclosed calls under a request class.
+
+    Args:
+        name: INTERACTIVE, REFRESH or BULK
+    """
+    token = set_priority(name)
+    try:
+        yield
+    finally:
+        reset_priority(token)
+
+class PriorityScheduler:
+    """Hands out a fixed number of concurrent call slots in priority order.
+
+    Waiting callers are served strictly by class (interactive, then refresh,
+    then bulk) and in arrival order within a class. Refresh and bulk calls
+    can never hold the slots reserved for interactive calls, so an
+    interactive request only waits for other interactive requests even while
+    a bulk job keeps every other slot busy.
+
+    With a controller, the number of slots follows the controller's limit,
+    which callers feed through record(). It never drops below the reserved
+    slots plus one: when the controller cuts further, refresh and bulk
+    calls are held to one slot and interactive calls keep their
+    reservation.
+    """
+
+    def __init__(self, name: str, capacity: int, reserved_interactive: int = 0,
+                 controller: Optional[AIMDController] = None):
+        """Initialize the scheduler.
+
+        Args:
+            name: Name used in logs and statistics
+            capacity: Maximum number of calls in flight
+            reserved_interactive: Slots only interactive calls may use
+            controller: Optional adaptive controller setting the number of slots up to capacity
+        """
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.reserved_interactive = min(max(0, reserved_interactive), self.capacity - 1)
+        self.controller = controller
+        self.in_use = 0
+        self.in_use_by_class = {name: 0 for name in PRIORITIES}
+        self.condition = threading.Condition()
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.wait_seconds = {name: LatencyHistogram() for name in PRIORITIES}
+
+    def limit(self) -> int:
+        """Get the current number of slots."""
+        if self.controller is None:
+            return self.capacity
+        # However far the controller cuts, the reserved slots and one more stay available
+        return min(max(self.controller.current_limit(), self.reserved_interactive + 1), self.capacity)
+
+    def _limit(self, name: str) -> int:
+        """Get how many slots a request class may occupy."""
+        total = self.limit()
+        if name == INTERACTIVE:
+            return total
+        return total - self.reserved_interactive
+
+    def record(self, outcome: str, latency: Optional[float] = None) -> None:
+        """Report the outcome of a call to the controller.
+
+        Args:
+            outcome: AIMDController.OK, OVERLOAD or ERROR
+            latency: Seconds the call took, for successful calls
+        """
+        if self.controller is None:
+            return
+        previous = self.limit()
+        self.controller.record(outcome, latency)
+        if self.limit() > previous:
+            with self.condition:
+                self.condition.notify_all()
+
+    def acquire(self, name: Optional[str] = None) -> str:
+        """Wait for a slot.
+
+        Args:
+            name: Request class (default: the class of the current context)
+
+        Returns:
+            The request class the slot was granted to, for release
+        """
+        name = name or current_priority()
+        start = time.monotonic()
+        entry = (PRIORITIES[name], next(self.sequence))
+
+        with self.condition:
+            heapq.heappush(self.waiters, entry)
+            # Only the best waiter may take a slot; limits never grow for lower classes,
+            # so if it cannot proceed nobody behind it can either
+            while self.waiters[0] != entry or self.in_use >= self._limit(name):
+                self.condition.wait()
+            heapq.heappop(self.waiters)
+            self.in_use += 1
+            self.in_use_by_class[name] += 1
+            # The next waiter may be able to proceed as well
+            self.condition.notify_all()
+
+        self.wait_seconds[name].observe(time.monotonic() - start)
+        return name
+
+    def release(self, name: str) -> None:
+        """Return a slot.
+
+        Args:
+            name: The request class returned by acquire
+        """
+        with self.condition:
+            self.in_use -= 1
+            self.in_use_by_class[name] -= 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, name: Optional[str] = None):
+        """Hold a slot for the enclosed call.
+
+        Args:
+            name: Request class (default: the class of the current context)
+        """
+        granted = self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release(granted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get slot usage and per-class wait times.
+
+        Returns:
+            Dictionary with capacity, slots in use, queued callers and wait times per class
+        """
+        with self.condition:
+            in_use = dict(self.in_use_by_class)
+            waiting = {name: 0 for name in PRIORITIES}
+            ranks = {rank: name for name, rank in PRIORITIES.items()}
+            for rank, _ in self.waiters:
+                waiting[ranks[rank]] += 1
+
+        return {
+            "capacity": self.capacity,
+            "limit": self.limit(),
+            "controller": self.controller.get_stats() if self.controller else None,
+            "reserved_interactive": self.reserved_interactive,
+            "in_use": in_use,
+            "waiting": waiting,
+            "wait_seconds": {name: histogram.snapshot() for name, histogram in self.wait_seconds.items()}
+        }
+
+_schedulers: Dict[str, PriorityScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(name: str, capacity: int = 32, reserved_interactive: int = 4,
+                  initial: Optional[int] = None) -> PriorityScheduler:
+    """Get the process-wide scheduler for an API, creating it on first use.
+
+    Every client of the same API in a process shares one scheduler, so jobs
+    running side by side compete for the same slots. The number of slots
+    adapts between one more than
+    the reservation and capacity with an AIMDController.
+
+    Args:
+        name: API name, such as "rawg" or "openai"
+        capacity: Maximum calls in flight, used when the scheduler is created
+        reserved_interactive: Slots reserved for interactive calls, used when the scheduler is created
+        initial: Starting number of slots (default: a quarter of capacity)
+
+    Returns:
+        The scheduler
+    """
+    with _schedulers_lock:
+        if name not in _schedulers:
+            initial = initial or max(1, capacity // 4)
+            controller = AIMDController(name, initial, max_limit=capacity)
+            _schedulers[name] = PriorityScheduler(name, capacity, reserved_interactive, controller)
+            logger.info(f"Scheduler {name}: {_schedulers[name].limit()} of up to {capacity} slots, "
+                        f"{reserved_interactive} reserved for interactive calls")
+        return _schedulers[name]
@@ -0,0 +1,173 @@
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class Services:
+    """Process-wide clients and stores, created on first use.
+
+    The web app, the generator and the job runner share one instance of
+    each, so importing several entry points builds nothing twice and a
+    client that a request never needs is never built. Only fork-safe state
+    is kept across a fork: API clients hold connection pools and the SQLite
+    stores hold open connections, so a forked child (a gunicorn worker with
+    preload_app) creates its own on first use. The configuration and the
+    library, with its mapped snapshot, are inherited.
+    """
+
+    # Services a forked child keeps from its parent
+    FORK_SAFE = ("config", "excel_manager")
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        # Reentrant because factories use other services
+        self.lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self.lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._instances[name] = factory()
+            return instance
+
+    def override(self, name: str, instance: Any) -> None:
+        """Replace a service, e.g. with a stub in benchmarks.
+
+        Args:
+            name: Service name, such as "rawg_api"
+            instance: The replacement
+        """
+        with self.lock:
+            self._instances[name] = instance
+
+    @property
+    def config(self):
+        from config import Config
+        return self._get("config", Config)
+
+    @property
+    def rawg_api(self):
+        def create():
+            from rawg_api import RawgAPI
+            from scheduler import get_scheduler
+            config = self.config
+            return RawgAPI(
+                config.RAWG_API_KEY,
+                request_timeout=config.RAWG_REQUEST_TIMEOUT,
+                scheduler=get_scheduler(
+                    "rawg", config.RAWG_MAX_CONCURRENCY, config.INTERACTIVE_RESERVED_SLOTS,
+                    initial=config.RAWG_INITIAL_CONCURRENCY
+                )
+            )
+        return self._get("rawg_api", create)
+
+    @property
+    def generation_cache(self):
+        def create():
+            from generation_cache import GenerationCache
+            config = self.config
+            return GenerationCache(
+                config.GENERATION_CACHE_PATH,
+                max_bytes=config.GENERATION_CACHE_MAX_BYTES,
+                enabled=config.GENERATION_CACHE_ENABLED
+            )
+        return self._get("generation_cache", create)
+
+    @property
+    def model_router(self):
+        def create():
+            from model_router import ModelRouter
+            config = self.config
+            return ModelRouter(
+                config.OPENAI_MODEL_TIERS,
+                latency_threshold=config.MODEL_LATENCY_THRESHOLD,
+                error_threshold=config.MODEL_ERROR_THRESHOLD,
+                cooldown=config.MODEL_COOLDOWN
+            )
+        return self._get("model_router", create)
+
+    @property
+    def openai_api(self):
+        def create():
+            from openai_api import OpenAIAPI
+            from scheduler import get_scheduler
+            config = self.config
+            return OpenAIAPI(
+                config.OPENAI_API_KEY,
+                model=config.OPENAI_MODEL,
+                base_url=config.OPENAI_BASE_URL,
+                cache=self.generation_cache,
+                router=self.model_router,
+                prompt_token_budget=config.PROMPT_TOKEN_BUDGET,
+                rapid_prompt_token_budget=config.RAPID_PROMPT_TOKEN_BUDGET,
+                request_timeout=config.OPENAI_REQUEST_TIMEOUT,
+                hedging_enabled=config.HEDGE_REQUESTS,
+                scheduler=get_scheduler(
+                    "openai", config.OPENAI_MAX_CONCURRENCY, config.INTERACTIVE_RESERVED_SLOTS,
+                    initial=config.OPENAI_INITIAL_CONCURRENCY
+                )
+            )
+        return self._get("openai_api", create)
+
+    @property
+    def excel_manager(self):
+        def create():
+            from excel_manager import ExcelManager
+            return ExcelManager(self.config.EXCEL_FILE_PATH, snapshot_dir=self.config.LIBRARY_SNAPSHOT_DIR)
+        return self._get("excel_manager", create)
+
+    @property
+    def job_queue(self):
+        def create():
+            from job_queue import JobQueue
+            return JobQueue(self.config.JOB_QUEUE_PATH)
+        return self._get("job_queue", create)
+
+    @property
+    def usage_tracker(self):
+        def create():
+            from usage_tracker import UsageTracker
+            return UsageTracker(self.config.USAGE_METRICS_PATH)
+        return self._get("usage_tracker", create)
+
+    @property
+    def failure_registry(self):
+        def create():
+            from failure_registry import FailureRegistry
+            config = self.config
+            return FailureRegistry(
+                config.FAILURE_REGISTRY_PATH,
+                max_attempts=config.FAILURE_MAX_ATTEMPTS,
+                base_backoff=config.FAILURE_BACKOFF_SECONDS,
+                max_backoff=config.FAILURE_MAX_BACKOFF_SECONDS
+            )
+        return self._get("failure_registry", create)
+
+    def warm(self) -> None:
+        """Load the configuration and the library snapshot ahead of the first request.
+
+        Called by the gunicorn master with preload_app, so every worker
+        starts with the snapshot mapped instead of loading it on its first
+        request.
+        """
+        try:
+            games = len(self.excel_manager.read_snapshot())
+            logger.info(f"Warmed library snapshot with {games} games")
+        except Exception as e:
+            logger.error(f"Error warming library snapshot: {e}")
+
+    def _after_fork(self) -> None:
+        """Drop everything a forked child must not share with its parent."""
+        self.lock = threading.RLock()
+        self._instances = {name: instance for name, instance in self._instances.items() if name in self.FORK_SAFE}
+
+# The services every entry point uses
+SERVICES = Services()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SERVICES._after_fork)
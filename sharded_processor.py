@@ -0,0 +1,310 @@
+import os
+import sys
+import time
+import socket
+import logging
+import threading
+import subprocess
+
+from config import Config
+from rawg_api import RawgAPI
+from excel_manager import ExcelManager
+from rapid_processor import RapidGameProcessor
+from work_queue import WorkQueue
+from memory import GameIdSet
+from failure_registry import FailureRegistry
+from scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+class ShardWorker(RapidGameProcessor):
+    """Rapid processor that takes its games from a shared work queue.
+
+    Any number of workers, in separate processes or on separate hosts, can
+    run against the same queue and Excel file. Every claimed game is either
+    completed, released or failed back to the queue, and the leases of games
+    in flight are renewed while the worker is alive.
+    """
+
+    def __init__(self, worker_id=None, time_limit_minutes=60, use_cache=True, excel_path=None):
+        """Initialize the worker.
+
+        Args:
+            worker_id: Identifier used for leases (default: host name and process ID)
+            time_limit_minutes: Time limit in minutes
+            use_cache: Whether to reuse previously generated wiki entries
+            excel_path: Shared Excel file to write to
+        """
+        config = Config()
+        super().__init__(
+            target_count=sys.maxsize,
+            time_limit_minutes=time_limit_minutes,
+            use_cache=use_cache,
+            excel_path=excel_path or config.SHARDED_EXCEL_FILE_PATH
+        )
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.work_queue = WorkQueue(
+            self.config.WORK_QUEUE_PATH,
+            lease_seconds=self.config.WORK_LEASE_SECONDS,
+            max_attempts=self.config.WORK_MAX_ATTEMPTS
+        )
+        self.leases = set()
+        self.heartbeat_stop = threading.Event()
+        self.processed_games = GameIdSet(self.excel_manager.get_processed_game_ids())
+
+    def _list_games(self):
+        """Yield games claimed from the work queue until it is drained."""
+        while self._can_admit():
+            games = self.work_queue.claim(self.worker_id, self.config.WORK_CLAIM_BATCH)
+            if not games:
+                if self.work_queue.is_drained() or self.pipeline.stopping.is_set():
+                    return
+                # Wait for more games to be published or for expired leases
+                time.sleep(1)
+                continue
+
+            with self.lock:
+                self.leases.update(game['id'] for game in games)
+
+            # Games leased before may have been stored by a worker that died before completing them
+            if any(game['attempts'] for game in games):
+                stored = set(self.excel_manager.get_processed_game_ids())
+                with self.lock:
+                    self.processed_games.update(stored)
+
+            for game in games:
+                yield game
+
+    def _settle(self, game_id, outcome, error=None):
+        """Hand a claimed game back to the queue.
+
+        Args:
+            game_id: The game to settle
+            outcome: "complete", "release" or "fail"
+            error: Description of the failure when failing
+        """
+        with self.lock:
+            if game_id not in self.leases:
+                return
+            self.leases.discard(game_id)
+
+        try:
+            if outcome == "complete":
+                held = self.work_queue.complete(self.worker_id, game_id)
+            elif outcome == "release":
+                held = self.work_queue.release(self.worker_id, game_id)
+            else:
+                held = self.work_queue.fail(self.worker_id, game_id, error)
+            if not held:
+                logger.warning(f"Lease on game {game_id} was lost before it could be settled")
+        except Exception as e:
+            # The lease expires and the game is reclaimed
+            logger.error(f"Error settling game {game_id}: {e}")
+
+    def _fetch_game(self, game):
+        """Fetch a claimed game, settling it if it will not be processed."""
+        item = super()._fetch_game(game)
+        if item is None:
+            if game['id'] in self.processed_games:
+                self._settle(game['id'], "complete")
+            elif self.admission_closed:
+                self._settle(game['id'], "release")
+            else:
+                self._settle(game['id'], "fail", "Could not fetch game details")
+        return item
+
+    def _requeue(self, item):
+        """Requeue a failed generation, failing the game in the queue once it gives up."""
+        super()._requeue(item)
+        if self.generation_attempts.get(item['game_id'], 0) >= self.config.MAX_GENERATION_ATTEMPTS:
+            self._settle(item['game_id'], "fail", "Wiki generation failed")
+
+    def _store_item(self, item):
+        """Store a generated game and complete it in the queue."""
+        if super()._store_item(item):
+            self._settle(item['game_id'], "complete")
+            return True
+
+        # A worker whose lease expired may already have stored this game
+        if item['game_id'] in self.excel_manager.get_processed_game_ids():
+            self._settle(item['game_id'], "complete")
+        else:
+            self._settle(item['game_id'], "fail", "Could not save game")
+        return None
+
+    def _run_heartbeat(self):
+        """Renew the leases of games in flight until the worker stops."""
+        interval = max(self.work_queue.lease_seconds / 3, 1)
+        while not self.heartbeat_stop.wait(interval):
+            with self.lock:
+                game_ids = list(self.leases)
+            try:
+                self.work_queue.renew(self.worker_id, game_ids)
+            except Exception as e:
+                logger.error(f"Error renewing leases: {e}")
+
+    def run(self):
+        """Process games from the work queue until it is drained or time runs out."""
+        logger.info(f"Worker {self.worker_id} starting on {self.config.WORK_QUEUE_PATH}")
+        heartbeat = threading.Thread(target=self._run_heartbeat, name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            results = super().run()
+        finally:
+            self.heartbeat_stop.set()
+            # Games claimed but not processed go back to the queue for other workers
+            with self.lock:
+                remaining = list(self.leases)
+            for game_id in remaining:
+                self._settle(game_id, "release")
+            if remaining:
+                logger.info(f"Released {len(remaining)} unprocessed games")
+
+        results["queue"] = self.work_queue.counts()
+        return results
+
+class Coordinator:
+    """Publishes games into the work queue and watches it until it is drained."""
+
+    def __init__(self, excel_path=None):
+        """Initialize the coordinator.
+
+        Args:
+            excel_path: Shared Excel file the workers write to
+        """
+        self.config = Config()
+        self.rawg_api = RawgAPI(
+            self.config.RAWG_API_KEY,
+            request_timeout=self.config.RAWG_REQUEST_TIMEOUT,
+            scheduler=get_scheduler(
+                "rawg", self.config.RAWG_MAX_CONCURRENCY, self.config.INTERACTIVE_RESERVED_SLOTS,
+                initial=self.config.RAWG_INITIAL_CONCURRENCY
+            )
+        )
+        self.excel_manager = ExcelManager(excel_path or self.config.SHARDED_EXCEL_FILE_PATH)
+        self.failure_registry = FailureRegistry(
+            self.config.FAILURE_REGISTRY_PATH,
+            max_attempts=self.config.FAILURE_MAX_ATTEMPTS,
+            base_backoff=self.config.FAILURE_BACKOFF_SECONDS,
+            max_backoff=self.config.FAILURE_MAX_BACKOFF_SECONDS
+        )
+        self.work_queue = WorkQueue(
+            self.config.WORK_QUEUE_PATH,
+            lease_seconds=self.config.WORK_LEASE_SECONDS,
+            max_attempts=self.config.WORK_MAX_ATTEMPTS
+        )
+
+    def publish(self, target_count):
+        """Publish up to target_count games that have not been stored or failed recently.
+
+        Args:
+            target_count: Number of games to queue
+
+        Returns:
+            Number of games newly queued
+        """
+        self.work_queue.open_publishing()
+        processed = set(self.excel_manager.get_processed_game_ids())
+        queued = 0
+        page = 1
+
+        try:
+            while queued < target_count:
+                games = self.rawg_api.get_indie_games(page=page, page_size=self.config.PAGE_SIZE, min_reviews=1)
+                if not games:
+                    break
+                new_games = [
+                    (game['id'], game.get('name', '')) for game in games
+                    if game['id'] not in processed and not self.failure_registry.is_blocked(game['id'])
+                ]
+                queued += self.work_queue.publish(new_games[:target_count - queued])
+                page += 1
+        finally:
+            self.work_queue.close_publishing()
+
+        logger.info(f"Published {queued} games to {self.config.WORK_QUEUE_PATH}")
+        return queued
+
+    def monitor(self, interval=10, workers=None):
+        """Reclaim expired leases and log progress until the queue is drained.
+
+        Args:
+            interval: Seconds between progress log lines
+            workers: Local worker processes to wait for
+
+        Returns:
+            Final status counts
+        """
+        workers = workers or []
+        while not self.work_queue.is_drained():
+            self.work_queue.reclaim_expired()
+            counts = self.work_queue.counts()
+            logger.info(
+                f"Queue: {counts['pending']} pending, {counts['leased']} leased, "
+                f"{counts['done']} done, {counts['failed']} failed"
+            )
+            if workers and all(worker.poll() is not None for worker in workers):
+                logger.warning("All workers exited before the queue was drained")
+                break
+            time.sleep(interval)
+
+        for worker in workers:
+            worker.wait()
+        return self.work_queue.counts()
+
+def spawn_workers(count, time_limit_minutes, excel_path=None, use_cache=True):
+    """Start local worker processes.
+
+    Args:
+        count: Number of worker processes
+        time_limit_minutes: Time limit for each worker
+        excel_path: Shared Excel file to write to
+        use_cache: Whether workers reuse previously generated wiki entries
+
+    Returns:
+        List of worker processes
+    """
+    command = [sys.executable, os.path.abspath(__file__), "worker", "--time", str(time_limit_minutes)]
+    if excel_path:
+        command += ["--excel", excel_path]
+    if not use_cache:
+        command.append("--no-cache")
+    return [subprocess.Popen(command) for _ in range(count)]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sharded Game Wiki Generator")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="Publish games and monitor the work queue")
+    coordinator_parser.add_argument("--count", type=int, default=10000, help="Number of games to publish")
+    coordinator_parser.add_argument("--workers", type=int, default=0, help="Local worker processes to start")
+    coordinator_parser.add_argument("--time", type=int, default=60, help="Time limit for local workers in minutes")
+
+    worker_parser = subparsers.add_parser("worker", help="Process games from the work queue")
+    worker_parser.add_argument("--time", type=int, default=60, help="Time limit in minutes")
+    worker_parser.add_argument("--worker-id", help="Identifier used for leases")
+
+    for role_parser in (coordinator_parser, worker_parser):
+        role_parser.add_argument("--excel", help="Shared Excel file (default: SHARDED_EXCEL_FILE_PATH)")
+        role_parser.add_argument("--no-cache", action="store_true", help="Regenerate entries instead of reusing cached ones")
+    args = parser.parse_args()
+
+    if args.role == "coordinator":
+        coordinator = Coordinator(excel_path=args.excel)
+        coordinator.publish(args.count)
+        workers = spawn_workers(args.workers, args.time, args.excel, use_cache=not args.no_cache)
+        counts = coordinator.monitor(workers=workers)
+        print("\n--- Sharded Processing Complete ---")
+        print(f"Done: {counts['done']}, failed: {counts['failed']}, pending: {counts['pending']}, leased: {counts['leased']}")
+    else:
+        worker = ShardWorker(
+            worker_id=args.worker_id,
+            time_limit_minutes=args.time,
+            use_cache=not args.no_cache,
+            excel_path=args.excel
+        )
+        results = worker.run()
+        print(f"\n--- Worker {worker.worker_id} Complete ---")
+        print(f"Games processed: {results['games_processed']} in {results['elapsed_time']:.2f} seconds")
+        print(f"Queue: {results['queue']}")
@@ -0,0 +1,36 @@
+#!/usr/bin/env bash
+# Start the web server and the job runner together, for hosts that run one
+# process per service and keep the data directory on that service's disk.
+# The job runner is restarted whenever it exits, and both are stopped
+# together. Extra arguments are passed to gunicorn.
+#
+# Environment:
+#   PORT: Port to listen on (default 5000)
+#   WEB_CONCURRENCY: Gunicorn workers (read by gunicorn, default 1)
+
+# Keep the job runner running, restarting it after a crash
+supervise_job_runner() {
+    trap 'kill -TERM $runner 2>/dev/null; wait $runner; exit 0' TERM INT
+    while true; do
+        python job_runner.py &
+        runner=$!
+        wait $runner
+        echo "job_runner.py exited with status $?, restarting in 5 seconds" >&2
+        sleep 5
+    done
+}
+
+supervise_job_runner &
+supervisor=$!
+
+gunicorn --bind "0.0.0.0:${PORT:-5000}" "$@" main:app &
+web=$!
+
+trap 'kill -TERM $web $supervisor 2>/dev/null' TERM INT
+wait $web
+status=$?
+
+# wait returns early when a trapped signal arrives, so stop both and wait again
+kill -TERM $web $supervisor 2>/dev/null
+wait $web $supervisor
+exit $status
@@ -0,0 +1,69 @@
+import time
+import unittest
+
+from model_router import CircuitBreaker, ModelRouter
+
+class ModelRouterTest(unittest.TestCase):
+    """Circuit breaker probes across model tiers."""
+
+    def setUp(self):
+        self.router = ModelRouter({"standard": ["primary", "fallback"]}, cooldown=0.01)
+
+    def trip(self, model):
+        breaker = self.router.breakers[model]
+        for _ in range(breaker.min_calls):
+            self.router.record(model, False, 1.0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_candidates_claim_nothing(self):
+        self.trip("fallback")
+        time.sleep(0.02)
+        for _ in range(3):
+            self.assertEqual(self.router.candidates("standard"), ["primary", "fallback"])
+        self.assertTrue(self.router.acquire("fallback", "standard"))
+
+    def test_fallback_probe_recovers_after_primary_succeeds(self):
+        self.trip("fallback")
+        time.sleep(0.02)
+
+        # The primary serves the request, so the fallback is never claimed
+        model = self.router.candidates("standard")[0]
+        self.assertTrue(self.router.acquire(model, "standard"))
+        self.router.record(model, True, 0.1)
+
+        # A later request that falls back still gets the fallback's probe
+        self.router.breakers["primary"].cooldown = 60
+        self.trip("primary")
+        self.assertEqual(self.router.candidates("standard"), ["fallback"])
+        self.assertTrue(self.router.acquire("fallback", "standard"))
+        self.router.record("fallback", True, 0.1)
+        self.assertEqual(self.router.breakers["fallback"].state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_one_probe_until_released(self):
+        self.trip("fallback")
+        time.sleep(0.02)
+        self.assertTrue(self.router.acquire("fallback", "standard"))
+        self.assertFalse(self.router.acquire("fallback", "standard"))
+        self.assertEqual(self.router.candidates("standard"), ["primary"])
+
+        self.router.release("fallback")
+        self.assertEqual(self.router.breakers["fallback"].state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.router.acquire("fallback", "standard"))
+        self.router.record("fallback", False, 0.1)
+        self.assertEqual(self.router.breakers["fallback"].state, CircuitBreaker.OPEN)
+
+    def test_one_probe_per_cooldown_when_every_tier_is_open(self):
+        self.trip("primary")
+        self.trip("fallback")
+        self.assertEqual(self.router.candidates("standard"), ["primary"])
+        self.assertFalse(self.router.acquire("primary", "standard"))
+        self.assertFalse(self.router.acquire("fallback", "standard"))
+
+        time.sleep(0.02)
+        self.assertTrue(self.router.acquire("primary", "standard"))
+        self.assertFalse(self.router.acquire("primary", "standard"))
+        self.router.record("primary", False, 0.1)
+        self.assertFalse(self.router.acquire("primary", "standard"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import threading
+import unittest
+
+from concurrency import AIMDController
+from scheduler import PriorityScheduler, INTERACTIVE, BULK
+
+class PrioritySchedulerTest(unittest.TestCase):
+    """Interactive reservation under a shrinking adaptive limit."""
+
+    def setUp(self):
+        self.controller = AIMDController("test", initial=4, max_limit=8)
+        self.scheduler = PriorityScheduler("test", 8, reserved_interactive=2, controller=self.controller)
+
+    def start(self, name):
+        """Acquire a slot in a thread; the returned event is set once it is granted."""
+        granted = threading.Event()
+        threading.Thread(target=lambda: (self.scheduler.acquire(name), granted.set()), daemon=True).start()
+        return granted
+
+    def test_bulk_keeps_out_of_reserved_slots(self):
+        self.scheduler.acquire(BULK)
+        self.scheduler.acquire(BULK)
+        self.assertFalse(self.start(BULK).wait(0.1))
+        self.assertTrue(self.start(INTERACTIVE).wait(1))
+        self.assertTrue(self.start(INTERACTIVE).wait(1))
+
+    def test_reservation_holds_when_limit_drops_to_one(self):
+        self.controller.limit = 1.0
+        self.assertEqual(self.scheduler.limit(), 3)
+        self.scheduler.acquire(BULK)
+        self.assertFalse(self.start(BULK).wait(0.1))
+        self.assertTrue(self.start(INTERACTIVE).wait(1))
+        self.assertTrue(self.start(INTERACTIVE).wait(1))
+        self.assertFalse(self.start(INTERACTIVE).wait(0.1))
+
+    def test_limit_follows_controller_above_the_reservation(self):
+        self.controller.limit = 6.0
+        self.assertEqual(self.scheduler.limit(), 6)
+        self.controller.limit = 20.0
+        self.assertEqual(self.scheduler.limit(), 8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,510 @@
+import os
+import re
+import glob
+import json
+import time
+import queue
+import atexit
+import logging
+import argparse
+import functools
+import threading
+import contextvars
+import statistics
+from collections import defaultdict
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Span of the code currently running, the parent of spans started without one
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """One timed operation in a trace.
+
+    Use as a context manager to make it the parent of spans started inside
+    the block, or call end() when the operation finishes elsewhere, such as
+    a game span covering several pipeline stages.
+    """
+
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "attributes", "start", "start_monotonic",
+                 "duration", "status", "_token")
+
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.start_monotonic = time.monotonic()
+        self.duration: Optional[float] = None
+        self.status = "ok"
+        self._token = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Set an attribute."""
+        self.attributes[key] = value
+
+    def end(self, status: Optional[str] = None) -> None:
+        """Finish the span and export it. Later calls do nothing.
+
+        Args:
+            status: "ok", "error" or "cancelled" (default: keep the current status)
+        """
+        if self.duration is not None:
+            return
+        self.duration = time.monotonic() - self.start_monotonic
+        if status:
+            self.status = status
+        self.tracer.export(self)
+
+    def __enter__(self) -> 'Span':
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.attributes["error"] = str(exc)
+        self.end("error" if exc is not None else None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name
+        }
+
+class _NoopSpan:
+    """Stand-in returned while tracing is off, so call sites need no checks."""
+
+    trace_id = span_id = parent_id = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, status: Optional[str] = None) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class JsonlExporter:
+    """Writes finished spans, one JSON object per line, to a rotating file per process.
+
+    Rotating a file that several processes append to loses spans, so every
+    process (each gunicorn worker, the job runner, command-line runs) writes
+    its own <name>_<pid>.jsonl next to the configured path, as metrics do.
+    load_spans reads them all. Files of processes that have exited are kept
+    for analysis, oldest removed first, up to what one process may keep.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 5):
+        """Initialize the exporter.
+
+        Args:
+            path: Trace file path; the process ID is added to the name, and
+                rotated files get .1, .2, ... appended
+            max_bytes: Size at which the file is rotated
+            backup_count: Rotated files kept
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.logger = logging.getLogger(f"{__name__}.spans")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self._remove_dead_files()
+        self._open()
+
+    @property
+    def file_path(self) -> str:
+        """The trace file of this process."""
+        stem, extension = os.path.splitext(self.path)
+        return f"{stem}_{os.getpid()}{extension}"
+
+    def _open(self) -> None:
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        # Opened on the first span, so processes that record none leave no file
+        handler = RotatingFileHandler(self.file_path, maxBytes=self.max_bytes, backupCount=self.backup_count, delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _remove_dead_files(self) -> None:
+        """Remove the oldest files of exited processes beyond one process's rotation budget."""
+        budget = self.max_bytes * (self.backup_count + 1)
+        dead = []
+        for pid, file_path in _process_files(self.path):
+            if pid == os.getpid() or self._is_alive(pid):
+                continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            dead.append((stat.st_mtime, stat.st_size, file_path))
+        total = sum(size for _, size, _ in dead)
+        for _, size, file_path in sorted(dead):
+            if total <= budget:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            total -= size
+
+    def export(self, span: Span) -> None:
+        self.logger.info(json.dumps(span.to_dict(), default=str))
+
+    def shutdown(self) -> None:
+        for handler in self.logger.handlers:
+            handler.flush()
+
+    def _after_fork(self) -> None:
+        """Write a forked child's spans to a file of its own."""
+        self._open()
+
+class OtlpExporter:
+    """Sends spans in batches to an OpenTelemetry collector over OTLP/HTTP with JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str = "game-wiki-generator", batch_size: int = 256,
+                 interval: float = 2.0, max_queue: int = 10000):
+        """Initialize the exporter.
+
+        Args:
+            endpoint: Collector traces URL, e.g. http://localhost:4318/v1/traces
+            service_name: service.name resource attribute
+            batch_size: Most spans per request
+            interval: Seconds between sends
+            max_queue: Spans buffered before new ones are dropped
+        """
+        import requests
+
+        self.session = requests.Session()
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.failing = False
+        self.thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self.thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self.queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self._send_pending()
+
+    def _send_pending(self) -> None:
+        while not self.queue.empty():
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                response = self.session.post(self.endpoint, json=self._payload(batch), timeout=5)
+                response.raise_for_status()
+                if self.failing:
+                    logger.info(f"Sending spans to {self.endpoint} works again")
+                self.failing = False
+            except Exception as e:
+                # Log only the first failure of a streak; the collector may simply not be running
+                if not self.failing:
+                    logger.warning(f"Could not send {len(batch)} spans to {self.endpoint}: {e}")
+                self.failing = True
+                return
+
+    def _payload(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [{
+                        "traceId": span["trace_id"],
+                        "spanId": span["span_id"],
+                        "parentSpanId": span["parent_id"] or "",
+                        "name": span["name"],
+                        "kind": 1,
+                        "startTimeUnixNano": str(int(span["start"] * 1e9)),
+                        "endTimeUnixNano": str(int((span["start"] + span["duration"]) * 1e9)),
+                        "attributes": [_otlp_attribute(key, value) for key, value in span["attributes"].items()],
+                        # 0 = UNSET (cancelled), 1 = OK, 2 = ERROR
+                        "status": {"code": {"ok": 1, "error": 2}.get(span["status"], 0)}
+                    } for span in spans]
+                }]
+            }]
+        }
+
+    def shutdown(self) -> None:
+        self._send_pending()
+
+    def _after_fork(self) -> None:
+        """Start a sender in a forked child; the parent's thread and connections are not inherited."""
+        import requests
+
+        self.session = requests.Session()
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self.thread.start()
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+class Tracer:
+    """Creates spans and hands finished ones to the configured exporter."""
+
+    def __init__(self):
+        self.exporter = None
+
+    def configure(self, exporter: Optional[str], path: Optional[str] = None, max_bytes: int = 50 * 1024 * 1024,
+                  endpoint: Optional[str] = None) -> None:
+        """Turn tracing on or off.
+
+        Args:
+            exporter: "jsonl", "otlp", or None/"" to turn tracing off
+            path: Trace file for the jsonl exporter
+            max_bytes: Size at which the trace file is rotated
+            endpoint: Collector traces URL for the otlp exporter
+        """
+        if self.exporter is not None:
+            return
+        if exporter == "jsonl":
+            self.exporter = JsonlExporter(path, max_bytes=max_bytes)
+        elif exporter == "otlp":
+            self.exporter = OtlpExporter(endpoint)
+        elif exporter:
+            logger.warning(f"Unknown trace exporter {exporter!r}. Tracing is off.")
+            return
+        else:
+            return
+        atexit.register(self.exporter.shutdown)
+        logger.info(f"Tracing spans to {self.exporter.file_path if exporter == 'jsonl' else endpoint}")
+
+    def span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        """Start a span.
+
+        Args:
+            name: Operation name
+            parent: Parent span (default: the current span, if any)
+            **attributes: Attributes recorded with the span
+
+        Returns:
+            The started span, or a no-op span while tracing is off
+        """
+        if self.exporter is None:
+            return NOOP_SPAN
+        if parent is None or parent is NOOP_SPAN:
+            parent = _current_span.get()
+        return Span(self, name, parent, attributes)
+
+    def current(self) -> Span:
+        """Get the current span, or a no-op span if there is none."""
+        return _current_span.get() or NOOP_SPAN
+
+    def traced(self, name: str):
+        """Decorate a function to run it in a span of its own.
+
+        Args:
+            name: Operation name
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.error(f"Error exporting span {span.name}: {e}")
+
+    def _after_fork(self) -> None:
+        if self.exporter is not None:
+            self.exporter._after_fork()
+
+# The tracer every module records into
+TRACER = Tracer()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=TRACER._after_fork)
+
+def _process_files(path: str) -> List[Tuple[int, str]]:
+    """List (pid, path) for every process's trace file and its rotated files.
+
+    Args:
+        path: Trace file path as configured, without a process ID
+    """
+    stem, extension = os.path.splitext(path)
+    process_file = re.compile(re.escape(os.path.basename(stem)) + r"_(\d+)" + re.escape(extension) + r"(\.\d+)?$")
+    files = []
+    for file_path in glob.glob(f"{glob.escape(stem)}_*"):
+        match = process_file.match(os.path.basename(file_path))
+        if match:
+            files.append((int(match.group(1)), file_path))
+    return files
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """Read the spans of every process's trace file and their rotated files.
+
+    Args:
+        path: Trace file path as configured, without a process ID
+
+    Returns:
+        Spans, in no particular order
+    """
+    # A single trace file written before files were kept per process is read as well
+    file_paths = [path] + sorted(glob.glob(f"{glob.escape(path)}.*")) + sorted(
+        file_path for _, file_path in _process_files(path)
+    )
+
+    spans = []
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            continue
+        try:
+            with open(file_path) as f:
+                for line in f:
+                    try:
+                        spans.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError as e:
+            logger.error(f"Error reading trace file {file_path}: {e}")
+    return spans
+
+def critical_path(span: Dict[str, Any], children: Dict[str, List[Dict[str, Any]]]) -> List[Tuple[str, float]]:
+    """Find the chain of operations that determined a span's duration.
+
+    Working back from the end of the span, the child that finished last is
+    on the critical path, then the child that finished last before that one
+    started, and so on. Time not covered by such a child is the span's own.
+
+    Args:
+        span: The span
+        children: Child spans keyed by parent span ID
+
+    Returns:
+        List of (span name, seconds on the critical path)
+    """
+    start = span["start"]
+    cursor = start + span["duration"]
+    own = 0.0
+    path = []
+    for child in sorted(children.get(span["span_id"], []), key=lambda c: c["start"] + c["duration"], reverse=True):
+        if child["start"] >= cursor:
+            continue
+        own += max(cursor - (child["start"] + child["duration"]), 0.0)
+        path.extend(critical_path(child, children))
+        cursor = max(child["start"], start)
+    own += max(cursor - start, 0.0)
+    return [(span["name"], own)] + path
+
+def summarize(spans: List[Dict[str, Any]], root_name: Optional[str] = None, top: int = 5) -> None:
+    """Print where the time of traced operations went.
+
+    Args:
+        spans: Spans from load_spans
+        root_name: Only summarize traces whose root span has this name
+        top: Number of slowest traces to break down
+    """
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span.get("duration") is None:
+            continue
+        if span["parent_id"]:
+            children[span["parent_id"]].append(span)
+        elif root_name is None or span["name"] == root_name:
+            roots.append(span)
+    if not roots:
+        print("No finished traces found")
+        return
+
+    durations = sorted(root["duration"] for root in roots)
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"{len(roots)} traces: median {statistics.median(durations):.2f}s, p95 {p95:.2f}s, max {durations[-1]:.2f}s")
+
+    totals = defaultdict(float)
+    breakdowns = []
+    for root in roots:
+        per_name = defaultdict(float)
+        for name, seconds in critical_path(root, children):
+            per_name[name] += seconds
+            totals[name] += seconds
+        breakdowns.append((root, per_name))
+
+    total = sum(totals.values()) or 1.0
+    print("\nCritical path time by operation (all traces):")
+    print(f"  {'operation':<36} {'total':>10} {'share':>7} {'per trace':>10}")
+    for name, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {name:<36} {seconds:>9.2f}s {seconds / total * 100:>6.1f}% {seconds / len(roots):>9.3f}s")
+
+    print(f"\nSlowest {min(top, len(roots))} traces:")
+    for root, per_name in sorted(breakdowns, key=lambda item: item[0]["duration"], reverse=True)[:top]:
+        label = ", ".join(f"{key}={value}" for key, value in root["attributes"].items())
+        print(f"  {root['name']} {root['trace_id'][:12]} ({label}) {root['duration']:.2f}s [{root['status']}]")
+        for name, seconds in sorted(per_name.items(), key=lambda item: item[1], reverse=True):
+            if seconds >= 0.001:
+                print(f"    {name:<34} {seconds:>8.3f}s")
+
+if __name__ == "__main__":
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Summarize pipeline traces")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summarize_parser = subparsers.add_parser("summarize", help="Show the critical path of traced games")
+    summarize_parser.add_argument("--path", help="Trace file (default: TRACE_FILE_PATH)")
+    summarize_parser.add_argument("--root", default="game", help="Root span name to summarize (default: game)")
+    summarize_parser.add_argument("--top", type=int, default=5, help="Number of slowest traces to break down")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    summarize(load_spans(args.path or Config().TRACE_FILE_PATH), root_name=args.root or None, top=args.top)
@@ -1,72 +1,72 @@
 import os
-import pandas as pd
-from config import Config
-from rawg_api import RawgAPI
+from services import SERVICES
 from logger import setup_logger
+from scheduler import priority, REFRESH
 import time
 
 # Set up the logger
 logger = setup_logger()
 
-# Initialize configuration and APIs
-config = Config()
-rawg_api = RawgAPI(config.RAWG_API_KEY)
+# Configuration and the RAWG client are shared with the rest of the process
+config = SERVICES.config
+rawg_api = SERVICES.rawg_api
 
 def update_review_counts():
-    """Update review counts for all games in the Excel file."""
+    """Update review counts for all games in the Excel file.
+
+    Counts are fetched from RAWG without holding the library lock, which
+    can take minutes, and then written in one locked update, so games that
+    other jobs add in the meantime are kept.
+    """
     logger.info("Starting update of review counts")
-    
+
     try:
-        # Read the Excel file
-        excel_path = config.EXCEL_FILE_PATH
-        df = pd.read_excel(excel_path, engine='openpyxl')
-        
+        # Read the library
+        excel_manager = SERVICES.excel_manager
+        library = excel_manager.read_snapshot()
+
         # Check if there are games to update
-        if len(df) == 0:
+        if len(library) == 0:
             logger.info("No games to update")
             return
-        
-        logger.info(f"Found {len(df)} games to update")
-        
-        # Track updates
-        updated_count = 0
-        
+
+        logger.info(f"Found {len(library)} games to update")
+
+        # Latest counts by Game ID
+        updates = {}
+
         # Iterate through all games
-        for index, row in df.iterrows():
+        for game_id in library.game_ids().tolist():
+            game_name = library.value('Name', library.find(game_id)) if 'Name' in library.columns else 'Unknown'
             try:
-                game_id = row['Game ID']
-                game_name = row['Name']
-                
                 # Fetch latest data from RAWG API
                 logger.info(f"Fetching data for {game_name} (ID: {game_id})")
                 game_details = rawg_api.get_game_details(game_id)
-                
+
                 if game_details and 'ratings_count' in game_details:
                     # Get the ratings count
                     ratings_count = game_details.get('ratings_count', 0)
-                    
-                    # Update the dataframe
-                    df.at[index, 'Review Count'] = ratings_count
-                    
+                    updates[game_id] = {'Review Count': ratings_count}
+
                     logger.info(f"Updated {game_name}: Review Count = {ratings_count}")
-                    updated_count += 1
-                    
+
                     # Sleep to avoid rate limits
                     time.sleep(0.5)
                 else:
                     logger.warning(f"Could not fetch data for {game_name} (ID: {game_id})")
-            
+
             except Exception as e:
-                logger.error(f"Error updating game {row.get('Name', 'Unknown')}: {e}")
-        
-        # Save the updated dataframe
-        df.to_excel(excel_path, index=False, engine='openpyxl')
-        
-        logger.info(f"Update completed. Updated {updated_count} out of {len(df)} games.")
-        
+                logger.error(f"Error updating game {game_name}: {e}")
+
+        # Save the updated counts
+        updated_count = excel_manager.update_columns(updates)
+
+        logger.info(f"Update completed. Updated {updated_count} out of {len(library)} games.")
+
     except Exception as e:
         logger.error(f"Error in update_review_counts: {e}")
 
 if __name__ == "__main__":
-    update_review_counts()
-    print("Review count update complete! Check the logs for details.") 
\ No newline at end of file
+    with priority(REFRESH):
+        update_review_counts()
+    print("Review count update complete! Check the logs for details.")
@@ -0,0 +1,227 @@
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Approximate USD prices per 1M tokens as (prompt, completion)
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-3.5-turbo-instruct": (1.50, 2.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the cost of a completion.
+
+    Args:
+        model: The model used
+        prompt_tokens: Tokens in the prompt
+        completion_tokens: Tokens in the completion
+
+    Returns:
+        Estimated cost in USD (0.0 for unknown models)
+    """
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+class UsageTracker:
+    """Records per-game token usage, latency and cost in a metrics table."""
+
+    def __init__(self, db_path: str):
+        """Initialize the usage tracker.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        """Create the metrics table if it does not exist yet."""
+        with self.lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS game_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    game_id INTEGER NOT NULL,
+                    game_name TEXT,
+                    model TEXT,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    cached INTEGER NOT NULL DEFAULT 0,
+                    batch_size INTEGER NOT NULL DEFAULT 1,
+                    generation_seconds REAL,
+                    rawg_seconds REAL,
+                    cost_usd REAL NOT NULL DEFAULT 0,
+                    recorded_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_game_metrics_run ON game_metrics (run_id)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def new_run_id(kind: str) -> str:
+        """Create an identifier for a processing run.
+
+        Args:
+            kind: Kind of run, such as "daily" or "rapid"
+
+        Returns:
+            Run identifier including a timestamp
+        """
+        return f"{kind}-{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+
+    def record(self, run_id: str, game_id: int, game_name: str, usage: Optional[Dict[str, Any]],
+               rawg_seconds: Optional[float]) -> None:
+        """Record the usage for one processed game.
+
+        Args:
+            run_id: Identifier of the current run
+            game_id: RAWG game ID
+            game_name: Name of the game
+            usage: Usage filled in by OpenAIAPI.generate_wiki_entry or generate_wiki_entries
+            rawg_seconds: Seconds spent fetching the game from RAWG
+        """
+        usage = usage or {}
+        model = usage.get('model')
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+
+        try:
+            with self.lock:
+                self._conn.execute(
+                    "INSERT INTO game_metrics (run_id, game_id, game_name, model, prompt_tokens, "
+                    "completion_tokens, cached, batch_size, generation_seconds, rawg_seconds, cost_usd, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        int(game_id),
+                        game_name,
+                        model,
+                        prompt_tokens,
+                        completion_tokens,
+                        int(bool(usage.get('cached'))),
+                        usage.get('batch_size', 1),
+                        usage.get('latency'),
+                        rawg_seconds,
+                        estimate_cost(model or '', prompt_tokens, completion_tokens),
+                        time.time()
+                    )
+                )
+                self._conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Error recording usage metrics for game {game_id}: {e}")
+
+    def summarize(self, run_id: str) -> Dict[str, Any]:
+        """Summarize usage for a run.
+
+        Args:
+            run_id: Identifier of the run
+
+        Returns:
+            Dictionary with totals and per-game averages
+        """
+        with self.lock:
+            row = self._conn.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0),
+                       COALESCE(SUM(cached), 0), COALESCE(SUM(cost_usd), 0),
+                       AVG(generation_seconds), AVG(rawg_seconds)
+                FROM game_metrics WHERE run_id = ?
+                """,
+                (run_id,)
+            ).fetchone()
+            models = self._conn.execute(
+                "SELECT model, COUNT(*) FROM game_metrics WHERE run_id = ? GROUP BY model",
+                (run_id,)
+            ).fetchall()
+
+        games, prompt_tokens, completion_tokens, cached, cost, avg_generation, avg_rawg = row
+        return {
+            "run_id": run_id,
+            "games": games,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached": cached,
+            "cost_usd": cost,
+            "cost_per_game_usd": cost / games if games else 0.0,
+            "avg_generation_seconds": avg_generation,
+            "avg_rawg_seconds": avg_rawg,
+            "models": {model or "unknown": count for model, count in models}
+        }
+
+    def log_summary(self, run_id: str) -> Dict[str, Any]:
+        """Log the usage summary for a run.
+
+        Args:
+            run_id: Identifier of the run
+
+        Returns:
+            The summary that was logged
+        """
+        summary = self.summarize(run_id)
+        if not summary['games']:
+            logger.info(f"No usage recorded for run {run_id}")
+            return summary
+
+        logger.info(
+            f"Usage for run {run_id}: {summary['games']} games ({summary['cached']} cached), "
+            f"{summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion tokens, "
+            f"${summary['cost_usd']:.4f} total (${summary['cost_per_game_usd']:.5f} per game)"
+        )
+        logger.info(
+            f"Average latency per game: generation {summary['avg_generation_seconds'] or 0:.2f}s, "
+            f"RAWG fetch {summary['avg_rawg_seconds'] or 0:.2f}s"
+        )
+        return summary
+
+    def recent_runs(self, limit: int = 10) -> List[str]:
+        """Get the most recent run identifiers.
+
+        Args:
+            limit: Maximum number of runs to return
+
+        Returns:
+            Run identifiers, newest first
+        """
+        with self.lock:
+            rows = self._conn.execute(
+                "SELECT run_id FROM game_metrics GROUP BY run_id ORDER BY MAX(recorded_at) DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+if __name__ == "__main__":
+    import argparse
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Summarize per-run usage metrics")
+    parser.add_argument("run_id", nargs="?", help="Run to summarize (default: the most recent runs)")
+    parser.add_argument("--limit", type=int, default=10, help="Number of recent runs to list")
+    args = parser.parse_args()
+
+    tracker = UsageTracker(Config().USAGE_METRICS_PATH)
+    run_ids = [args.run_id] if args.run_id else tracker.recent_runs(args.limit)
+
+    for run_id in run_ids:
+        summary = tracker.summarize(run_id)
+        print(f"\n--- {run_id} ---")
+        print(f"Games: {summary['games']} ({summary['cached']} cached)")
+        print(f"Tokens: {summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion")
+        print(f"Cost: ${summary['cost_usd']:.4f} (${summary['cost_per_game_usd']:.5f} per game)")
+        print(f"Avg generation latency: {summary['avg_generation_seconds'] or 0:.2f}s")
+        print(f"Avg RAWG fetch latency: {summary['avg_rawg_seconds'] or 0:.2f}s")
+        print(f"Models: {summary['models']}")
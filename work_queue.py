@@ -0,0 +1,279 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+class WorkQueue:
+    """Durable queue of games to process, handed out to workers under leases.
+
+    Workers claim games with a lease that expires after lease_seconds unless
+    it is renewed. Games whose lease expired (because the worker crashed or
+    hung) go back to pending and are claimed by another worker, so no game is
+    lost. Storage rejects games it already holds, so a game reprocessed after
+    a lease expired is never stored twice.
+
+    The queue is a SQLite database, so processes on one host, or on hosts
+    sharing a volume with working file locks, can use it at the same time.
+    """
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, db_path: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        """Initialize the work queue.
+
+        Args:
+            db_path: Path to the SQLite database file
+            lease_seconds: Seconds a claimed game stays leased without renewal
+            max_attempts: Failed attempts after which a game is marked failed
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        """Create the queue tables if they do not exist yet."""
+        with self.lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS work_items (
+                    game_id INTEGER PRIMARY KEY,
+                    game_name TEXT,
+                    status TEXT NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, lease_expires)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS queue_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def _transaction(self, statements) -> Any:
+        """Run a function inside an immediate (write-locked) transaction.
+
+        Args:
+            statements: Function taking the connection and returning a result
+
+        Returns:
+            The function's result
+        """
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def publish(self, games: Iterable[Tuple[int, str]]) -> int:
+        """Add games to the queue. Games already queued are left unchanged.
+
+        Args:
+            games: (game ID, game name) pairs
+
+        Returns:
+            Number of games newly queued
+        """
+        now = time.time()
+        rows = [(int(game_id), name, self.PENDING, now) for game_id, name in games]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO work_items (game_id, game_name, status, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def close_publishing(self) -> None:
+        """Mark that the coordinator has finished publishing games."""
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO queue_state (key, value) VALUES ('publishing', 'closed')"
+        ))
+
+    def open_publishing(self) -> None:
+        """Mark that the coordinator is publishing games."""
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO queue_state (key, value) VALUES ('publishing', 'open')"
+        ))
+
+    def is_publishing(self) -> bool:
+        """Check whether the coordinator may still publish more games."""
+        with self.lock:
+            row = self._conn.execute("SELECT value FROM queue_state WHERE key = 'publishing'").fetchone()
+        return row is not None and row[0] == 'open'
+
+    def _reclaim(self, conn, now: float) -> int:
+        """Return games with expired leases to pending. Must run in a transaction."""
+        # An expired lease counts as an attempt, so a game that keeps crashing workers ends up failed
+        cursor = conn.execute(
+            "UPDATE work_items SET status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, "
+            "lease_owner = NULL, lease_expires = NULL, attempts = attempts + 1, "
+            "last_error = 'lease expired', updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (self.max_attempts, self.FAILED, self.PENDING, now, self.LEASED, now)
+        )
+        if cursor.rowcount:
+            logger.warning(f"Reclaimed {cursor.rowcount} games with expired leases")
+        return cursor.rowcount
+
+    def reclaim_expired(self) -> int:
+        """Return games whose lease expired to pending.
+
+        Returns:
+            Number of games reclaimed
+        """
+        return self._transaction(lambda conn: self._reclaim(conn, time.time()))
+
+    def claim(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Lease up to limit pending games to a worker.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            limit: Maximum number of games to claim
+
+        Returns:
+            Claimed games as dictionaries with id, name and attempts
+        """
+        def lease(conn):
+            now = time.time()
+            self._reclaim(conn, now)
+            rows = conn.execute(
+                "SELECT game_id, game_name, attempts FROM work_items WHERE status = ? ORDER BY game_id LIMIT ?",
+                (self.PENDING, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE work_items SET status = ?, lease_owner = ?, lease_expires = ?, updated_at = ? WHERE game_id = ?",
+                [(self.LEASED, worker_id, now + self.lease_seconds, now, row[0]) for row in rows]
+            )
+            return rows
+
+        rows = self._transaction(lease)
+        return [{'id': game_id, 'name': name, 'attempts': attempts} for game_id, name, attempts in rows]
+
+    def renew(self, worker_id: str, game_ids: Iterable[int]) -> int:
+        """Extend the leases a worker holds on games.
+
+        Args:
+            worker_id: Identifier of the worker
+            game_ids: Games whose leases should be extended
+
+        Returns:
+            Number of leases renewed
+        """
+        ids = [int(game_id) for game_id in game_ids]
+        if not ids:
+            return 0
+
+        def extend(conn):
+            now = time.time()
+            before = conn.total_changes
+            conn.executemany(
+                "UPDATE work_items SET lease_expires = ?, updated_at = ? "
+                "WHERE game_id = ? AND status = ? AND lease_owner = ?",
+                [(now + self.lease_seconds, now, game_id, self.LEASED, worker_id) for game_id in ids]
+            )
+            return conn.total_changes - before
+
+        return self._transaction(extend)
+
+    def _finish(self, worker_id: str, game_id: int, status: str, error: str = None,
+                count_attempt: bool = False) -> bool:
+        """Move a leased game to a new status if the worker still holds its lease."""
+        def update(conn):
+            now = time.time()
+            row = conn.execute(
+                "SELECT attempts FROM work_items WHERE game_id = ? AND status = ? AND lease_owner = ?",
+                (int(game_id), self.LEASED, worker_id)
+            ).fetchone()
+            if row is None:
+                return False
+            attempts = row[0] + (1 if count_attempt else 0)
+            new_status = status
+            if status == self.PENDING and attempts >= self.max_attempts:
+                new_status = self.FAILED
+            conn.execute(
+                "UPDATE work_items SET status = ?, lease_owner = NULL, lease_expires = NULL, attempts = ?, "
+                "last_error = COALESCE(?, last_error), updated_at = ? WHERE game_id = ?",
+                (new_status, attempts, error, now, int(game_id))
+            )
+            return True
+
+        return self._transaction(update)
+
+    def complete(self, worker_id: str, game_id: int) -> bool:
+        """Mark a leased game as done.
+
+        Args:
+            worker_id: Identifier of the worker holding the lease
+            game_id: The game that was stored
+
+        Returns:
+            True if the worker still held the lease
+        """
+        return self._finish(worker_id, game_id, self.DONE)
+
+    def release(self, worker_id: str, game_id: int) -> bool:
+        """Return a leased game to pending without counting an attempt.
+
+        Args:
+            worker_id: Identifier of the worker holding the lease
+            game_id: The game to release
+
+        Returns:
+            True if the worker still held the lease
+        """
+        return self._finish(worker_id, game_id, self.PENDING)
+
+    def fail(self, worker_id: str, game_id: int, error: str) -> bool:
+        """Record a failed attempt on a leased game.
+
+        The game returns to pending, or is marked failed once it reaches
+        max_attempts.
+
+        Args:
+            worker_id: Identifier of the worker holding the lease
+            game_id: The game that failed
+            error: Description of the failure
+
+        Returns:
+            True if the worker still held the lease
+        """
+        return self._finish(worker_id, game_id, self.PENDING, error=error, count_attempt=True)
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of games in each status.
+
+        Returns:
+            Dictionary mapping status to count
+        """
+        with self.lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall()
+        counts = {self.PENDING: 0, self.LEASED: 0, self.DONE: 0, self.FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def is_drained(self) -> bool:
+        """Check whether publishing is closed and no game is pending or leased."""
+        counts = self.counts()
+        return not self.is_publishing() and counts[self.PENDING] == 0 and counts[self.LEASED] == 0